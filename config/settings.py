@@ -68,6 +68,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'jobs.middleware.EconomyCatalogMiddleware',
 ]
 CORS_ALLOW_ALL_ORIGINS = True
 if _render_host:
@@ -106,6 +107,42 @@ DATABASES = {
     )
 }
 
+# Cache
+# CACHE_BACKEND:
+# - "" / "locmem": per-process memory (default, fine for a single worker)
+# - "database": shared table, run `python manage.py createcachetable`
+# - "redis": shared Redis at REDIS_URL (requires redis-py)
+# Run more than one worker only with a shared backend: cached state such as
+# the economy catalog version, auth token and chat push windows is otherwise
+# invisible to the other workers. Auth rate limits do not depend on this; they
+# are kept in the database (jobs/rate_limits.py).
+_cache_backend = os.environ.get("CACHE_BACKEND", "locmem").strip().lower()
+if not DEBUG and _cache_backend not in ("database", "redis"):
+    print(
+        f"[CACHE-BACKEND-WARNING] CACHE_BACKEND={_cache_backend or 'locmem'} is per-process; "
+        'set it to "database" or "redis" when running more than one worker.'
+    )
+if _cache_backend == "database":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "jobs_cache",
+        }
+    }
+elif _cache_backend == "redis":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ.get("REDIS_URL", "redis://127.0.0.1:6379/0").strip(),
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -157,10 +194,19 @@ REST_FRAMEWORK = {
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 10,
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework.authentication.TokenAuthentication",
+        "jobs.token_auth.CachedTokenAuthentication",
     ],
 }
 
+# API tokens expire after AUTH_TOKEN_TTL_DAYS without use (0 disables expiry).
+# Use moves the expiry forward at most once per AUTH_TOKEN_REFRESH_SECONDS;
+# resolved tokens are cached for AUTH_TOKEN_CACHE_SECONDS (0 disables it; the
+# database cache backend is skipped, since a cache read there is a query too).
+AUTH_TOKEN_TTL_DAYS = int(os.environ.get("AUTH_TOKEN_TTL_DAYS", "60"))
+AUTH_TOKEN_REFRESH_SECONDS = int(os.environ.get("AUTH_TOKEN_REFRESH_SECONDS", str(24 * 60 * 60)))
+AUTH_TOKEN_CACHE_SECONDS = int(os.environ.get("AUTH_TOKEN_CACHE_SECONDS", "60"))
+AUTH_TOKEN_CACHE_LOG_EVERY = int(os.environ.get("AUTH_TOKEN_CACHE_LOG_EVERY", "1000"))
+
 # Email (SMTP by default)
 EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
 EMAIL_HOST = os.environ.get("EMAIL_HOST", "smtp.gmail.com")
@@ -181,6 +227,7 @@ R2_REGION = os.environ.get("R2_REGION", "auto").strip()
 R2_ACCESS_KEY_ID = os.environ.get("R2_ACCESS_KEY_ID", "").strip()
 R2_SECRET_ACCESS_KEY = os.environ.get("R2_SECRET_ACCESS_KEY", "").strip()
 R2_ENDPOINT_URL = os.environ.get("R2_ENDPOINT_URL", "").strip()
+R2_MAX_POOL_CONNECTIONS = int(os.environ.get("R2_MAX_POOL_CONNECTIONS", "20"))
 AVATAR_PUBLIC_BASE_URL = (
     os.environ.get("AVATAR_PUBLIC_BASE_URL", "").strip()
     or os.environ.get("R2_PUBLIC_BASE_URL", "").strip()
@@ -204,6 +251,14 @@ GOOGLE_PLAY_PACKAGE_NAME = os.environ.get("GOOGLE_PLAY_PACKAGE_NAME", "").strip(
 GOOGLE_PLAY_SERVICE_ACCOUNT_JSON = os.environ.get(
     "GOOGLE_PLAY_SERVICE_ACCOUNT_JSON", ""
 ).strip()
+# Print the [GOOGLE-PLAY-VERIFY] timing line for every Nth verification (0
+# disables it); failed calls are always logged.
+GOOGLE_PLAY_VERIFY_LOG_EVERY = int(os.environ.get("GOOGLE_PLAY_VERIFY_LOG_EVERY", "100"))
+# Override only to point verification at a local stand-in (see jobs.testing.store_standins).
+GOOGLE_PLAY_API_BASE_URL = os.environ.get(
+    "GOOGLE_PLAY_API_BASE_URL",
+    "https://androidpublisher.googleapis.com/androidpublisher/v3",
+).strip()
 
 REWARDED_ADS_ENABLED = os.environ.get("REWARDED_ADS_ENABLED", "0") == "1"
 
@@ -214,6 +269,27 @@ def _env_int(name, default):
     except (TypeError, ValueError):
         return default
 
+# In-process background tasks (pushes and other slow side effects). Disable to
+# run them inline in the request thread.
+BACKGROUND_TASKS_ASYNC = os.environ.get("BACKGROUND_TASKS_ASYNC", "1") == "1"
+BACKGROUND_TASK_WORKERS = _env_int("BACKGROUND_TASK_WORKERS", 4)
+
+# Each worker keeps the economy config and store products in memory. Admin
+# changes bump a version in the default cache, which reaches other workers only
+# with a shared CACHE_BACKEND; the local copy is reloaded after this many
+# seconds regardless.
+ECONOMY_CATALOG_LOCAL_SECONDS = _env_int("ECONOMY_CATALOG_LOCAL_SECONDS", 30)
+
+# Chat messages that arrive within this many seconds of an unread push for the
+# same conversation are collapsed into it instead of producing a new one.
+CHAT_PUSH_COALESCE_SECONDS = _env_int("CHAT_PUSH_COALESCE_SECONDS", 60)
+
+# Defaults for `manage.py archive_chat_history`: messages older than
+# CHAT_ARCHIVE_AFTER_DAYS in conversations idle for CHAT_ARCHIVE_IDLE_DAYS move
+# to compressed archive segments.
+CHAT_ARCHIVE_AFTER_DAYS = _env_int("CHAT_ARCHIVE_AFTER_DAYS", 180)
+CHAT_ARCHIVE_IDLE_DAYS = _env_int("CHAT_ARCHIVE_IDLE_DAYS", 30)
+
 # Public mobile app update config. Bump these env vars when a newer store
 # version is available; old app builds will then show the update button.
 JOBHUB_LATEST_ANDROID_VERSION = os.environ.get(
@@ -246,3 +322,12 @@ APPLE_SIGN_IN_CLIENT_IDS = os.environ.get(
 # Apple In-App Purchases / receipt verification
 APPLE_IAP_BUNDLE_ID = os.environ.get("APPLE_IAP_BUNDLE_ID", "today.jobhub.app").strip()
 APPLE_IAP_SHARED_SECRET = os.environ.get("APPLE_IAP_SHARED_SECRET", "").strip()
+# Override only to point verification at a local stand-in (see jobs.testing.store_standins).
+APPLE_VERIFY_RECEIPT_PRODUCTION_URL = os.environ.get(
+    "APPLE_VERIFY_RECEIPT_PRODUCTION_URL",
+    "https://buy.itunes.apple.com/verifyReceipt",
+).strip()
+APPLE_VERIFY_RECEIPT_SANDBOX_URL = os.environ.get(
+    "APPLE_VERIFY_RECEIPT_SANDBOX_URL",
+    "https://sandbox.itunes.apple.com/verifyReceipt",
+).strip()
@@ -0,0 +1,174 @@
+"""Cached per-user account state returned by auth/me/ and the login endpoints."""
+
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import transaction
+from django.db.models import Avg, Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .avatar_utils import avatar_public_url, avatar_srcset
+from .board_publishing import authorization_payload
+from .models import (
+    EmployerBoardPublishingAuthorization,
+    EmployerSubscription,
+    UserMonetizationProfile,
+    UserProfile,
+    UserWallet,
+    VacancyReview,
+)
+from .reviews import _round_rating
+
+
+ACCOUNT_SNAPSHOT_CACHE_SECONDS = 5 * 60
+# Avatar processing runs as a best-effort background task; if it never
+# finishes, auth/me/ stops reporting it after this long.
+AVATAR_PROCESSING_STALE_AFTER = timedelta(minutes=5)
+_REVIEW_SCORES = range(1, 6)
+
+
+def account_snapshot_cache_key(user_id):
+    return f"account-snapshot:{user_id}"
+
+
+def invalidate_account_snapshots(user_ids):
+    keys = [account_snapshot_cache_key(user_id) for user_id in user_ids if user_id]
+    if not keys:
+        return
+    # Drop now so this request reads its own write, and again after commit
+    # in case a concurrent request cached the old row in between.
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def invalidate_account_snapshot(user_id):
+    invalidate_account_snapshots([user_id])
+
+
+def _aggregate_subquery(queryset, group_field, expression, output_field=None):
+    aggregate = (
+        queryset.filter(**{group_field: OuterRef("pk")})
+        .order_by()
+        .values(group_field)
+        .annotate(value=expression)
+        .values("value")
+    )
+    return Subquery(aggregate, output_field=output_field)
+
+
+def _account_queryset(user_id):
+    reviews = VacancyReview.objects.all()
+    annotations = {
+        "subscribers_count": Coalesce(
+            _aggregate_subquery(EmployerSubscription.objects.all(), "employer", Count("id")),
+            0,
+            output_field=IntegerField(),
+        ),
+        "reviews_count": Coalesce(
+            _aggregate_subquery(reviews, "employer", Count("id")),
+            0,
+            output_field=IntegerField(),
+        ),
+        "average_rating": _aggregate_subquery(reviews, "employer", Avg("rating")),
+    }
+    for score in _REVIEW_SCORES:
+        annotations[f"rating_{score}_count"] = Coalesce(
+            _aggregate_subquery(reviews.filter(rating=score), "employer", Count("id")),
+            0,
+            output_field=IntegerField(),
+        )
+    return (
+        User.objects.filter(pk=user_id)
+        .select_related("profile", "wallet", "monetization_profile", "board_publishing_authorization")
+        .annotate(**annotations)
+    )
+
+
+def _related_or_none(instance, name):
+    try:
+        return getattr(instance, name)
+    except ObjectDoesNotExist:
+        return None
+
+
+def avatar_processing_pending(profile, *, now=None):
+    started_at = profile.avatar_processing_started_at
+    return started_at is not None and started_at > (now or timezone.now()) - AVATAR_PROCESSING_STALE_AFTER
+
+
+def build_account_snapshot(user):
+    """Load everything auth/me/ shows for the user in a single query."""
+
+    row = _account_queryset(user.pk).first()
+    if row is None:
+        return None
+    profile, wallet, monetization_profile = row.profile, row.wallet, row.monetization_profile
+    return {
+        "is_staff": row.is_staff,
+        "email": row.email or "",
+        "nickname": profile.nickname or "",
+        "profile_description": profile.description or "",
+        "avatar_url": avatar_public_url(profile.avatar_key or ""),
+        "avatar_srcset": avatar_srcset(profile.avatar_key or ""),
+        "avatar_processing": avatar_processing_pending(profile),
+        "subscribers_count": row.subscribers_count,
+        "phone": profile.phone_e164 or "",
+        "phone_verified": bool(profile.phone_verified),
+        "employer_verified": bool(profile.employer_verified),
+        "has_password": row.has_usable_password(),
+        "wallet_total_credits": wallet.total_credits,
+        "wallet_paid_credits": wallet.paid_credits,
+        "wallet_bonus_credits": wallet.bonus_credits,
+        "employer_subscription_until": monetization_profile.employer_subscription_until,
+        "seeker_subscription_until": monetization_profile.seeker_subscription_until,
+        "employer_review_summary": {
+            "average_rating": _round_rating(row.average_rating),
+            "reviews_count": row.reviews_count,
+            "rating_counts": {
+                str(score): getattr(row, f"rating_{score}_count") for score in _REVIEW_SCORES
+            },
+        },
+        "board_publishing": authorization_payload(
+            _related_or_none(row, "board_publishing_authorization")
+        ),
+    }
+
+
+def get_account_snapshot(user):
+    key = account_snapshot_cache_key(user.pk)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = build_account_snapshot(user)
+        cache.set(key, snapshot, timeout=ACCOUNT_SNAPSHOT_CACHE_SECONDS)
+    return snapshot
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _invalidate_user_account_snapshot(sender, instance, **kwargs):
+    invalidate_account_snapshot(instance.pk)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+@receiver(post_save, sender=UserWallet)
+@receiver(post_delete, sender=UserWallet)
+@receiver(post_save, sender=UserMonetizationProfile)
+@receiver(post_delete, sender=UserMonetizationProfile)
+def _invalidate_owner_account_snapshot(sender, instance, **kwargs):
+    invalidate_account_snapshot(instance.user_id)
+
+
+@receiver(post_save, sender=VacancyReview)
+@receiver(post_delete, sender=VacancyReview)
+@receiver(post_save, sender=EmployerSubscription)
+@receiver(post_delete, sender=EmployerSubscription)
+@receiver(post_save, sender=EmployerBoardPublishingAuthorization)
+@receiver(post_delete, sender=EmployerBoardPublishingAuthorization)
+def _invalidate_employer_account_snapshot(sender, instance, **kwargs):
+    invalidate_account_snapshot(instance.employer_id)
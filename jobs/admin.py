@@ -6,10 +6,10 @@ from django.contrib import admin
 from django.contrib.admin.sites import NotRegistered
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
-from django.conf import settings
-from django.core.mail import send_mail
+from django.core.exceptions import PermissionDenied
 from django.db.models import Count
-from django.urls import reverse
+from django.http import HttpResponseBadRequest
+from django.urls import path, reverse
 from django.utils import timezone
 from django.utils.html import format_html
 
@@ -26,8 +26,15 @@ from .driver_licenses import (
     decode_driver_license_categories,
     encode_driver_license_categories,
 )
-from .economy import get_vacancy_contact_unlock_stats, set_wallet_balances
+from .economy import (
+    get_contact_unlock_stats_for_policies,
+    get_vacancy_contact_unlock_stats,
+    set_wallet_balances,
+)
+from .account_snapshot import invalidate_account_snapshots
 from .board_publishing import request_authorization
+from .background import submit_background_task
+from .email_outbox import deliver_pending_emails, queue_email
 from .models import (
     AccountDeletionRequest,
     ChatConversation,
@@ -45,6 +52,7 @@ from .models import (
     PurchaseRecord,
     PushDevice,
     ModeratorNotificationDelivery,
+    OutboundEmail,
     StoreProduct,
     UnlockedContact,
     UnlockRequest,
@@ -61,6 +69,7 @@ from .models import (
     WalletTransaction,
 )
 from .review_presets import REVIEW_PRESET_LABELS
+from .wallet_history import WALLET_EXPORT_FORMATS, wallet_export_queryset, wallet_export_response
 
 
 admin.site.site_header = "JobHub Operator Console"
@@ -183,11 +192,19 @@ def _bool_badge(value, true_label="Yes", false_label="No"):
     )
 
 
+def _policy_unlock_stats(policy):
+    stats = getattr(policy, "_unlock_stats", None)
+    if stats is None:
+        stats = get_vacancy_contact_unlock_stats(policy.vacancy, policy=policy)
+        policy._unlock_stats = stats
+    return stats
+
+
 def _contact_unlock_stats_summary(policy):
     if not getattr(policy, "pk", None):
         return _muted("No unlocks yet")
 
-    stats = get_vacancy_contact_unlock_stats(policy.vacancy, policy=policy)
+    stats = _policy_unlock_stats(policy)
     paid_count = int(stats["paid_unlocks"] or 0)
     ad_count = int(stats["ad_unlocks"] or 0)
     subscription_count = int(stats["subscription_unlocks"] or 0)
@@ -390,6 +407,12 @@ class UserAdmin(BaseUserAdmin):
             "monetization_profile",
         )
 
+    def get_inline_instances(self, request, obj=None):
+        # The profile, wallet and monetization rows are created with the user.
+        if obj is None:
+            return []
+        return super().get_inline_instances(request, obj)
+
     @admin.display(description="Display name")
     def display_name(self, obj):
         nickname = ((getattr(getattr(obj, "profile", None), "nickname", "") or "").strip())
@@ -873,19 +896,22 @@ class UserProfileAdmin(admin.ModelAdmin):
 
     @admin.action(description="Mark selected employers as verified")
     def mark_employers_verified(self, request, queryset):
+        user_ids = list(queryset.values_list("user_id", flat=True))
         updated = queryset.update(employer_verified=True)
+        invalidate_account_snapshots(user_ids)
         self.message_user(request, f"Employer verification enabled for {updated} profile(s).")
 
     @admin.action(description="Remove employer verification from selected profiles")
     def remove_employer_verification(self, request, queryset):
+        user_ids = list(queryset.values_list("user_id", flat=True))
         updated = queryset.update(employer_verified=False)
+        invalidate_account_snapshots(user_ids)
         self.message_user(request, f"Employer verification removed from {updated} profile(s).")
 
     @admin.action(description="Request JobHub Board publishing authorization")
     def request_board_publishing_authorization(self, request, queryset):
         requested = 0
         emailed = 0
-        failed_email = 0
         page_url = request.build_absolute_uri(reverse("employer:board_publishing"))
         for profile in queryset.select_related("user"):
             authorization = request_authorization(profile.user, requested_by=request.user)
@@ -895,23 +921,19 @@ class UserProfileAdmin(admin.ModelAdmin):
             email = (profile.user.email or "").strip()
             if not email:
                 continue
-            try:
-                send_mail(
-                    "JobHub: publishing authorization request",
-                    (
-                        "JobHub has requested permission to publish vacancies on behalf "
-                        f"of your employer profile. Sign in and review the request: {page_url}"
-                    ),
-                    settings.DEFAULT_FROM_EMAIL,
-                    [email],
-                    fail_silently=False,
-                )
-                emailed += 1
-            except Exception:
-                failed_email += 1
+            queue_email(
+                "JobHub: publishing authorization request",
+                (
+                    "JobHub has requested permission to publish vacancies on behalf "
+                    f"of your employer profile. Sign in and review the request: {page_url}"
+                ),
+                [email],
+                kind="board_publishing_request",
+            )
+            emailed += 1
         self.message_user(
             request,
-            f"Created or renewed {requested} request(s); email sent: {emailed}; email failed: {failed_email}.",
+            f"Created or renewed {requested} request(s); email queued: {emailed}.",
         )
 
     @admin.display(description="Avatar")
@@ -1530,6 +1552,45 @@ class WalletTransactionAdmin(admin.ModelAdmin):
     raw_id_fields = ("user", "wallet", "related_vacancy")
     readonly_fields = ("created_at",)
 
+    def get_urls(self):
+        return [
+            path(
+                "export/",
+                self.admin_site.admin_view(self.export_view),
+                name="jobs_wallettransaction_export",
+            ),
+        ] + super().get_urls()
+
+    def export_view(self, request):
+        """Stream the ledger as CSV or NDJSON.
+
+        Query parameters: file_format (csv or ndjson), date_from, date_to
+        (dates or datetimes), and optionally user and kind.
+        """
+
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        file_format = (request.GET.get("file_format") or "csv").strip().lower()
+        if file_format not in WALLET_EXPORT_FORMATS:
+            return HttpResponseBadRequest("invalid_file_format")
+        raw_user_id = (request.GET.get("user") or "").strip()
+        if raw_user_id and not raw_user_id.isdigit():
+            return HttpResponseBadRequest("invalid_user")
+        try:
+            transactions = wallet_export_queryset(
+                user_id=int(raw_user_id) if raw_user_id else None,
+                date_from=request.GET.get("date_from"),
+                date_to=request.GET.get("date_to"),
+                kind=(request.GET.get("kind") or "").strip(),
+            )
+        except ValueError as exc:
+            return HttpResponseBadRequest(str(exc))
+        return wallet_export_response(
+            transactions,
+            file_format=file_format,
+            filename=f"wallet-ledger-{timezone.now():%Y%m%d-%H%M%S}",
+        )
+
     @admin.display(description="Balance after")
     def balance_after_display(self, obj):
         return format_html(
@@ -1644,10 +1705,12 @@ class UserMonetizationProfileAdmin(admin.ModelAdmin):
 
     @admin.action(description="Clear employer and seeker subscriptions")
     def clear_all_subscriptions(self, request, queryset):
+        user_ids = list(queryset.values_list("user_id", flat=True))
         updated = queryset.update(
             employer_subscription_until=None,
             seeker_subscription_until=None,
         )
+        invalidate_account_snapshots(user_ids)
         self.message_user(request, f"Cleared subscriptions for {updated} user(s).")
 
 
@@ -1684,9 +1747,17 @@ class VacancyContactAccessPolicyAdmin(admin.ModelAdmin):
     )
     readonly_fields = ("unlock_stats_summary", "paid_window_started_at", "set_at")
 
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        policies = list(changelist.result_list)
+        stats_by_vacancy = get_contact_unlock_stats_for_policies(policies)
+        for policy in policies:
+            policy._unlock_stats = stats_by_vacancy[policy.vacancy_id]
+        return changelist
+
     @admin.display(description="Paid opens")
     def paid_click_progress(self, obj):
-        stats = get_vacancy_contact_unlock_stats(obj.vacancy, policy=obj)
+        stats = _policy_unlock_stats(obj)
         paid_count = int(stats["paid_unlocks"] or 0)
         click_limit = getattr(obj, "contact_unlock_paid_click_limit", None)
         if click_limit:
@@ -1698,12 +1769,12 @@ class VacancyContactAccessPolicyAdmin(admin.ModelAdmin):
 
     @admin.display(description="Credits earned")
     def earned_credits_display(self, obj):
-        stats = get_vacancy_contact_unlock_stats(obj.vacancy, policy=obj)
+        stats = _policy_unlock_stats(obj)
         return stats["earned_credits"]
 
     @admin.display(description="Unique users")
     def unique_users_display(self, obj):
-        stats = get_vacancy_contact_unlock_stats(obj.vacancy, policy=obj)
+        stats = _policy_unlock_stats(obj)
         return stats["unique_users"]
 
     @admin.display(description="Unlock stats")
@@ -1794,3 +1865,34 @@ class ModeratorNotificationDeliveryAdmin(admin.ModelAdmin):
             "skipped_not_configured": ("Not configured", "#7A5AF8"),
         }.get(obj.status, ("Unknown", "#667085"))
         return _badge(meta[0], bg=meta[1])
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "recipients", "subject", "status_badge", "attempts", "next_attempt_at", "sent_at")
+    search_fields = ("subject", "recipients")
+    list_filter = ("kind", "status", "created_at")
+    ordering = ("-created_at",)
+    readonly_fields = ("created_at", "sent_at", "last_error")
+    actions = ("retry_now",)
+
+    @admin.display(description="Status", ordering="status")
+    def status_badge(self, obj):
+        meta = {
+            "pending": ("Pending", "#B54708"),
+            "sending": ("Sending", "#7A5AF8"),
+            "sent": ("Sent", "#198754"),
+            "failed": ("Failed", "#B42318"),
+        }.get(obj.status, ("Unknown", "#667085"))
+        return _badge(meta[0], bg=meta[1])
+
+    @admin.action(description="Retry selected emails now")
+    def retry_now(self, request, queryset):
+        # Code emails lose their body once given up; the user requests a new code.
+        updated = (
+            queryset.exclude(status="sent")
+            .exclude(kind__startswith="email_code:")
+            .update(status="pending", attempts=0, next_attempt_at=timezone.now())
+        )
+        submit_background_task("email_outbox", deliver_pending_emails)
+        self.message_user(request, f"Queued {updated} email(s) for delivery.")
@@ -2,25 +2,23 @@ from math import ceil
 from hmac import compare_digest
 import logging
 import secrets
-from datetime import datetime, time, timedelta, timezone as datetime_timezone
-import requests
+from datetime import datetime, time, timedelta
 
 from django.utils import timezone
 from django.conf import settings
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
 from django.db import transaction
-from django.db.models import Case, Count, Exists, IntegerField, Max, OuterRef, Q, Value, When
-from django.db.models.functions import Coalesce
-from django.utils.dateparse import parse_date, parse_datetime
+from django.db.models import Case, Count, Exists, F, IntegerField, Max, OuterRef, Q, Value, When
+from django.utils.dateparse import parse_date
 from rest_framework import generics, permissions, status
 from rest_framework.exceptions import ValidationError
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 
 from .alerts import dispatch_vacancy_alerts, preview_vacancy_alerts
-from .avatar_utils import avatar_public_url
+from .avatar_utils import avatar_public_url, avatar_srcset
 from .board_publishing import (
     accept_authorization,
     active_authorization_for_code,
@@ -30,27 +28,41 @@ from .board_publishing import (
 )
 from .country_choices import normalize_audience_country_codes
 from .driver_licenses import normalize_driver_license_categories
+from .email_outbox import queue_email
 from .economy import (
     EconomyActionRequiredError,
     InsufficientCreditsError,
     apply_vacancy_submission_action,
     apply_store_product_purchase,
     build_contact_access_state,
+    build_contact_access_states,
     build_vacancy_submission_state,
     ensure_free_contact_policy,
+    get_active_store_products,
     get_economy_config,
+    get_monetization_profile,
     get_or_create_contact_policy,
-    get_or_create_monetization_profile,
-    get_or_create_wallet,
+    get_wallet,
     grant_credits,
     is_employer_profile_visible_for_vacancy,
     set_wallet_balances,
     spend_credits,
     unlock_vacancy_contacts,
 )
+from .apple_iap import (
+    AppleIAPNotConfiguredError,
+    AppleIAPVerificationError,
+    apple_receipt_item_expires_at,
+    apple_store_product_id,
+    cached_apple_verification,
+    find_apple_receipt_item,
+    remember_apple_verification,
+    verify_apple_receipt,
+)
 from .google_play import (
     GooglePlayNotConfiguredError,
     GooglePlayVerificationError,
+    google_subscription_expires_at,
     verify_google_play_product_purchase,
     verify_google_play_subscription_purchase,
 )
@@ -63,7 +75,6 @@ from .models import (
     EmployerSubscription,
     PurchaseRecord,
     PushDevice,
-    StoreProduct,
     UserBlock,
     UserMonetizationProfile,
     UserWallet,
@@ -78,6 +89,25 @@ from .models import (
 )
 from .monetization import CONTACT_ACCESS_DURATION_MINUTES_DEFAULT
 from .moderation_notifications import notify_moderators_about_pending_vacancy
+from .moderation_queue import (
+    MODERATION_CLAIM_LEASE,
+    claim_moderation_batch,
+    claimed_by_other_moderator,
+    decode_moderation_queue_cursor,
+    encode_moderation_queue_cursor,
+    moderation_queue_page,
+    pending_moderation_queryset,
+    release_moderation_claims,
+)
+from .wallet_history import (
+    WALLET_EXPORT_FORMATS,
+    decode_wallet_history_cursor,
+    encode_wallet_history_cursor,
+    wallet_export_queryset,
+    wallet_export_response,
+    wallet_history_page,
+)
+from .purchase_idempotency import idempotent_purchase_response, purchase_idempotency_key
 from .service_sources import (
     SERVICE_BOARD_USERNAME,
     service_board_meta_for_user,
@@ -121,9 +151,6 @@ OWNER_RESUME_REPEAT_THRESHOLD = 2
 OWNER_MODERATION_RESUBMIT_MIN_INTERVAL = timedelta(minutes=30)
 OWNER_MODERATION_RESUBMIT_MAX_PER_DAY = 3
 
-APPLE_VERIFY_RECEIPT_PRODUCTION_URL = "https://buy.itunes.apple.com/verifyReceipt"
-APPLE_VERIFY_RECEIPT_SANDBOX_URL = "https://sandbox.itunes.apple.com/verifyReceipt"
-APPLE_VERIFY_RECEIPT_TIMEOUT_SECONDS = 20
 logger = logging.getLogger(__name__)
 
 
@@ -151,199 +178,10 @@ def _notify_moderators_about_pending_vacancy_safe(vacancy):
         print(f"[MODERATION-PUSH-ERROR] vacancy={vacancy.id}: {exc}")
 
 
-class AppleIAPNotConfiguredError(Exception):
-    code = "apple_iap_not_configured"
-
-
-class AppleIAPVerificationError(Exception):
-    def __init__(self, code, *, detail="", payload=None):
-        super().__init__(detail or code)
-        self.code = code
-        self.detail = detail or code
-        self.payload = payload or {}
-
-
-def _apple_store_product_id(product):
-    metadata = product.metadata or {}
-    explicit = (metadata.get("ios_store_product_id") or "").strip()
-    if explicit:
-        return explicit
-    bundle_id = settings.APPLE_IAP_BUNDLE_ID.strip()
-    if not bundle_id:
-        return ""
-    store_product_id = (product.store_product_id or "").strip()
-    if store_product_id.startswith(f"{bundle_id}."):
-        return store_product_id
-    if product.product_type == "employer_subscription":
-        return f"{bundle_id}.employer_subscription"
-    if product.product_type == "seeker_subscription":
-        return f"{bundle_id}.seeker_subscription"
-    code = (product.code or "").strip()
-    if not code:
-        return ""
-    return f"{bundle_id}.{code}"
-
-
-def _post_apple_verify_receipt(url, *, receipt_data, include_shared_secret=False):
-    payload = {
-        "receipt-data": receipt_data,
-        "exclude-old-transactions": False,
-    }
-    shared_secret = settings.APPLE_IAP_SHARED_SECRET.strip()
-    if include_shared_secret and not shared_secret:
-        raise AppleIAPVerificationError(
-            "apple_shared_secret_missing",
-            detail="Apple shared secret is required for subscription receipt verification.",
-        )
-    if include_shared_secret:
-        payload["password"] = shared_secret
-    try:
-        response = requests.post(
-            url,
-            json=payload,
-            timeout=APPLE_VERIFY_RECEIPT_TIMEOUT_SECONDS,
-        )
-        response.raise_for_status()
-        return response.json()
-    except requests.RequestException as exc:
-        raise AppleIAPVerificationError(
-            "apple_receipt_request_failed",
-            detail="Could not reach Apple receipt verification.",
-        ) from exc
-    except ValueError as exc:
-        raise AppleIAPVerificationError(
-            "apple_receipt_invalid_response",
-            detail="Apple receipt verification returned an invalid response.",
-        ) from exc
-
-
-def _apple_receipt_status_error_code(status_code):
-    if status_code == 21004:
-        return "apple_shared_secret_invalid"
-    return "apple_receipt_invalid"
-
-
-def _verify_apple_receipt(receipt_data, *, requires_shared_secret=False):
-    if not settings.APPLE_IAP_BUNDLE_ID.strip():
-        raise AppleIAPNotConfiguredError()
-
-    verified_payload = _post_apple_verify_receipt(
-        APPLE_VERIFY_RECEIPT_PRODUCTION_URL,
-        receipt_data=receipt_data,
-        include_shared_secret=requires_shared_secret,
-    )
-    status_code = int(verified_payload.get("status") or 0)
-    if status_code == 21007:
-        verified_payload = _post_apple_verify_receipt(
-            APPLE_VERIFY_RECEIPT_SANDBOX_URL,
-            receipt_data=receipt_data,
-            include_shared_secret=requires_shared_secret,
-        )
-        status_code = int(verified_payload.get("status") or 0)
-    elif status_code == 21008:
-        verified_payload = _post_apple_verify_receipt(
-            APPLE_VERIFY_RECEIPT_PRODUCTION_URL,
-            receipt_data=receipt_data,
-            include_shared_secret=requires_shared_secret,
-        )
-        status_code = int(verified_payload.get("status") or 0)
-
-    if status_code != 0:
-        raise AppleIAPVerificationError(
-            _apple_receipt_status_error_code(status_code),
-            detail=f"Apple receipt verification failed with status {status_code}.",
-            payload=verified_payload,
-        )
-
-    receipt = verified_payload.get("receipt") or {}
-    bundle_id = (receipt.get("bundle_id") or "").strip()
-    expected_bundle_id = settings.APPLE_IAP_BUNDLE_ID.strip()
-    if expected_bundle_id and bundle_id and bundle_id != expected_bundle_id:
-        raise AppleIAPVerificationError(
-            "apple_receipt_bundle_mismatch",
-            detail="Apple receipt bundle ID does not match the app bundle ID.",
-            payload=verified_payload,
-        )
-
-    return verified_payload
-
-
-def _apple_receipt_items(verified_payload):
-    items = []
-    latest_items = verified_payload.get("latest_receipt_info")
-    if isinstance(latest_items, list):
-        items.extend(item for item in latest_items if isinstance(item, dict))
-    receipt = verified_payload.get("receipt") or {}
-    in_app_items = receipt.get("in_app")
-    if isinstance(in_app_items, list):
-        items.extend(item for item in in_app_items if isinstance(item, dict))
-    return items
-
-
-def _apple_receipt_item_sort_key(item):
-    for key in ("expires_date_ms", "purchase_date_ms", "original_purchase_date_ms"):
-        raw = (item.get(key) or "").strip()
-        if raw.isdigit():
-            return int(raw)
-    return 0
-
-
-def _find_apple_receipt_item(*, verified_payload, expected_product_id, purchase_id=""):
-    matching = [
-        item for item in _apple_receipt_items(verified_payload)
-        if (item.get("product_id") or "").strip() == expected_product_id
-    ]
-    if not matching:
-        raise AppleIAPVerificationError(
-            "apple_receipt_product_not_found",
-            detail="The Apple receipt does not contain the expected product.",
-            payload=verified_payload,
-        )
-
-    raw_purchase_id = (purchase_id or "").strip()
-    if raw_purchase_id:
-        exact = [
-            item for item in matching
-            if raw_purchase_id in {
-                (item.get("transaction_id") or "").strip(),
-                (item.get("original_transaction_id") or "").strip(),
-            }
-        ]
-        if exact:
-            matching = exact
-
-    matching.sort(key=_apple_receipt_item_sort_key, reverse=True)
-    return matching[0]
-
-
 def _is_subscription_store_product(product):
     return product.product_type in {"employer_subscription", "seeker_subscription"}
 
 
-def _apple_receipt_item_expires_at(item):
-    raw_ms = (item.get("expires_date_ms") or "").strip()
-    if raw_ms.isdigit():
-        return datetime.fromtimestamp(int(raw_ms) / 1000, tz=datetime_timezone.utc)
-    raw = (item.get("expires_date") or "").strip()
-    parsed = parse_datetime(raw) if raw else None
-    if parsed and timezone.is_naive(parsed):
-        parsed = timezone.make_aware(parsed, datetime_timezone.utc)
-    return parsed
-
-
-def _google_subscription_expires_at(payload, *, subscription_id):
-    line_items = payload.get("lineItems") or []
-    for item in line_items:
-        if (item.get("productId") or "").strip() != subscription_id:
-            continue
-        raw = (item.get("expiryTime") or "").strip()
-        parsed = parse_datetime(raw) if raw else None
-        if parsed and timezone.is_naive(parsed):
-            parsed = timezone.make_aware(parsed, datetime_timezone.utc)
-        return parsed
-    return None
-
-
 def _parse_driver_license_filter_value(raw_value):
     raw = (raw_value or "").strip()
     if not raw:
@@ -400,17 +238,13 @@ def _filter_visible_vacancies(queryset, *, now=None):
 
 def _economy_overview_payload(user):
     config = get_economy_config()
-    wallet = get_or_create_wallet(user)
-    profile = get_or_create_monetization_profile(user)
+    wallet = get_wallet(user)
+    profile = get_monetization_profile(user)
     now = timezone.now()
     wallet_data = UserWalletSerializer(wallet).data
     profile_data = UserMonetizationProfileSerializer(profile).data
     config_data = EconomyConfigSerializer(config).data
-    products = (
-        StoreProduct.objects.filter(is_active=True)
-        .order_by("sort_order", "id")
-    )
-    products_data = StoreProductSerializer(products, many=True).data
+    products_data = StoreProductSerializer(get_active_store_products(), many=True).data
 
     employer_daily_remaining = int(config.employer_daily_free_submissions_limit or 0)
     if profile.has_employer_subscription(now):
@@ -662,32 +496,38 @@ class VacancyDetailAPIView(APIView):
         return Response(payload, status=200)
 
 
+def _batch_vacancy_ids(request, *, max_ids):
+    raw_ids = request.data.get("ids", [])
+    if not isinstance(raw_ids, list):
+        return None, Response({"error": "ids_must_be_list"}, status=status.HTTP_400_BAD_REQUEST)
+
+    normalized_ids = []
+    seen = set()
+    for raw_id in raw_ids:
+        try:
+            vacancy_id = int(raw_id)
+        except (TypeError, ValueError):
+            continue
+        if vacancy_id <= 0 or vacancy_id in seen:
+            continue
+        seen.add(vacancy_id)
+        normalized_ids.append(vacancy_id)
+        if len(normalized_ids) > max_ids:
+            return None, Response(
+                {"error": "too_many_ids", "max_ids": max_ids},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+    return normalized_ids, None
+
+
 class VacancyBookmarkStatusAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
     max_ids = 100
 
     def post(self, request):
-        raw_ids = request.data.get("ids", [])
-        if not isinstance(raw_ids, list):
-            return Response({"error": "ids_must_be_list"}, status=status.HTTP_400_BAD_REQUEST)
-
-        normalized_ids = []
-        seen = set()
-        for raw_id in raw_ids:
-            try:
-                vacancy_id = int(raw_id)
-            except (TypeError, ValueError):
-                continue
-            if vacancy_id <= 0 or vacancy_id in seen:
-                continue
-            seen.add(vacancy_id)
-            normalized_ids.append(vacancy_id)
-            if len(normalized_ids) > self.max_ids:
-                return Response(
-                    {"error": "too_many_ids", "max_ids": self.max_ids},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-
+        normalized_ids, error_response = _batch_vacancy_ids(request, max_ids=self.max_ids)
+        if error_response is not None:
+            return error_response
         if not normalized_ids:
             return Response({"count": 0, "results": []}, status=status.HTTP_200_OK)
 
@@ -815,6 +655,7 @@ class UserBlockListAPIView(APIView):
                 "blocked_user_username": block.blocked_user.username,
                 "blocked_user_nickname": _owner_nickname_or_fallback(block.blocked_user),
                 "blocked_user_avatar_url": _owner_avatar_url(block.blocked_user),
+                "blocked_user_avatar_srcset": _owner_avatar_srcset(block.blocked_user),
                 "created_at": block.created_at,
             }
             for block in blocks
@@ -1243,10 +1084,17 @@ def _owner_nickname_or_fallback(owner):
     return f"Employer #{owner.id}"
 
 
-def _owner_avatar_url(owner):
+def _owner_avatar_key(owner):
     profile = getattr(owner, "profile", None)
-    avatar_key = (getattr(profile, "avatar_key", "") or "").strip() if profile else ""
-    return avatar_public_url(avatar_key)
+    return (getattr(profile, "avatar_key", "") or "").strip() if profile else ""
+
+
+def _owner_avatar_url(owner):
+    return avatar_public_url(_owner_avatar_key(owner))
+
+
+def _owner_avatar_srcset(owner):
+    return avatar_srcset(_owner_avatar_key(owner))
 
 
 def _subscriber_count_for_owner(owner):
@@ -1329,6 +1177,7 @@ def _build_employer_moderation_summary_map(owner_ids, *, now=None):
             "owner_user_id": owner.id,
             "nickname": _owner_nickname_or_fallback(owner),
             "avatar_url": _owner_avatar_url(owner),
+            "avatar_srcset": _owner_avatar_srcset(owner),
             "active_vacancies_count": active_counts.get(owner_id, 0),
             "editing_vacancies_count": editing_counts.get(owner_id, 0),
             "rejected_vacancies_count": rejected_counts.get(owner_id, 0),
@@ -1420,7 +1269,7 @@ def _create_moderation_attempt(
     submitted_at=None,
     extra_context=None,
 ):
-    return VacancyModerationAttempt.objects.create(
+    attempt = VacancyModerationAttempt.objects.create(
         vacancy=vacancy,
         attempt_no=_next_moderation_attempt_no(vacancy),
         trigger_type=trigger_type,
@@ -1429,6 +1278,38 @@ def _create_moderation_attempt(
         decision="pending",
         extra_context=extra_context or {},
     )
+    # Callers save the submission state first, so this matches the
+    # Coalesce(editing_started_at, published_at) the queue used to sort on.
+    _record_moderation_attempt(
+        vacancy,
+        attempt,
+        queue_anchor=vacancy.editing_started_at or vacancy.published_at or attempt.submitted_at,
+    )
+    return attempt
+
+
+def _record_moderation_attempt(vacancy, attempt, *, created=True, queue_anchor=None):
+    """Keep the vacancy's attempt counters (and queue position) in step."""
+
+    updates = {}
+    if created:
+        updates["moderation_attempts_total"] = F("moderation_attempts_total") + 1
+        updates["latest_moderation_attempt_no"] = attempt.attempt_no
+        vacancy.moderation_attempts_total = (vacancy.moderation_attempts_total or 0) + 1
+        vacancy.latest_moderation_attempt_no = attempt.attempt_no
+    if attempt.decision in ("approved", "rejected"):
+        field = f"moderation_{attempt.decision}_total"
+        updates[field] = F(field) + 1
+        setattr(vacancy, field, (getattr(vacancy, field) or 0) + 1)
+        # A decision ends the moderator's lease on the vacancy.
+        updates["moderation_claimed_by"] = None
+        updates["moderation_claimed_until"] = None
+        vacancy.moderation_claimed_by = None
+        vacancy.moderation_claimed_until = None
+    if queue_anchor is not None:
+        updates["queue_anchor"] = queue_anchor
+        vacancy.queue_anchor = queue_anchor
+    Vacancy.objects.filter(pk=vacancy.pk).update(**updates)
 
 
 def _submission_flow_for_vacancy(vacancy):
@@ -1460,6 +1341,7 @@ def _resolve_latest_moderation_attempt(
             rejection_reason=reason or "",
             extra_context={"auto_created": True},
         )
+        _record_moderation_attempt(vacancy, attempt)
         return attempt
 
     attempt.decision = decision
@@ -1474,6 +1356,7 @@ def _resolve_latest_moderation_attempt(
             "rejection_reason",
         ]
     )
+    _record_moderation_attempt(vacancy, attempt, created=False)
     return attempt
 
 
@@ -1575,7 +1458,7 @@ def _notify_vacancy_owner_about_complaint_action(
 ):
     owner_email = (getattr(vacancy.created_by, "email", "") or "").strip()
     if not owner_email:
-        return False, "owner_email_missing"
+        return False
 
     action_title = {
         "delete_forever": "deleted forever",
@@ -1602,24 +1485,14 @@ def _notify_vacancy_owner_about_complaint_action(
         ]
     )
 
-    try:
-        send_mail(
-            subject,
-            "\n".join(body_lines),
-            settings.DEFAULT_FROM_EMAIL,
-            [owner_email],
-            fail_silently=False,
-        )
-        return True, ""
-    except Exception as exc:
-        print(f"[COMPLAINT-OWNER-NOTIFY-ERROR] vacancy={vacancy.id}: {exc}")
-        return False, str(exc)
+    queue_email(subject, "\n".join(body_lines), [owner_email], kind="complaint_action")
+    return True
 
 
 def _notify_vacancy_owner_about_reject(*, vacancy, moderator, reason=""):
     owner_email = (getattr(vacancy.created_by, "email", "") or "").strip()
     if not owner_email:
-        return False, "owner_email_missing"
+        return False
 
     subject = f"JobHub moderation: vacancy #{vacancy.id} rejected"
     body_lines = [
@@ -1632,18 +1505,8 @@ def _notify_vacancy_owner_about_reject(*, vacancy, moderator, reason=""):
         f"Support: {getattr(settings, 'SUPPORT_EMAIL', settings.DEFAULT_FROM_EMAIL)}",
     ]
 
-    try:
-        send_mail(
-            subject,
-            "\n".join(body_lines),
-            settings.DEFAULT_FROM_EMAIL,
-            [owner_email],
-            fail_silently=False,
-        )
-        return True, ""
-    except Exception as exc:
-        print(f"[VACANCY-REJECT-NOTIFY-ERROR] vacancy={vacancy.id}: {exc}")
-        return False, str(exc)
+    queue_email(subject, "\n".join(body_lines), [owner_email], kind="vacancy_reject")
+    return True
 
 
 class IsModerator(permissions.BasePermission):
@@ -1745,20 +1608,75 @@ class EconomyOverviewAPIView(APIView):
         return Response(_economy_overview_payload(request.user), status=status.HTTP_200_OK)
 
 
+def _page_number_response(request):
+    """400 for ?page=N on a cursor-paged list, instead of page 1 again."""
+
+    page = (request.query_params.get("page") or "").strip()
+    if page and page != "1":
+        return Response(
+            {"error": "page_not_supported", "detail": "Follow next or pass cursor instead of page."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return None
+
+
 class WalletTransactionListAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        transactions = (
-            WalletTransaction.objects.filter(user=request.user)
-            .select_related("related_vacancy")
-            .order_by("-created_at", "-id")
+        error_response = _page_number_response(request)
+        if error_response is not None:
+            return error_response
+
+        cursor = None
+        raw_cursor = request.query_params.get("cursor")
+        if raw_cursor:
+            try:
+                cursor = decode_wallet_history_cursor(raw_cursor)
+            except ValueError:
+                return Response({"error": "invalid_cursor"}, status=status.HTTP_400_BAD_REQUEST)
+
+        transactions, has_more = wallet_history_page(request.user, cursor=cursor)
+        next_cursor = encode_wallet_history_cursor(transactions[-1]) if has_more and transactions else None
+        payload = {
+            "results": WalletTransactionSerializer(transactions, many=True).data,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+            # Clients that follow "next" keep working unchanged.
+            "next": (
+                replace_query_param(request.build_absolute_uri(), "cursor", next_cursor)
+                if next_cursor
+                else None
+            ),
+            "previous": None,
+        }
+        if cursor is None:
+            # Existing clients read the total from the first page; later
+            # pages skip the COUNT over the user's whole history.
+            payload["count"] = WalletTransaction.objects.filter(user=request.user).count()
+        return Response(payload, status=status.HTTP_200_OK)
+
+
+class WalletTransactionExportAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        file_format = (request.query_params.get("file_format") or "csv").strip().lower()
+        if file_format not in WALLET_EXPORT_FORMATS:
+            return Response({"error": "invalid_file_format"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            transactions = wallet_export_queryset(
+                user_id=request.user.id,
+                date_from=request.query_params.get("date_from"),
+                date_to=request.query_params.get("date_to"),
+            )
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return wallet_export_response(
+            transactions,
+            file_format=file_format,
+            filename=f"wallet-history-{request.user.id}",
         )
-        paginator = PageNumberPagination()
-        paginator.page_size = 30
-        page = paginator.paginate_queryset(transactions, request, view=self)
-        serializer = WalletTransactionSerializer(page, many=True)
-        return paginator.get_paginated_response(serializer.data)
 
 
 class GooglePlayPurchaseCompleteAPIView(APIView):
@@ -1772,6 +1690,10 @@ class GooglePlayPurchaseCompleteAPIView(APIView):
         serializer.is_valid(raise_exception=True)
         payload = serializer.validated_data
         product = serializer.context["store_product"]
+        key = purchase_idempotency_key("android", request.user.id, product.code, payload["purchase_token"])
+        return idempotent_purchase_response(key, lambda: self._complete(request, payload, product))
+
+    def _complete(self, request, payload, product):
         purchase_token = payload["purchase_token"]
         raw_purchase_id = (payload.get("purchase_id") or "").strip()
 
@@ -1788,7 +1710,7 @@ class GooglePlayPurchaseCompleteAPIView(APIView):
                     subscription_id=subscription_id,
                     purchase_token=purchase_token,
                 )
-                entitlement_expires_at = _google_subscription_expires_at(
+                entitlement_expires_at = google_subscription_expires_at(
                     verified_payload,
                     subscription_id=subscription_id,
                 )
@@ -1870,10 +1792,20 @@ class ApplePurchaseCompleteAPIView(APIView):
         serializer.is_valid(raise_exception=True)
         payload = serializer.validated_data
         product = serializer.context["store_product"]
+        key = purchase_idempotency_key(
+            "ios",
+            request.user.id,
+            product.code,
+            (payload.get("purchase_id") or "").strip(),
+            payload["receipt_data"],
+        )
+        return idempotent_purchase_response(key, lambda: self._complete(request, payload, product))
+
+    def _complete(self, request, payload, product):
         receipt_data = payload["receipt_data"]
         raw_purchase_id = (payload.get("purchase_id") or "").strip()
 
-        expected_product_id = _apple_store_product_id(product)
+        expected_product_id = apple_store_product_id(product)
         if not expected_product_id:
             return Response(
                 {"error": "store_product_id_missing"},
@@ -1885,15 +1817,30 @@ class ApplePurchaseCompleteAPIView(APIView):
             # when the current purchase is a consumable credit pack. Sending the
             # shared secret for every iOS receipt keeps Apple's verification
             # response consistent across mixed consumable/subscription receipts.
-            verified_payload = _verify_apple_receipt(
-                receipt_data,
-                requires_shared_secret=True,
-            )
-            matched_item = _find_apple_receipt_item(
-                verified_payload=verified_payload,
-                expected_product_id=expected_product_id,
-                purchase_id=raw_purchase_id,
+            cacheable = not _is_subscription_store_product(product)
+            verified_payload, matched_item = (
+                cached_apple_verification(request.user.id, raw_purchase_id, expected_product_id)
+                if cacheable
+                else (None, None)
             )
+            if matched_item is None:
+                verified_payload = verify_apple_receipt(
+                    receipt_data,
+                    requires_shared_secret=True,
+                )
+                matched_item = find_apple_receipt_item(
+                    verified_payload=verified_payload,
+                    expected_product_id=expected_product_id,
+                    purchase_id=raw_purchase_id,
+                )
+                if cacheable:
+                    remember_apple_verification(
+                        request.user.id,
+                        raw_purchase_id,
+                        matched_item,
+                        verified_payload,
+                        expected_product_id,
+                    )
         except AppleIAPNotConfiguredError as exc:
             return Response(
                 {
@@ -1964,7 +1911,7 @@ class ApplePurchaseCompleteAPIView(APIView):
             "local_verification_data": (payload.get("local_verification_data") or "").strip(),
         }
         entitlement_expires_at = (
-            _apple_receipt_item_expires_at(matched_item)
+            apple_receipt_item_expires_at(matched_item)
             if _is_subscription_store_product(product)
             else None
         )
@@ -2016,6 +1963,44 @@ class VacancyContactAccessStateAPIView(APIView):
         return Response(state, status=status.HTTP_200_OK)
 
 
+class VacancyContactAccessStatesAPIView(APIView):
+    """Contact access states for a batch of feed cards in one request."""
+
+    permission_classes = [permissions.IsAuthenticated]
+    max_ids = 100
+
+    def post(self, request):
+        normalized_ids, error_response = _batch_vacancy_ids(request, max_ids=self.max_ids)
+        if error_response is not None:
+            return error_response
+        if not normalized_ids:
+            return Response({"count": 0, "results": []}, status=status.HTTP_200_OK)
+
+        now = timezone.now()
+        vacancies_by_id = Vacancy.objects.in_bulk(normalized_ids)
+        available = {}
+        errors = {}
+        for vacancy_id in normalized_ids:
+            vacancy = vacancies_by_id.get(vacancy_id)
+            error_response = _public_vacancy_error_response(vacancy, now=now)
+            if error_response is not None:
+                errors[vacancy_id] = error_response.data["error"]
+            else:
+                available[vacancy_id] = vacancy
+
+        states = build_contact_access_states(request.user, available.values(), now=now)
+        results = []
+        for vacancy_id in normalized_ids:
+            if vacancy_id in states:
+                results.append({"id": vacancy_id, "access_state": states[vacancy_id]})
+            else:
+                results.append({"id": vacancy_id, "error": errors[vacancy_id]})
+        return Response(
+            {"count": len(results), "results": results},
+            status=status.HTTP_200_OK,
+        )
+
+
 class VacancySubmissionStateAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -2246,6 +2231,7 @@ class EmployerProfileAPIView(APIView):
             ),
             "email_masked": _masked_email(owner.email),
             "avatar_url": _owner_avatar_url(owner),
+            "avatar_srcset": _owner_avatar_srcset(owner),
             "subscribers_count": _subscriber_count_for_owner(owner),
             "can_subscribe": can_subscribe,
             "is_subscribed": is_subscribed,
@@ -2318,6 +2304,7 @@ class EmployerSubscriptionListAPIView(APIView):
                 "employer_id": item.employer_id,
                 "nickname": _owner_nickname_or_fallback(item.employer),
                 "avatar_url": _owner_avatar_url(item.employer),
+                "avatar_srcset": _owner_avatar_srcset(item.employer),
                 "subscribed_at": item.created_at,
             }
             for item in (page or [])
@@ -2413,6 +2400,7 @@ class EmployerSearchAPIView(APIView):
                 "employer_id": owner.id,
                 "nickname": _owner_nickname_or_fallback(owner),
                 "avatar_url": _owner_avatar_url(owner),
+                "avatar_srcset": _owner_avatar_srcset(owner),
                 "is_subscribed": bool(getattr(owner, "is_subscribed", False)),
             }
             for owner in (page or [])
@@ -2483,33 +2471,73 @@ class VacancyUnlockConfirmAPIView(APIView):
         return Response(serializer.data, status=200)
 
 
-class VacancyPendingListAPIView(generics.ListAPIView):
-    serializer_class = VacancyModerationSerializer
+class VacancyPendingListAPIView(APIView):
     permission_classes = [IsModerator]
 
-    def get_queryset(self):
-        return Vacancy.objects.filter(
-            is_approved=False,
-            is_rejected=False,
-            is_editing=False,
-            is_deleted_by_moderator=False,
-        ).filter(
-            Q(rejection_reason="") | Q(rejection_reason__isnull=True)
-        ).annotate(
-            queue_anchor=Coalesce("editing_started_at", "published_at"),
-            moderation_attempts_total=Count("moderation_attempts", distinct=True),
-            moderation_approved_total=Count(
-                "moderation_attempts",
-                filter=Q(moderation_attempts__decision="approved"),
-                distinct=True,
-            ),
-            moderation_rejected_total=Count(
-                "moderation_attempts",
-                filter=Q(moderation_attempts__decision="rejected"),
-                distinct=True,
+    def get(self, request):
+        error_response = _page_number_response(request)
+        if error_response is not None:
+            return error_response
+
+        cursor = None
+        raw_cursor = request.query_params.get("cursor")
+        if raw_cursor:
+            try:
+                cursor = decode_moderation_queue_cursor(raw_cursor)
+            except ValueError:
+                return Response({"error": "invalid_cursor"}, status=status.HTTP_400_BAD_REQUEST)
+
+        vacancies, has_more = moderation_queue_page(request.user, cursor=cursor)
+        next_cursor = encode_moderation_queue_cursor(vacancies[-1]) if has_more and vacancies else None
+        payload = {
+            "results": VacancyModerationSerializer(vacancies, many=True, context={"request": request}).data,
+            "has_more": has_more,
+            "next_cursor": next_cursor,
+            "next": (
+                replace_query_param(request.build_absolute_uri(), "cursor", next_cursor)
+                if next_cursor
+                else None
             ),
-            latest_moderation_attempt_no=Max("moderation_attempts__attempt_no"),
-        ).order_by("-queue_anchor", "-published_at")
+            "previous": None,
+        }
+        if cursor is None:
+            # Only the first page pays for the total shown on the queue badge.
+            payload["count"] = pending_moderation_queryset(request.user).count()
+        return Response(payload, status=status.HTTP_200_OK)
+
+
+class ModerationClaimAPIView(APIView):
+    permission_classes = [IsModerator]
+
+    def post(self, request):
+        try:
+            limit = int(request.data.get("limit") or 0)
+        except (TypeError, ValueError):
+            return Response({"error": "invalid_limit"}, status=status.HTTP_400_BAD_REQUEST)
+        vacancies, lease_until = claim_moderation_batch(request.user, limit=limit)
+        return Response(
+            {
+                "results": VacancyModerationSerializer(vacancies, many=True, context={"request": request}).data,
+                "claimed_until": lease_until.isoformat(),
+                "lease_seconds": int(MODERATION_CLAIM_LEASE.total_seconds()),
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class ModerationReleaseAPIView(APIView):
+    permission_classes = [IsModerator]
+
+    def post(self, request):
+        raw_ids = request.data.get("vacancy_ids")
+        vacancy_ids = None
+        if raw_ids is not None:
+            try:
+                vacancy_ids = [int(value) for value in raw_ids]
+            except (TypeError, ValueError):
+                return Response({"error": "invalid_vacancy_ids"}, status=status.HTTP_400_BAD_REQUEST)
+        released = release_moderation_claims(request.user, vacancy_ids)
+        return Response({"released": released}, status=status.HTTP_200_OK)
 
 
 class ModerationVacancyDetailAPIView(APIView):
@@ -2539,6 +2567,8 @@ class VacancyApproveAPIView(APIView):
             return Response({"error": "vacancy_deleted"}, status=status.HTTP_410_GONE)
         if vacancy.is_editing:
             return Response({"error": "vacancy_editing"}, status=409)
+        if claimed_by_other_moderator(vacancy, request.user):
+            return Response({"error": "vacancy_claimed"}, status=409)
         decision_time = timezone.now()
         _set_vacancy_live(vacancy, now=decision_time)
         ensure_free_contact_policy(vacancy, set_by=request.user)
@@ -2581,6 +2611,8 @@ class VacancyRejectAPIView(APIView):
             return Response({"error": "vacancy_deleted"}, status=status.HTTP_410_GONE)
         if vacancy.is_editing:
             return Response({"error": "vacancy_editing"}, status=409)
+        if claimed_by_other_moderator(vacancy, request.user):
+            return Response({"error": "vacancy_claimed"}, status=409)
         reason = censor_minimal((request.data.get("reason") or "").strip())
         if contains_link(reason):
             return Response(
@@ -3046,13 +3078,7 @@ class ComplaintAPIView(APIView):
             "COMPLAINT_EMAIL",
             getattr(settings, "SUPPORT_EMAIL", settings.DEFAULT_FROM_EMAIL),
         )
-        try:
-            send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [to_email], fail_silently=False)
-        except Exception:
-            return Response(
-                {"detail": "saved_email_failed", "complaint_id": complaint.id},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        queue_email(subject, body, [to_email], kind="complaint")
         return Response({"detail": "sent", "complaint_id": complaint.id}, status=200)
 
 
@@ -3309,7 +3335,7 @@ class ComplaintModerationActionAPIView(APIView):
             after_state=after_state,
         )
 
-        owner_notified, notify_error = _notify_vacancy_owner_about_complaint_action(
+        owner_notified = _notify_vacancy_owner_about_complaint_action(
             vacancy=vacancy,
             complaint=complaint,
             action=action,
@@ -3318,16 +3344,16 @@ class ComplaintModerationActionAPIView(APIView):
             reject_reason=reject_reason,
         )
 
-        payload = {
-            "detail": "action_applied",
-            "action": action,
-            "complaint_id": complaint.id,
-            "vacancy_id": vacancy.id,
-            "resolved_complaints": resolved_count,
-            "owner_notified": owner_notified,
-        }
-        if settings.DEBUG and notify_error:
-            payload["owner_notify_error"] = notify_error
-        return Response(payload, status=200)
+        return Response(
+            {
+                "detail": "action_applied",
+                "action": action,
+                "complaint_id": complaint.id,
+                "vacancy_id": vacancy.id,
+                "resolved_complaints": resolved_count,
+                "owner_notified": owner_notified,
+            },
+            status=200,
+        )
 
 
@@ -0,0 +1,259 @@
+"""Apple App Store receipt verification (the legacy verifyReceipt endpoint)."""
+
+import threading
+import time
+from datetime import datetime, timezone as datetime_timezone
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+APPLE_VERIFY_RECEIPT_TIMEOUT_SECONDS = 20
+APPLE_VERIFIED_TRANSACTION_CACHE_SECONDS = 60 * 60
+
+
+class AppleIAPNotConfiguredError(Exception):
+    code = "apple_iap_not_configured"
+
+
+class AppleIAPVerificationError(Exception):
+    def __init__(self, code, *, detail="", payload=None):
+        super().__init__(detail or code)
+        self.code = code
+        self.detail = detail or code
+        self.payload = payload or {}
+
+
+def apple_store_product_id(product):
+    metadata = product.metadata or {}
+    explicit = (metadata.get("ios_store_product_id") or "").strip()
+    if explicit:
+        return explicit
+    bundle_id = settings.APPLE_IAP_BUNDLE_ID.strip()
+    if not bundle_id:
+        return ""
+    store_product_id = (product.store_product_id or "").strip()
+    if store_product_id.startswith(f"{bundle_id}."):
+        return store_product_id
+    if product.product_type == "employer_subscription":
+        return f"{bundle_id}.employer_subscription"
+    if product.product_type == "seeker_subscription":
+        return f"{bundle_id}.seeker_subscription"
+    code = (product.code or "").strip()
+    if not code:
+        return ""
+    return f"{bundle_id}.{code}"
+
+
+_apple_session_lock = threading.Lock()
+_apple_session = None
+
+
+def _apple_verify_session():
+    global _apple_session
+    if _apple_session is not None:
+        return _apple_session
+    with _apple_session_lock:
+        if _apple_session is None:
+            session = requests.Session()
+            session.mount("https://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=16))
+            session.mount("http://", requests.adapters.HTTPAdapter(pool_connections=2, pool_maxsize=16))
+            _apple_session = session
+        return _apple_session
+
+
+def _post_apple_verify_receipt(url, *, receipt_data, include_shared_secret=False):
+    payload = {
+        "receipt-data": receipt_data,
+        "exclude-old-transactions": False,
+    }
+    shared_secret = settings.APPLE_IAP_SHARED_SECRET.strip()
+    if include_shared_secret and not shared_secret:
+        raise AppleIAPVerificationError(
+            "apple_shared_secret_missing",
+            detail="Apple shared secret is required for subscription receipt verification.",
+        )
+    if include_shared_secret:
+        payload["password"] = shared_secret
+    started = time.perf_counter()
+    try:
+        response = _apple_verify_session().post(
+            url,
+            json=payload,
+            timeout=APPLE_VERIFY_RECEIPT_TIMEOUT_SECONDS,
+        )
+        response.raise_for_status()
+        return response.json()
+    except requests.RequestException as exc:
+        raise AppleIAPVerificationError(
+            "apple_receipt_request_failed",
+            detail="Could not reach Apple receipt verification.",
+        ) from exc
+    except ValueError as exc:
+        raise AppleIAPVerificationError(
+            "apple_receipt_invalid_response",
+            detail="Apple receipt verification returned an invalid response.",
+        ) from exc
+    finally:
+        print(
+            f"[APPLE-IAP-VERIFY] url={url} "
+            f"api_ms={int((time.perf_counter() - started) * 1000)}"
+        )
+
+
+def _apple_receipt_status_error_code(status_code):
+    if status_code == 21004:
+        return "apple_shared_secret_invalid"
+    return "apple_receipt_invalid"
+
+
+def verify_apple_receipt(receipt_data, *, requires_shared_secret=False):
+    if not settings.APPLE_IAP_BUNDLE_ID.strip():
+        raise AppleIAPNotConfiguredError()
+
+    verified_payload = _post_apple_verify_receipt(
+        settings.APPLE_VERIFY_RECEIPT_PRODUCTION_URL,
+        receipt_data=receipt_data,
+        include_shared_secret=requires_shared_secret,
+    )
+    status_code = int(verified_payload.get("status") or 0)
+    if status_code == 21007:
+        verified_payload = _post_apple_verify_receipt(
+            settings.APPLE_VERIFY_RECEIPT_SANDBOX_URL,
+            receipt_data=receipt_data,
+            include_shared_secret=requires_shared_secret,
+        )
+        status_code = int(verified_payload.get("status") or 0)
+    elif status_code == 21008:
+        verified_payload = _post_apple_verify_receipt(
+            settings.APPLE_VERIFY_RECEIPT_PRODUCTION_URL,
+            receipt_data=receipt_data,
+            include_shared_secret=requires_shared_secret,
+        )
+        status_code = int(verified_payload.get("status") or 0)
+
+    if status_code != 0:
+        raise AppleIAPVerificationError(
+            _apple_receipt_status_error_code(status_code),
+            detail=f"Apple receipt verification failed with status {status_code}.",
+            payload=verified_payload,
+        )
+
+    receipt = verified_payload.get("receipt") or {}
+    bundle_id = (receipt.get("bundle_id") or "").strip()
+    expected_bundle_id = settings.APPLE_IAP_BUNDLE_ID.strip()
+    if expected_bundle_id and bundle_id and bundle_id != expected_bundle_id:
+        raise AppleIAPVerificationError(
+            "apple_receipt_bundle_mismatch",
+            detail="Apple receipt bundle ID does not match the app bundle ID.",
+            payload=verified_payload,
+        )
+
+    return verified_payload
+
+
+def _iter_apple_receipt_items(verified_payload):
+    latest_items = verified_payload.get("latest_receipt_info")
+    if isinstance(latest_items, list):
+        yield from (item for item in latest_items if isinstance(item, dict))
+    receipt = verified_payload.get("receipt") or {}
+    in_app_items = receipt.get("in_app")
+    if isinstance(in_app_items, list):
+        yield from (item for item in in_app_items if isinstance(item, dict))
+
+
+def _apple_receipt_item_sort_key(item):
+    for key in ("expires_date_ms", "purchase_date_ms", "original_purchase_date_ms"):
+        raw = (item.get(key) or "").strip()
+        if raw.isdigit():
+            return int(raw)
+    return 0
+
+
+def find_apple_receipt_item(*, verified_payload, expected_product_id, purchase_id=""):
+    """Pick the receipt item for the purchase in a single pass.
+
+    An item whose transaction id matches purchase_id ends the scan at once,
+    so long in_app histories are not walked past it. Otherwise the newest
+    item for the product wins.
+    """
+
+    raw_purchase_id = (purchase_id or "").strip()
+    newest = None
+    newest_key = None
+    for item in _iter_apple_receipt_items(verified_payload):
+        if (item.get("product_id") or "").strip() != expected_product_id:
+            continue
+        if raw_purchase_id and raw_purchase_id in {
+            (item.get("transaction_id") or "").strip(),
+            (item.get("original_transaction_id") or "").strip(),
+        }:
+            return item
+        sort_key = _apple_receipt_item_sort_key(item)
+        if newest is None or sort_key > newest_key:
+            newest, newest_key = item, sort_key
+
+    if newest is None:
+        raise AppleIAPVerificationError(
+            "apple_receipt_product_not_found",
+            detail="The Apple receipt does not contain the expected product.",
+            payload=verified_payload,
+        )
+    return newest
+
+
+def _apple_verified_transaction_cache_key(user_id, transaction_id):
+    return f"apple-iap:verified:{user_id}:{transaction_id}"
+
+
+def cached_apple_verification(user_id, purchase_id, expected_product_id):
+    if not purchase_id:
+        return None, None
+    cached = cache.get(_apple_verified_transaction_cache_key(user_id, purchase_id))
+    if not cached or cached.get("product_id") != expected_product_id:
+        return None, None
+    return cached["receipt_summary"], cached["matched_item"]
+
+
+def remember_apple_verification(user_id, purchase_id, matched_item, verified_payload, expected_product_id):
+    """Cache a verified consumable under the transaction id the client sent.
+
+    Only items Apple returned for exactly that transaction are cached, and
+    only a short receipt summary is kept instead of the full history.
+    Subscriptions are never cached: a renewal has to be verified again.
+    """
+
+    transaction_id = (matched_item.get("transaction_id") or "").strip()
+    if not transaction_id or transaction_id != purchase_id:
+        return
+    if (matched_item.get("product_id") or "").strip() != expected_product_id:
+        return
+    receipt = verified_payload.get("receipt") or {}
+    cache.set(
+        _apple_verified_transaction_cache_key(user_id, transaction_id),
+        {
+            "product_id": expected_product_id,
+            "receipt_summary": {
+                "status": verified_payload.get("status"),
+                "environment": verified_payload.get("environment") or "",
+                "bundle_id": (receipt.get("bundle_id") or "").strip() if isinstance(receipt, dict) else "",
+                "cached": True,
+            },
+            "matched_item": matched_item,
+        },
+        timeout=APPLE_VERIFIED_TRANSACTION_CACHE_SECONDS,
+    )
+
+
+def apple_receipt_item_expires_at(item):
+    raw_ms = (item.get("expires_date_ms") or "").strip()
+    if raw_ms.isdigit():
+        return datetime.fromtimestamp(int(raw_ms) / 1000, tz=datetime_timezone.utc)
+    raw = (item.get("expires_date") or "").strip()
+    parsed = parse_datetime(raw) if raw else None
+    if parsed and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, datetime_timezone.utc)
+    return parsed
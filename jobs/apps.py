@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class JobsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'jobs'
+
+    def ready(self):
+        from . import economy  # noqa: F401  (registers catalog invalidation signals)
+        from . import account_snapshot  # noqa: F401  (registers snapshot invalidation signals)
+        from . import token_auth  # noqa: F401  (registers token cache invalidation signals)
@@ -2,7 +2,6 @@ import json
 import os
 import random
 import re
-import threading
 import base64
 import hashlib
 from importlib import util as importlib_util
@@ -14,28 +13,25 @@ from django.conf import settings
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.contrib.auth.hashers import make_password
-from django.core.mail import send_mail
 from django.db import IntegrityError
+from django.db.models import Case, Value, When
+from django.db.models.functions import Upper
 from django.utils import timezone
 from rest_framework import permissions, status
 from rest_framework.authtoken.models import Token
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .avatar_storage import (
-    delete_avatar_object,
-    is_avatar_storage_configured,
-    upload_avatar_bytes,
-)
-from .avatar_utils import (
-    avatar_public_url,
-    build_avatar_object_key,
-    process_avatar_image,
-)
-from .economy import get_or_create_monetization_profile, get_or_create_wallet
+from .avatar_processing import process_avatar_upload
+from .avatar_storage import is_avatar_storage_configured, queue_avatar_deletion
+from .avatar_utils import avatar_object_keys, read_avatar_upload
+from .account_snapshot import get_account_snapshot, invalidate_account_snapshot
+from .background import submit_background_task
+from .rate_limits import consume_rate_limit, hit_rate_limit, rate_limit_exceeded
 from .models import AccountDeletionRequest, EmailVerification, PhoneVerification, PhoneVerificationAttempt, UserProfile, Vacancy
-from .board_publishing import authorization_payload_for_employer
-from .reviews import get_employer_review_summary
+from .email_outbox import queue_email
+from .identity_keys import identity_keys_for
+from .token_auth import issue_auth_token
 from .text_filters import (
     censor_minimal,
     contains_digit_or_number_emoji,
@@ -78,9 +74,8 @@ _DEFAULT_ALLOWED_PHONE_COUNTRY_CODES = (
     "+380",  # Ukraine
 )
 _ACCOUNT_DELETION_DELAY = timedelta(days=30)
-_phone_request_attempts = {}
-_phone_request_lock = threading.Lock()
 _PHONE_CODE_COOLDOWN = timedelta(seconds=45)
+_EMAIL_CODE_COOLDOWN = timedelta(seconds=45)
 _PHONE_RESET_REQUEST_HOURLY_LIMIT = 5
 _PHONE_RESET_REQUEST_DAILY_LIMIT = 10
 _PHONE_RESET_VERIFY_ATTEMPT_LIMIT = 5
@@ -90,10 +85,6 @@ _PROFILE_DESCRIPTION_MAX_LENGTH = 160
 _PROFILE_DESCRIPTION_MAX_LINES = 3
 _PROFILE_DESCRIPTION_MAX_CHARS_PER_LINE = 27
 _EMAIL_RE = re.compile(r"^[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}$", re.IGNORECASE)
-APPLE_ID_KEYS_URL = "https://appleid.apple.com/auth/keys"
-_APPLE_JWKS_CACHE = {"fetched_at": None, "keys": []}
-_APPLE_JWKS_LOCK = threading.Lock()
-_APPLE_JWKS_TTL = timedelta(hours=1)
 _RESERVED_NICKNAME_PARTS = (
     "jobhub",
     "support",
@@ -149,31 +140,7 @@ def _normalize_phone(raw_phone):
 
 
 def _auth_payload(user, token):
-    # Every account gets a safe public name even if the person skipped nickname.
-    profile, _ = UserProfile.objects.get_or_create(user=user)
-    wallet = get_or_create_wallet(user)
-    monetization_profile = get_or_create_monetization_profile(user)
-    avatar_key = (profile.avatar_key if profile else "") or ""
-    return {
-        "token": token.key,
-        "is_staff": user.is_staff,
-        "email": user.email or "",
-        "nickname": (profile.nickname if profile else "") or "",
-        "profile_description": (profile.description if profile else "") or "",
-        "avatar_url": avatar_public_url(avatar_key),
-        "subscribers_count": user.employer_followers.count(),
-        "phone": (profile.phone_e164 if profile else "") or "",
-        "phone_verified": bool(profile and profile.phone_verified),
-        "employer_verified": bool(profile and profile.employer_verified),
-        "has_password": user.has_usable_password(),
-        "wallet_total_credits": wallet.total_credits,
-        "wallet_paid_credits": wallet.paid_credits,
-        "wallet_bonus_credits": wallet.bonus_credits,
-        "employer_subscription_until": monetization_profile.employer_subscription_until,
-        "seeker_subscription_until": monetization_profile.seeker_subscription_until,
-        "employer_review_summary": get_employer_review_summary(user),
-        "board_publishing": authorization_payload_for_employer(user),
-    }
+    return {"token": token.key, **get_account_snapshot(user)}
 
 
 def _rotate_auth_token(user):
@@ -181,39 +148,37 @@ def _rotate_auth_token(user):
     return Token.objects.create(user=user)
 
 
-def _login_candidates(identifier):
-    value = (identifier or "").strip()
-    if not value:
-        return []
-
-    users = []
-    seen_ids = set()
-
-    for user in User.objects.filter(username__iexact=value):
-        if user.id in seen_ids:
-            continue
-        users.append(user)
-        seen_ids.add(user.id)
+def _login_candidates_queryset(value):
+    """Users whose username, email or nickname matches, in that order.
 
+    One UNION query over the UPPER() expression indexes on auth_user and
+    jobs_userprofile instead of three case-insensitive scans.
+    """
+    needle = Upper(Value(value))
+    by_username = User.objects.alias(login_key=Upper("username")).filter(login_key=needle).values("id")
     # Some accounts created through a provider keep a technical username while
     # their verified email remains the user's normal sign-in identifier.
-    for user in User.objects.filter(email__iexact=value):
-        if user.id in seen_ids:
-            continue
-        users.append(user)
-        seen_ids.add(user.id)
-
-    nickname_matches = UserProfile.objects.filter(
-        nickname__iexact=value
-    ).select_related("user")
-    for profile in nickname_matches:
-        user = profile.user
-        if not user or user.id in seen_ids:
-            continue
-        users.append(user)
-        seen_ids.add(user.id)
+    by_email = User.objects.alias(login_key=Upper("email")).filter(login_key=needle).values("id")
+    by_nickname = UserProfile.objects.alias(login_key=Upper("nickname")).filter(login_key=needle).values("user_id")
+    return (
+        User.objects.filter(id__in=by_username.union(by_email, by_nickname, all=True))
+        .alias(username_key=Upper("username"), email_key=Upper("email"))
+        .annotate(
+            login_rank=Case(
+                When(username_key=needle, then=Value(0)),
+                When(email_key=needle, then=Value(1)),
+                default=Value(2),
+            )
+        )
+        .order_by("login_rank", "id")
+    )
 
-    return users
+
+def _login_candidates(identifier):
+    value = (identifier or "").strip()
+    if not value:
+        return []
+    return list(_login_candidates_queryset(value))
 
 
 def _nickname_reserved_matches(nickname):
@@ -264,13 +229,20 @@ def _verify_google_id_token(raw_token):
         raise RuntimeError("google_sign_in_not_configured")
 
     try:
-        from google.auth.transport.requests import Request
-        from google.oauth2 import id_token
+        from google.auth import jwt as google_jwt
     except ImportError as exc:
         raise RuntimeError("google_sign_in_dependencies_missing") from exc
 
     try:
-        payload = id_token.verify_oauth2_token(token, Request(), audience=None)
+        key_id = (google_jwt.decode_header(token).get("kid") or "").strip()
+    except Exception as exc:
+        raise ValueError("google_token_invalid") from exc
+    if not key_id:
+        raise ValueError("google_token_invalid")
+
+    certs = identity_keys_for("google", key_id)
+    try:
+        payload = google_jwt.decode(token, certs=certs, audience=None)
     except Exception as exc:
         raise ValueError("google_token_invalid") from exc
 
@@ -316,7 +288,6 @@ def _google_login_user(payload):
         if updated_fields:
             user.save(update_fields=updated_fields)
 
-    UserProfile.objects.get_or_create(user=user)
     return user
 
 
@@ -329,34 +300,6 @@ def _apple_sign_in_client_ids():
     }
 
 
-def _apple_public_keys(force_refresh=False):
-    now = timezone.now()
-    with _APPLE_JWKS_LOCK:
-        fetched_at = _APPLE_JWKS_CACHE.get("fetched_at")
-        cached_keys = _APPLE_JWKS_CACHE.get("keys") or []
-        if (
-            not force_refresh
-            and cached_keys
-            and fetched_at
-            and now - fetched_at < _APPLE_JWKS_TTL
-        ):
-            return cached_keys
-
-        try:
-            with urllib_request.urlopen(APPLE_ID_KEYS_URL, timeout=5) as response:
-                data = json.loads(response.read().decode("utf-8"))
-        except Exception as exc:
-            raise RuntimeError("apple_sign_in_keys_unavailable") from exc
-
-        keys = data.get("keys") or []
-        if not isinstance(keys, list) or not keys:
-            raise RuntimeError("apple_sign_in_keys_invalid")
-
-        _APPLE_JWKS_CACHE["fetched_at"] = now
-        _APPLE_JWKS_CACHE["keys"] = keys
-        return keys
-
-
 def _verify_apple_id_token(raw_token):
     token = (raw_token or "").strip()
     if not token:
@@ -380,42 +323,36 @@ def _verify_apple_id_token(raw_token):
     if not key_id:
         raise ValueError("apple_token_invalid")
 
-    last_error = None
-    for force_refresh in (False, True):
-        keys = _apple_public_keys(force_refresh=force_refresh)
-        key = next((item for item in keys if item.get("kid") == key_id), None)
-        if not key:
-            last_error = ValueError("apple_token_invalid")
-            continue
-
-        try:
-            public_key = jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(key))
-            payload = jwt.decode(
-                token,
-                public_key,
-                algorithms=["RS256"],
-                audience=list(allowed_client_ids),
-                issuer="https://appleid.apple.com",
-            )
-        except jwt.PyJWTError as exc:
-            last_error = exc
-            continue
+    keys = identity_keys_for("apple", key_id).get("keys") or []
+    key = next((item for item in keys if item.get("kid") == key_id), None)
+    if not key:
+        raise ValueError("apple_token_invalid")
 
-        apple_user_id = (payload.get("sub") or "").strip()
-        if not apple_user_id:
-            raise ValueError("apple_token_invalid")
+    try:
+        public_key = jwt.algorithms.RSAAlgorithm.from_jwk(json.dumps(key))
+        payload = jwt.decode(
+            token,
+            public_key,
+            algorithms=["RS256"],
+            audience=list(allowed_client_ids),
+            issuer="https://appleid.apple.com",
+        )
+    except jwt.PyJWTError as exc:
+        raise ValueError("apple_token_invalid") from exc
 
-        email = (payload.get("email") or "").strip().lower()
-        if email:
-            if not _is_valid_email(email):
-                raise ValueError("apple_email_missing")
-            email_verified = payload.get("email_verified")
-            if email_verified not in {True, "true", "1", 1}:
-                raise ValueError("apple_email_not_verified")
+    apple_user_id = (payload.get("sub") or "").strip()
+    if not apple_user_id:
+        raise ValueError("apple_token_invalid")
 
-        return payload
+    email = (payload.get("email") or "").strip().lower()
+    if email:
+        if not _is_valid_email(email):
+            raise ValueError("apple_email_missing")
+        email_verified = payload.get("email_verified")
+        if email_verified not in {True, "true", "1", 1}:
+            raise ValueError("apple_email_not_verified")
 
-    raise ValueError("apple_token_invalid") from last_error
+    return payload
 
 
 def _synthetic_apple_username(apple_user_id):
@@ -448,7 +385,7 @@ def _apple_login_user(payload):
             user.set_unusable_password()
             user.save()
 
-        profile, _ = UserProfile.objects.get_or_create(user=user)
+        profile = UserProfile.objects.get(user=user)
         if profile.apple_user_id and profile.apple_user_id != apple_user_id:
             raise ValueError("apple_account_conflict")
         if not profile.apple_user_id:
@@ -470,7 +407,6 @@ def _apple_login_user(payload):
     if updated_fields:
         user.save(update_fields=updated_fields)
 
-    UserProfile.objects.get_or_create(user=user)
     return user
 
 
@@ -490,7 +426,7 @@ def _send_email_code(email, code, purpose="register"):
     else:
         subject = "JobHub verification code"
         message = f"Your verification code: {code}\nIt is valid for 10 minutes."
-    send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [email], fail_silently=False)
+    queue_email(subject, message, [email], kind=f"email_code:{purpose}")
 
 
 def _send_whatsapp_code(phone_e164, code, purpose):
@@ -571,16 +507,12 @@ def _twilio_error_message(raw, fallback="twilio_error"):
 
 
 def _consume_phone_request_slot(phone_e164):
-    now = timezone.now()
-    with _phone_request_lock:
-        current = _phone_request_attempts.get(phone_e164, [])
-        fresh = [ts for ts in current if ts > now - _PHONE_REQUEST_WINDOW]
-        if len(fresh) >= _PHONE_REQUEST_MAX_ATTEMPTS:
-            _phone_request_attempts[phone_e164] = fresh
-            return False
-        fresh.append(now)
-        _phone_request_attempts[phone_e164] = fresh
-        return True
+    return consume_rate_limit(
+        "phone-request",
+        phone_e164,
+        limit=_PHONE_REQUEST_MAX_ATTEMPTS,
+        window=_PHONE_REQUEST_WINDOW,
+    )
 
 
 def _twilio_credentials():
@@ -697,14 +629,14 @@ def _username_for_phone(phone_e164):
 
 
 def _phone_code_too_frequent(phone_e164, purpose):
-    return PhoneVerification.objects.filter(
-        phone_e164=phone_e164,
-        purpose=purpose,
-        created_at__gt=timezone.now() - _PHONE_CODE_COOLDOWN,
-    ).exists()
+    return rate_limit_exceeded("phone-code", f"{purpose}:{phone_e164}", limit=1)
 
 
 def _create_phone_code(phone_e164, purpose, user=None):
+    hit_rate_limit("phone-code", f"{purpose}:{phone_e164}", window=_PHONE_CODE_COOLDOWN)
+    if purpose == "reset":
+        hit_rate_limit("phone-reset-hour", phone_e164, window=timedelta(hours=1))
+        hit_rate_limit("phone-reset-day", phone_e164, window=timedelta(days=1))
     PhoneVerification.objects.filter(
         phone_e164=phone_e164,
         purpose=purpose,
@@ -733,33 +665,25 @@ def _latest_phone_code_record(phone_e164, purpose):
     )
 
 
-def _phone_reset_failed_attempts(phone_e164):
-    window_start = timezone.now() - _PHONE_RESET_VERIFY_BLOCK_WINDOW
-    return sum(
-        PhoneVerification.objects.filter(
-            phone_e164=phone_e164,
-            purpose="reset",
-            created_at__gt=window_start,
-        ).values_list("attempts", flat=True)
-    )
+def _record_phone_reset_failure(phone_e164):
+    hit_rate_limit("phone-reset-verify", phone_e164, window=_PHONE_RESET_VERIFY_BLOCK_WINDOW)
 
 
 def _phone_reset_verify_blocked(phone_e164):
-    return _phone_reset_failed_attempts(phone_e164) >= _PHONE_RESET_VERIFY_ATTEMPT_LIMIT
+    return rate_limit_exceeded(
+        "phone-reset-verify",
+        phone_e164,
+        limit=_PHONE_RESET_VERIFY_ATTEMPT_LIMIT,
+    )
 
 
 def _phone_reset_request_blocked(phone_e164):
-    if _phone_code_too_frequent(phone_e164, "reset"):
-        return True
-    if _phone_reset_verify_blocked(phone_e164):
-        return True
-    now = timezone.now()
-    base_qs = PhoneVerification.objects.filter(phone_e164=phone_e164, purpose="reset")
-    if base_qs.filter(created_at__gt=now - timedelta(hours=1)).count() >= _PHONE_RESET_REQUEST_HOURLY_LIMIT:
-        return True
-    if base_qs.filter(created_at__gt=now - timedelta(days=1)).count() >= _PHONE_RESET_REQUEST_DAILY_LIMIT:
-        return True
-    return False
+    return (
+        _phone_code_too_frequent(phone_e164, "reset")
+        or _phone_reset_verify_blocked(phone_e164)
+        or rate_limit_exceeded("phone-reset-hour", phone_e164, limit=_PHONE_RESET_REQUEST_HOURLY_LIMIT)
+        or rate_limit_exceeded("phone-reset-day", phone_e164, limit=_PHONE_RESET_REQUEST_DAILY_LIMIT)
+    )
 
 
 def _increment_phone_attempt(record):
@@ -771,14 +695,11 @@ def _increment_phone_attempt(record):
 
 
 def _email_code_too_frequent(user, purpose):
-    return EmailVerification.objects.filter(
-        user=user,
-        purpose=purpose,
-        created_at__gt=timezone.now() - timedelta(seconds=45),
-    ).exists()
+    return rate_limit_exceeded("email-code", f"{purpose}:{user.id}", limit=1)
 
 
 def _create_email_code(user, purpose, target_email=""):
+    hit_rate_limit("email-code", f"{purpose}:{user.id}", window=_EMAIL_CODE_COOLDOWN)
     EmailVerification.objects.filter(
         user=user,
         purpose=purpose,
@@ -915,7 +836,7 @@ class VerifyEmailAPIView(APIView):
         user.is_active = True
         user.save(update_fields=["is_active"])
 
-        token, _ = Token.objects.get_or_create(user=user)
+        token = issue_auth_token(user)
         return Response(_auth_payload(user, token))
 
 
@@ -1229,6 +1150,7 @@ class PhoneVerifyCodeAPIView(APIView):
             if not approved:
                 if purpose == "reset":
                     _increment_phone_attempt(_latest_phone_code_record(phone, purpose))
+                    _record_phone_reset_failure(phone)
                     if _phone_reset_verify_blocked(phone):
                         _record_phone_verification_attempt(
                             request,
@@ -1255,6 +1177,7 @@ class PhoneVerifyCodeAPIView(APIView):
             if not rec or not rec.is_valid():
                 if purpose == "reset":
                     _increment_phone_attempt(_latest_phone_code_record(phone, purpose))
+                    _record_phone_reset_failure(phone)
                     if _phone_reset_verify_blocked(phone):
                         _record_phone_verification_attempt(
                             request,
@@ -1277,6 +1200,8 @@ class PhoneVerifyCodeAPIView(APIView):
             if rec.code != code:
                 rec.attempts += 1
                 rec.save(update_fields=["attempts"])
+                if purpose == "reset":
+                    _record_phone_reset_failure(phone)
                 if purpose == "reset" and _phone_reset_verify_blocked(phone):
                     _record_phone_verification_attempt(
                         request,
@@ -1310,7 +1235,7 @@ class PhoneVerifyCodeAPIView(APIView):
                     http_status=status.HTTP_401_UNAUTHORIZED,
                 )
                 return Response({"error": "auth_required"}, status=status.HTTP_401_UNAUTHORIZED)
-            profile, _ = UserProfile.objects.get_or_create(user=request.user)
+            profile = UserProfile.objects.get(user=request.user)
             try:
                 profile.phone_e164 = phone
                 profile.phone_verified = True
@@ -1351,13 +1276,13 @@ class PhoneVerifyCodeAPIView(APIView):
             user = User.objects.filter(username=username).first()
             if not user:
                 user = User.objects.create_user(username=username, email="", password=None, is_active=True)
-            profile, _ = UserProfile.objects.get_or_create(user=user)
+            profile = UserProfile.objects.get(user=user)
         profile.phone_e164 = phone
         profile.phone_verified = True
         profile.phone_verified_at = timezone.now()
         profile.save(update_fields=["phone_e164", "phone_verified", "phone_verified_at"])
         user = profile.user
-        token, _ = Token.objects.get_or_create(user=user)
+        token = issue_auth_token(user)
         _record_phone_verification_attempt(
             request,
             phone_e164=phone,
@@ -1447,6 +1372,7 @@ class ResetPasswordConfirmAPIView(APIView):
             ).order_by("-created_at").first()
             if not rec or not rec.is_valid():
                 _increment_phone_attempt(_latest_phone_code_record(phone, "reset"))
+                _record_phone_reset_failure(phone)
                 if _phone_reset_verify_blocked(phone):
                     return Response({"error": "too_many_attempts"}, status=status.HTTP_429_TOO_MANY_REQUESTS)
                 return Response({"error": "invalid or expired code"}, status=status.HTTP_400_BAD_REQUEST)
@@ -1676,7 +1602,7 @@ class LoginAPIView(APIView):
 
         user = authenticated_users[0]
 
-        token, _ = Token.objects.get_or_create(user=user)
+        token = issue_auth_token(user)
         return Response(_auth_payload(user, token))
 
 
@@ -1695,7 +1621,7 @@ class GoogleLoginAPIView(APIView):
             )
 
         user = _google_login_user(payload)
-        token, _ = Token.objects.get_or_create(user=user)
+        token = issue_auth_token(user)
         auth_payload = _auth_payload(user, token)
         auth_payload["detail"] = "google_login"
         return Response(auth_payload)
@@ -1721,7 +1647,7 @@ class AppleLoginAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        token, _ = Token.objects.get_or_create(user=user)
+        token = issue_auth_token(user)
         auth_payload = _auth_payload(user, token)
         auth_payload["detail"] = "apple_login"
         return Response(auth_payload)
@@ -1731,7 +1657,7 @@ class MeAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        token, _ = Token.objects.get_or_create(user=request.user)
+        token = issue_auth_token(request.user)
         return Response(_auth_payload(request.user, token))
 
     def patch(self, request):
@@ -1813,7 +1739,7 @@ class MeAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        profile, _ = UserProfile.objects.get_or_create(user=request.user)
+        profile = UserProfile.objects.get(user=request.user)
         updated_fields = []
         if nickname_to_store is not None and profile.nickname != nickname_to_store:
             profile.nickname = nickname_to_store
@@ -1827,7 +1753,7 @@ class MeAPIView(APIView):
         if updated_fields:
             profile.save(update_fields=updated_fields)
 
-        token, _ = Token.objects.get_or_create(user=request.user)
+        token = issue_auth_token(request.user)
         payload = _auth_payload(request.user, token)
         payload["detail"] = "nickname_updated"
         return Response(payload, status=status.HTTP_200_OK)
@@ -1851,51 +1777,33 @@ class MeAvatarAPIView(APIView):
 
         avatar_file = request.FILES.get("avatar")
         try:
-            payload, content_type, ext = process_avatar_image(avatar_file)
+            raw = read_avatar_upload(avatar_file)
         except ValueError as exc:
             return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
-        except Exception as exc:
-            print(f"[AVATAR-PROCESS-ERROR] user={request.user.id}: {exc}")
-            return Response(
-                {"error": "avatar_processing_failed"},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
 
-        profile, _ = UserProfile.objects.get_or_create(user=request.user)
-        old_key = (profile.avatar_key or "").strip()
-        new_key = build_avatar_object_key(
-            user_id=request.user.id,
-            filename=f"avatar{ext}",
-        )
-
-        try:
-            upload_avatar_bytes(
-                object_key=new_key,
-                payload=payload,
-                content_type=content_type,
-            )
-        except Exception as exc:
-            print(f"[AVATAR-UPLOAD-ERROR] user={request.user.id}: {exc}")
+        # Resizing and the R2 uploads run on a background worker; the client
+        # sees avatar_processing in auth/me/ until the new variants are live.
+        started_at = timezone.now()
+        UserProfile.objects.filter(user=request.user).update(avatar_processing_started_at=started_at)
+        invalidate_account_snapshot(request.user.id)
+        submit_background_task("avatar_processing", process_avatar_upload, request.user.id, raw, started_at)
+
+        processing_started_at, avatar_updated_at = UserProfile.objects.filter(user=request.user).values_list(
+            "avatar_processing_started_at", "avatar_updated_at"
+        ).get()
+        if processing_started_at is None and not (avatar_updated_at and avatar_updated_at >= started_at):
             return Response(
-                {"error": "avatar_upload_failed"},
+                {"error": "avatar_processing_failed"},
                 status=status.HTTP_503_SERVICE_UNAVAILABLE,
             )
 
-        profile.avatar_key = new_key
-        profile.avatar_updated_at = timezone.now()
-        profile.save(update_fields=["avatar_key", "avatar_updated_at"])
-
-        if old_key and old_key != new_key:
-            try:
-                delete_avatar_object(old_key)
-            except Exception as exc:
-                # Non-blocking by design: keep successful update even if cleanup failed.
-                print(f"[AVATAR-DELETE-OLD-ERROR] user={request.user.id}: {exc}")
-
-        token, _ = Token.objects.get_or_create(user=request.user)
+        token = issue_auth_token(request.user)
         auth_payload = _auth_payload(request.user, token)
-        auth_payload["detail"] = "avatar_updated"
-        return Response(auth_payload, status=status.HTTP_200_OK)
+        if processing_started_at is None:
+            auth_payload["detail"] = "avatar_updated"
+            return Response(auth_payload, status=status.HTTP_200_OK)
+        auth_payload["detail"] = "avatar_processing"
+        return Response(auth_payload, status=status.HTTP_202_ACCEPTED)
 
     def delete(self, request):
         profile = UserProfile.objects.filter(user=request.user).first()
@@ -1904,16 +1812,14 @@ class MeAvatarAPIView(APIView):
         if profile:
             profile.avatar_key = ""
             profile.avatar_updated_at = timezone.now()
-            profile.save(update_fields=["avatar_key", "avatar_updated_at"])
+            # Also drops the result of an upload that is still processing.
+            profile.avatar_processing_started_at = None
+            profile.save(update_fields=["avatar_key", "avatar_updated_at", "avatar_processing_started_at"])
 
         if old_key:
-            try:
-                delete_avatar_object(old_key)
-            except Exception as exc:
-                # Non-blocking by design: local state already cleaned.
-                print(f"[AVATAR-DELETE-ERROR] user={request.user.id}: {exc}")
+            queue_avatar_deletion(avatar_object_keys(old_key))
 
-        token, _ = Token.objects.get_or_create(user=request.user)
+        token = issue_auth_token(request.user)
         auth_payload = _auth_payload(request.user, token)
         auth_payload["detail"] = "avatar_deleted"
         return Response(auth_payload, status=status.HTTP_200_OK)
@@ -2119,6 +2025,6 @@ class LinkEmailConfirmAPIView(APIView):
         rec.is_used = True
         rec.save(update_fields=["is_used"])
 
-        token, _ = Token.objects.get_or_create(user=user)
+        token = issue_auth_token(user)
         return Response(_auth_payload(user, token))
 
@@ -0,0 +1,43 @@
+from django.db import transaction
+from django.utils import timezone
+
+from .account_snapshot import invalidate_account_snapshot
+from .avatar_storage import queue_avatar_deletion, upload_avatar_variants
+from .avatar_utils import avatar_object_keys, build_avatar_variant_prefix, render_avatar_variants
+from .models import UserProfile
+
+
+def process_avatar_upload(user_id, raw, started_at):
+    """Render and upload the avatar variants, then point the profile at them.
+
+    started_at identifies the upload: if the user uploaded again (or removed
+    the avatar) in the meantime, this result is discarded.
+    """
+
+    try:
+        variants, fallback_ext = render_avatar_variants(raw)
+        prefix = build_avatar_variant_prefix(user_id=user_id)
+        upload_avatar_variants(prefix=prefix, variants=variants)
+    except Exception as exc:
+        print(f"[AVATAR-PROCESS-ERROR] user={user_id}: {exc}")
+        UserProfile.objects.filter(user_id=user_id, avatar_processing_started_at=started_at).update(
+            avatar_processing_started_at=None
+        )
+        invalidate_account_snapshot(user_id)
+        return False
+
+    new_key = f"{prefix}/512{fallback_ext}"
+    with transaction.atomic():
+        profile = UserProfile.objects.select_for_update().filter(user_id=user_id).first()
+        if profile is None or profile.avatar_processing_started_at != started_at:
+            old_key = new_key
+        else:
+            old_key = (profile.avatar_key or "").strip()
+            profile.avatar_key = new_key
+            profile.avatar_updated_at = timezone.now()
+            profile.avatar_processing_started_at = None
+            profile.save(update_fields=["avatar_key", "avatar_updated_at", "avatar_processing_started_at"])
+
+    if old_key:
+        queue_avatar_deletion(avatar_object_keys(old_key))
+    return old_key != new_key
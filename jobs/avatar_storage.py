@@ -1,25 +1,63 @@
+import threading
+
 from django.conf import settings
 
+from .background import submit_background_task
+
+
+_client_lock = threading.Lock()
+# (settings tuple, client); rebuilt only when the R2 settings change.
+_client = (None, None)
+
+
+def _r2_settings():
+    return (
+        (getattr(settings, "R2_ENDPOINT_URL", "") or "").strip(),
+        (getattr(settings, "R2_ACCESS_KEY_ID", "") or "").strip(),
+        (getattr(settings, "R2_SECRET_ACCESS_KEY", "") or "").strip(),
+        (getattr(settings, "R2_REGION", "auto") or "auto").strip(),
+    )
+
 
 def _r2_client():
-    # Lazy import keeps startup safe before dependencies are installed.
-    import boto3  # type: ignore
+    """Process-wide boto3 client; clients are thread-safe and pool connections.
 
-    endpoint = (getattr(settings, "R2_ENDPOINT_URL", "") or "").strip()
-    key_id = (getattr(settings, "R2_ACCESS_KEY_ID", "") or "").strip()
-    secret = (getattr(settings, "R2_SECRET_ACCESS_KEY", "") or "").strip()
-    region = (getattr(settings, "R2_REGION", "auto") or "auto").strip()
+    Building one re-reads botocore's service model and endpoint rules, which
+    costs tens of milliseconds, so it happens once per process.
+    """
+    global _client
+    config_key = _r2_settings()
+    cached_key, client = _client
+    if client is not None and cached_key == config_key:
+        return client
 
+    endpoint, key_id, secret, region = config_key
     if not endpoint or not key_id or not secret:
         raise RuntimeError("avatar_storage_not_configured")
 
-    return boto3.client(
-        "s3",
-        endpoint_url=endpoint,
-        aws_access_key_id=key_id,
-        aws_secret_access_key=secret,
-        region_name=region,
-    )
+    with _client_lock:
+        cached_key, client = _client
+        if client is None or cached_key != config_key:
+            # Lazy import keeps startup safe before dependencies are installed.
+            import boto3  # type: ignore
+            from botocore.config import Config  # type: ignore
+
+            client = boto3.session.Session().client(
+                "s3",
+                endpoint_url=endpoint,
+                aws_access_key_id=key_id,
+                aws_secret_access_key=secret,
+                region_name=region,
+                config=Config(
+                    max_pool_connections=int(getattr(settings, "R2_MAX_POOL_CONNECTIONS", 20) or 20),
+                    retries={"max_attempts": 4, "mode": "standard"},
+                    connect_timeout=3,
+                    read_timeout=15,
+                    s3={"addressing_style": "path"},
+                ),
+            )
+            _client = (config_key, client)
+        return client
 
 
 def is_avatar_storage_configured():
@@ -46,9 +84,20 @@ def upload_avatar_bytes(*, object_key: str, payload: bytes, content_type: str):
     )
 
 
-def delete_avatar_object(object_key: str):
-    key = (object_key or "").strip().lstrip("/")
-    if not key:
+def upload_avatar_variants(*, prefix: str, variants):
+    """Upload (file_name, payload, content_type) triples under prefix."""
+
+    for file_name, payload, content_type in variants:
+        upload_avatar_bytes(
+            object_key=f"{prefix}/{file_name}",
+            payload=payload,
+            content_type=content_type,
+        )
+
+
+def delete_avatar_objects(object_keys):
+    keys = [key.strip().lstrip("/") for key in object_keys if (key or "").strip()]
+    if not keys:
         return
 
     bucket = (getattr(settings, "R2_BUCKET", "") or "").strip()
@@ -56,4 +105,19 @@ def delete_avatar_object(object_key: str):
         return
 
     client = _r2_client()
-    client.delete_object(Bucket=bucket, Key=key)
+    client.delete_objects(
+        Bucket=bucket,
+        Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+    )
+
+
+def queue_avatar_deletion(object_keys):
+    """Delete replaced avatar objects off the request path.
+
+    Best effort, like every background task: a lost deletion only leaves an
+    unreferenced object behind.
+    """
+
+    keys = [key for key in object_keys if (key or "").strip()]
+    if keys:
+        submit_background_task("avatar_delete", delete_avatar_objects, keys)
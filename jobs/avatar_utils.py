@@ -13,6 +13,10 @@ AVATAR_ALLOWED_CONTENT_TYPES = {
     "image/webp",
 }
 AVATAR_ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+AVATAR_VARIANT_SIZES = (64, 128, 512)
+# Processed avatars live in their own folder with one file per size and
+# format; avatar_key points at the 512px JPEG/PNG fallback.
+_AVATAR_VARIANT_KEY_RE = re.compile(r"^(?P<prefix>.+/avatar/[0-9a-f]{32})/512(?P<ext>\.jpg|\.png)$")
 
 
 def avatar_public_url(avatar_key: str) -> str:
@@ -26,6 +30,29 @@ def avatar_public_url(avatar_key: str) -> str:
     return f"{base}/{key}"
 
 
+def avatar_srcset(avatar_key: str) -> str:
+    """WebP srcset for processed avatars; empty for legacy single-file keys."""
+
+    match = _AVATAR_VARIANT_KEY_RE.match((avatar_key or "").strip().lstrip("/"))
+    if not match or not avatar_public_url(avatar_key):
+        return ""
+    prefix = match.group("prefix")
+    return ", ".join(
+        f"{avatar_public_url(f'{prefix}/{size}.webp')} {size}w" for size in AVATAR_VARIANT_SIZES
+    )
+
+
+def avatar_object_keys(avatar_key: str) -> list:
+    """Every stored object behind avatar_key, for cleanup."""
+
+    key = (avatar_key or "").strip().lstrip("/")
+    match = _AVATAR_VARIANT_KEY_RE.match(key)
+    if not match:
+        return [key] if key else []
+    prefix, ext = match.group("prefix"), match.group("ext")
+    return [f"{prefix}/{size}{suffix}" for size in AVATAR_VARIANT_SIZES for suffix in (".webp", ext)]
+
+
 def sanitize_avatar_filename(filename: str) -> str:
     src = (filename or "").strip()
     ext = os.path.splitext(src)[1].lower()
@@ -44,15 +71,18 @@ def is_avatar_extension_allowed(filename: str) -> bool:
     return ext in AVATAR_ALLOWED_EXTENSIONS
 
 
-def build_avatar_object_key(*, user_id: int, filename: str) -> str:
-    safe_name = sanitize_avatar_filename(filename)
-    prefix = f"users/{int(user_id)}/avatar"
-    return re.sub(r"/+", "/", f"{prefix}/{safe_name}")
+def build_avatar_variant_prefix(*, user_id: int) -> str:
+    return f"users/{int(user_id)}/avatar/{uuid.uuid4().hex}"
+
 
+def read_avatar_upload(uploaded_file) -> bytes:
+    """Validate an upload cheaply in the request and return its bytes.
 
-def process_avatar_image(uploaded_file):
+    Only the header is parsed here; the full decode happens in
+    render_avatar_variants on a background worker.
+    """
     # Lazy PIL import to keep app startup resilient before deps are installed.
-    from PIL import Image, ImageOps, UnidentifiedImageError  # type: ignore
+    from PIL import Image, UnidentifiedImageError  # type: ignore
 
     if uploaded_file is None:
         raise ValueError("avatar_required")
@@ -61,7 +91,7 @@ def process_avatar_image(uploaded_file):
         raise ValueError("avatar_too_large")
 
     # Some mobile galleries send generic/incorrect MIME or uncommon extensions
-    # (e.g. jfif, heic). Validate by actual decode instead of metadata only.
+    # (e.g. jfif, heic). Validate by actual content instead of metadata only.
 
     raw = uploaded_file.read()
     if not raw:
@@ -71,30 +101,52 @@ def process_avatar_image(uploaded_file):
 
     try:
         with Image.open(BytesIO(raw)) as src:
-            src_format = (src.format or "").upper()
+            src.verify()
+    except (UnidentifiedImageError, Image.DecompressionBombError, SyntaxError, OSError) as exc:
+        raise ValueError("avatar_invalid_image") from exc
+    return raw
+
+
+def render_avatar_variants(raw: bytes):
+    """Square-crop raw into every AVATAR_VARIANT_SIZES size.
+
+    Returns ([(file_name, payload, content_type)], fallback_ext). Each size
+    is written as WebP plus a JPEG fallback, or PNG when the source has
+    transparency.
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError  # type: ignore
+
+    try:
+        resample = Image.Resampling.LANCZOS
+    except Exception:
+        resample = Image.LANCZOS
+    largest = max(AVATAR_VARIANT_SIZES)
+
+    try:
+        with Image.open(BytesIO(raw)) as src:
+            # JPEG can decode straight to a reduced scale (1/2 .. 1/8), which
+            # skips most of the IDCT work for large phone photos.
+            src.draft("RGB", (largest, largest))
             img = ImageOps.exif_transpose(src)
-            try:
-                resample = Image.Resampling.LANCZOS
-            except Exception:
-                resample = Image.LANCZOS
-            img = ImageOps.fit(img, (512, 512), method=resample, centering=(0.5, 0.5))
-
-            out = BytesIO()
-            if src_format in {"PNG", "WEBP"}:
-                if src_format == "PNG":
-                    if img.mode not in {"RGBA", "LA"}:
-                        img = img.convert("RGBA")
-                    img.save(out, format="PNG", optimize=True)
-                    return out.getvalue(), "image/png", ".png"
-
-                if img.mode not in {"RGB", "RGBA"}:
-                    img = img.convert("RGBA")
-                img.save(out, format="WEBP", quality=88, method=6)
-                return out.getvalue(), "image/webp", ".webp"
-
-            if img.mode != "RGB":
-                img = img.convert("RGB")
-            img.save(out, format="JPEG", quality=88, optimize=True, progressive=True)
-            return out.getvalue(), "image/jpeg", ".jpg"
+            has_alpha = img.mode in {"RGBA", "LA", "PA"} or (img.mode == "P" and "transparency" in img.info)
+            img = img.convert("RGBA" if has_alpha else "RGB")
+            img = ImageOps.fit(img, (largest, largest), method=resample, centering=(0.5, 0.5))
     except UnidentifiedImageError as exc:
         raise ValueError("avatar_invalid_image") from exc
+
+    fallback_ext = ".png" if has_alpha else ".jpg"
+    variants = []
+    for size in sorted(AVATAR_VARIANT_SIZES, reverse=True):
+        if img.size != (size, size):
+            img = img.resize((size, size), resample=resample)
+        out = BytesIO()
+        img.save(out, format="WEBP", quality=85, method=4)
+        variants.append((f"{size}.webp", out.getvalue(), "image/webp"))
+        out = BytesIO()
+        if has_alpha:
+            img.save(out, format="PNG", optimize=True)
+            variants.append((f"{size}.png", out.getvalue(), "image/png"))
+        else:
+            img.save(out, format="JPEG", quality=88, optimize=True, progressive=True)
+            variants.append((f"{size}.jpg", out.getvalue(), "image/jpeg"))
+    return variants, fallback_ext
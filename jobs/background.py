@@ -0,0 +1,55 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _background_executor():
+    global _executor
+    if _executor is not None:
+        return _executor
+
+    with _executor_lock:
+        if _executor is None:
+            workers = max(1, int(getattr(settings, "BACKGROUND_TASK_WORKERS", 4) or 1))
+            _executor = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix="jobhub-bg",
+            )
+        return _executor
+
+
+def _run_task(name, func, args, kwargs):
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    except Exception as exc:
+        print(f"[BACKGROUND-TASK-ERROR] task={name}: {exc}")
+        return None
+    finally:
+        # Worker threads keep their own connection; never leave it open
+        # between tasks or it outlives CONN_MAX_AGE unnoticed.
+        close_old_connections()
+
+
+def submit_background_task(name, func, *args, **kwargs):
+    """Run func outside the request thread.
+
+    Tasks are best effort: they run in a small per-process thread pool and are
+    lost if the worker process dies. With BACKGROUND_TASKS_ASYNC disabled the
+    task runs inline, which is what tests and management commands want.
+    """
+
+    if not getattr(settings, "BACKGROUND_TASKS_ASYNC", True):
+        try:
+            return func(*args, **kwargs)
+        except Exception as exc:
+            print(f"[BACKGROUND-TASK-ERROR] task={name}: {exc}")
+            return None
+
+    return _background_executor().submit(_run_task, name, func, args, kwargs)
@@ -113,6 +113,10 @@ def authorization_payload_for_employer(employer):
     authorization = EmployerBoardPublishingAuthorization.objects.filter(
         employer=employer
     ).first()
+    return authorization_payload(authorization)
+
+
+def authorization_payload(authorization):
     if not authorization:
         return {"status": "none", "has_pending_request": False}
 
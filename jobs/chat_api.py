@@ -1,15 +1,19 @@
-from datetime import timedelta
+import heapq
+from datetime import datetime, timedelta, timezone as dt_timezone
 
 from django.contrib.auth.models import User
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError, connection, transaction
 from django.db.models import Q
 from django.utils import timezone
 from rest_framework import permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from .avatar_utils import avatar_public_url
+from .avatar_utils import avatar_public_url, avatar_srcset
+from .background import submit_background_task
+from .chat_archive import chat_history_page
 from .chat_notifications import notify_user_about_chat_message
+from .chat_search import CHAT_SEARCH_MIN_QUERY_LENGTH, search_chat_messages
 from .models import ChatConversation, ChatMessage, ChatReport, UserBlock, UserProfile, Vacancy
 from .serializers import (
     ChatMessageCreateSerializer,
@@ -38,6 +42,11 @@ def _user_avatar_url(user):
     return avatar_public_url(getattr(profile, "avatar_key", ""))
 
 
+def _user_avatar_srcset(user):
+    profile = _user_profile(user)
+    return avatar_srcset(getattr(profile, "avatar_key", ""))
+
+
 def _user_is_verified_employer(user):
     profile = _user_profile(user)
     return bool(getattr(profile, "employer_verified", False))
@@ -159,6 +168,7 @@ def _conversation_payload(conversation, viewer, *, unread_count=0, last_message=
             "id": other_user.id if other_user else None,
             "nickname": _user_display_name(other_user) if other_user else "",
             "avatar_url": _user_avatar_url(other_user) if other_user else "",
+            "avatar_srcset": _user_avatar_srcset(other_user) if other_user else "",
             "has_active_vacancies": other_user_has_active_vacancies,
             "is_verified_employer": bool(
                 other_user
@@ -177,6 +187,7 @@ def _conversation_payload(conversation, viewer, *, unread_count=0, last_message=
                 "id": employer.id,
                 "nickname": _user_display_name(employer),
                 "avatar_url": _user_avatar_url(employer),
+                "avatar_srcset": _user_avatar_srcset(employer),
                 "is_verified_employer": _user_is_verified_employer(employer),
             },
             "vacancy": {
@@ -206,6 +217,72 @@ def _conversation_payload(conversation, viewer, *, unread_count=0, last_message=
     }
 
 
+_CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_conversation_cursor(conversation):
+    """Opaque keyset cursor for the (last_message_at, id) list order."""
+
+    delta = conversation.last_message_at - _CURSOR_EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return f"{micros}-{conversation.id}"
+
+
+def decode_conversation_cursor(raw):
+    micros, _, conversation_id = (raw or "").strip().partition("-")
+    try:
+        return _CURSOR_EPOCH + timedelta(microseconds=int(micros)), int(conversation_id)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("invalid_cursor")
+
+
+def conversation_page(user, *, roles=("candidate", "employer"), cursor=None, limit=None):
+    """Return one page of conversations newest first and whether more exist.
+
+    Each role is queried separately so it can walk its own
+    (role, last_message_at) index; the sides are merged with UNION instead of
+    an OR filter that would force a scan of every conversation.
+    """
+
+    limit = limit or CHAT_PAGE_SIZE
+    sides = []
+    for role in roles:
+        side = ChatConversation.objects.filter(**{role: user}, last_message_at__isnull=False)
+        if cursor is not None:
+            last_message_at, conversation_id = cursor
+            side = side.filter(
+                Q(last_message_at__lt=last_message_at)
+                | Q(last_message_at=last_message_at, id__lt=conversation_id)
+            )
+        sides.append(
+            side.order_by("-last_message_at", "-id").values_list("id", "last_message_at")[: limit + 1]
+        )
+
+    if len(sides) == 1:
+        rows = list(sides[0])
+    elif connection.features.supports_slicing_ordering_in_compound:
+        # A user is never on both sides of one conversation, so UNION ALL
+        # needs no de-duplication.
+        merged = sides[0].union(*sides[1:], all=True)
+        rows = list(merged.order_by("-last_message_at", "-id")[: limit + 1])
+    else:
+        # SQLite cannot LIMIT inside a compound SELECT; merge the already
+        # sorted sides here instead.
+        rows = list(
+            heapq.merge(*[list(side) for side in sides], key=lambda row: (row[1], row[0]), reverse=True)
+        )[: limit + 1]
+    has_more = len(rows) > limit
+    conversation_ids = [row[0] for row in rows[:limit]]
+    by_id = ChatConversation.objects.select_related(
+        "candidate",
+        "candidate__profile",
+        "employer",
+        "employer__profile",
+        "initial_vacancy",
+    ).in_bulk(conversation_ids)
+    return [by_id[conversation_id] for conversation_id in conversation_ids if conversation_id in by_id], has_more
+
+
 def _latest_messages_by_conversation(conversations):
     conversation_ids = [conversation.id for conversation in conversations]
     if not conversation_ids:
@@ -298,20 +375,15 @@ class ChatConversationListAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        conversations = list(
-            ChatConversation.objects.filter(
-                Q(candidate=request.user) | Q(employer=request.user),
-                last_message_at__isnull=False,
-            )
-            .select_related(
-                "candidate",
-                "candidate__profile",
-                "employer",
-                "employer__profile",
-                "initial_vacancy",
-            )
-            .order_by("-last_message_at", "-id")[:CHAT_PAGE_SIZE]
-        )
+        cursor = None
+        raw_cursor = request.query_params.get("cursor")
+        if raw_cursor:
+            try:
+                cursor = decode_conversation_cursor(raw_cursor)
+            except ValueError:
+                return Response({"error": "invalid_cursor"}, status=status.HTTP_400_BAD_REQUEST)
+
+        conversations, has_more = conversation_page(request.user, cursor=cursor)
         unread_by_id = _unread_counts(conversations, request.user)
         last_message_by_id = _latest_messages_by_conversation(conversations)
         return Response(
@@ -327,6 +399,12 @@ class ChatConversationListAPIView(APIView):
                     )
                     for conversation in conversations
                 ],
+                "has_more": has_more,
+                "next_cursor": (
+                    encode_conversation_cursor(conversations[-1])
+                    if has_more and conversations
+                    else None
+                ),
             },
             status=status.HTTP_200_OK,
         )
@@ -354,6 +432,57 @@ class ChatUnreadCountAPIView(APIView):
         )
 
 
+def chat_search_hit_payload(hit, viewer):
+    message = hit["message"]
+    conversation = message.conversation
+    other_user = conversation.other_user_for(viewer)
+    return {
+        "conversation": {
+            "id": conversation.id,
+            "other_user": {
+                "id": other_user.id if other_user else None,
+                "nickname": _user_display_name(other_user) if other_user else "",
+                "avatar_url": _user_avatar_url(other_user) if other_user else "",
+                "avatar_srcset": _user_avatar_srcset(other_user) if other_user else "",
+            },
+            "initial_vacancy_title": conversation.initial_vacancy_title,
+        },
+        "message": {
+            "id": message.id,
+            "snippet": hit["snippet"],
+            "highlights": hit["highlights"],
+            "created_at": message.created_at,
+            "sender_id": message.sender_id,
+            "is_mine": message.sender_id == viewer.id,
+        },
+    }
+
+
+class ChatSearchAPIView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        query = (request.query_params.get("q") or "").strip()
+        if len(query) < CHAT_SEARCH_MIN_QUERY_LENGTH:
+            return Response({"error": "query_too_short"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            page = max(1, int(request.query_params.get("page") or 1))
+        except (TypeError, ValueError):
+            return Response({"error": "invalid_page"}, status=status.HTTP_400_BAD_REQUEST)
+
+        hits, has_more = search_chat_messages(request.user, query, page=page)
+        return Response(
+            {
+                "query": query,
+                "page": page,
+                "results": [chat_search_hit_payload(hit, request.user) for hit in hits],
+                "has_more": has_more,
+                "next_page": page + 1 if has_more else None,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
 class ChatConversationDetailAPIView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
@@ -371,14 +500,13 @@ class ChatConversationDetailAPIView(APIView):
                 before_message_id = int(before_message_id)
             except (TypeError, ValueError):
                 return Response({"error": "invalid_before_message_id"}, status=status.HTTP_400_BAD_REQUEST)
-            messages_query = messages_query.filter(id__lt=before_message_id)
-
-        newest_first = list(messages_query.order_by("-id")[: CHAT_PAGE_SIZE + 1])
-        has_more = len(newest_first) > CHAT_PAGE_SIZE
-        if has_more:
-            newest_first = newest_first[:CHAT_PAGE_SIZE]
-        messages = newest_first
-        messages.reverse()
+
+        messages, has_more = chat_history_page(
+            conversation,
+            messages_query,
+            before_message_id=before_message_id,
+            page_size=CHAT_PAGE_SIZE,
+        )
         unread_count = _unread_counts([conversation], request.user).get(conversation.id, 0)
         return Response(
             {
@@ -477,6 +605,17 @@ class ChatMessageAPIView(APIView):
 
 
 def _send_chat_push_safe(message, recipient, sender_name):
+    # FCM/APNs latency must never hold up the sender's response.
+    submit_background_task(
+        "chat_push",
+        _deliver_chat_push,
+        message,
+        recipient,
+        sender_name,
+    )
+
+
+def _deliver_chat_push(message, recipient, sender_name):
     try:
         summary = notify_user_about_chat_message(
             message,
@@ -0,0 +1,215 @@
+import json
+import zlib
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Exists, Max, Min, OuterRef
+
+from .models import ChatArchiveSegment, ChatConversation, ChatMessage, ChatReport
+
+
+ARCHIVE_SEGMENT_SIZE = 200
+
+
+def _timestamp(value):
+    return value.isoformat() if value else None
+
+
+def _parse_timestamp(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+def _message_record(message):
+    reply = message.reply_to
+    return {
+        "id": message.id,
+        "sender_id": message.sender_id,
+        "body": message.body,
+        "has_external_links": message.has_external_links,
+        "client_message_id": message.client_message_id,
+        "edited_at": _timestamp(message.edited_at),
+        "deleted_at": _timestamp(message.deleted_at),
+        "created_at": _timestamp(message.created_at),
+        # Replies only point backwards, so the quoted message is archived in
+        # the same run; keep what the reply preview needs inline.
+        "reply_to": (
+            {
+                "id": reply.id,
+                "sender_id": reply.sender_id,
+                "body": reply.body,
+                "deleted_at": _timestamp(reply.deleted_at),
+            }
+            if reply
+            else None
+        ),
+    }
+
+
+def _message_from_record(record, conversation):
+    reply = record.get("reply_to")
+    message = ChatMessage(
+        id=record["id"],
+        conversation=conversation,
+        sender_id=record["sender_id"],
+        body=record.get("body") or "",
+        has_external_links=bool(record.get("has_external_links")),
+        client_message_id=record.get("client_message_id"),
+        edited_at=_parse_timestamp(record.get("edited_at")),
+        deleted_at=_parse_timestamp(record.get("deleted_at")),
+        created_at=_parse_timestamp(record.get("created_at")),
+    )
+    if reply:
+        message.reply_to = ChatMessage(
+            id=reply["id"],
+            conversation=conversation,
+            sender_id=reply["sender_id"],
+            body=reply.get("body") or "",
+            deleted_at=_parse_timestamp(reply.get("deleted_at")),
+        )
+    return message
+
+
+def encode_segment_payload(records):
+    return zlib.compress(json.dumps(records, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_segment_payload(payload):
+    return json.loads(zlib.decompress(bytes(payload)).decode("utf-8"))
+
+
+def _archivable_upper_id(conversation, *, older_than):
+    """Highest message id that can leave the hot table, or None.
+
+    The newest message always stays hot (it drives the conversation list),
+    and so does anything a participant has not read yet, anything under a
+    chat report, and anything a still-hot message replies to.
+    """
+
+    read_marks = [conversation.candidate_last_read_at, conversation.employer_last_read_at]
+    if any(mark is None for mark in read_marks):
+        return None
+    read_by_both_at = min(read_marks)
+
+    hot = ChatMessage.objects.filter(conversation=conversation)
+    newest_id = hot.aggregate(newest_id=Max("id"))["newest_id"]
+    if newest_id is None:
+        return None
+    upper_id = (
+        hot.filter(created_at__lt=older_than, created_at__lte=read_by_both_at, id__lt=newest_id)
+        .aggregate(upper_id=Max("id"))["upper_id"]
+    )
+    if upper_id is None:
+        return None
+
+    reported_id = (
+        ChatReport.objects.filter(conversation=conversation, reported_message_id__lte=upper_id)
+        .aggregate(reported_id=Min("reported_message_id"))["reported_id"]
+    )
+    if reported_id is not None:
+        upper_id = reported_id - 1
+
+    while upper_id and upper_id > 0:
+        quoted_id = (
+            hot.filter(id__gt=upper_id, reply_to_id__lte=upper_id)
+            .aggregate(quoted_id=Min("reply_to_id"))["quoted_id"]
+        )
+        if quoted_id is None:
+            break
+        upper_id = quoted_id - 1
+    return upper_id if upper_id and upper_id > 0 else None
+
+
+def archive_conversation_history(conversation, *, older_than, segment_size=ARCHIVE_SEGMENT_SIZE):
+    """Move the archivable prefix of one conversation into archive segments.
+
+    Returns the number of archived messages.
+    """
+
+    upper_id = _archivable_upper_id(conversation, older_than=older_than)
+    if upper_id is None:
+        return 0
+
+    messages = list(
+        ChatMessage.objects.filter(conversation=conversation, id__lte=upper_id)
+        .select_related("reply_to")
+        .order_by("id")
+    )
+    if not messages:
+        return 0
+
+    with transaction.atomic():
+        segments = []
+        for start in range(0, len(messages), segment_size):
+            chunk = messages[start : start + segment_size]
+            segments.append(
+                ChatArchiveSegment(
+                    conversation=conversation,
+                    first_message_id=chunk[0].id,
+                    last_message_id=chunk[-1].id,
+                    first_created_at=chunk[0].created_at,
+                    last_created_at=chunk[-1].created_at,
+                    message_count=len(chunk),
+                    payload=encode_segment_payload([_message_record(message) for message in chunk]),
+                )
+            )
+        ChatArchiveSegment.objects.bulk_create(segments)
+        ChatMessage.objects.filter(conversation=conversation, id__lte=upper_id).delete()
+    return len(messages)
+
+
+def idle_conversations(*, idle_since, older_than):
+    """Idle conversations that still keep messages older than older_than hot."""
+
+    old_messages = ChatMessage.objects.filter(
+        conversation_id=OuterRef("pk"),
+        created_at__lt=older_than,
+    )
+    return (
+        ChatConversation.objects.filter(last_message_at__lt=idle_since)
+        .filter(Exists(old_messages))
+        .order_by("id")
+    )
+
+
+def archived_messages_before(conversation, *, before_message_id=None, limit=None):
+    """Newest-first archived messages older than before_message_id."""
+
+    segments = ChatArchiveSegment.objects.filter(conversation=conversation)
+    if before_message_id is not None:
+        segments = segments.filter(first_message_id__lt=before_message_id)
+
+    messages = []
+    for segment in segments.order_by("-last_message_id").iterator():
+        records = decode_segment_payload(segment.payload)
+        for record in reversed(records):
+            if before_message_id is not None and record["id"] >= before_message_id:
+                continue
+            messages.append(_message_from_record(record, conversation))
+            if limit is not None and len(messages) >= limit:
+                return messages
+    return messages
+
+
+def chat_history_page(conversation, messages, *, before_message_id=None, page_size):
+    """One page of messages older than before_message_id, oldest first.
+
+    messages is the conversation's hot ChatMessage queryset; the page is
+    topped up from the archive once the hot rows run out. Returns the page
+    and whether older messages exist.
+    """
+
+    if before_message_id:
+        messages = messages.filter(id__lt=before_message_id)
+    newest_first = list(messages.order_by("-id")[: page_size + 1])
+    if len(newest_first) <= page_size:
+        newest_first.extend(
+            archived_messages_before(
+                conversation,
+                before_message_id=newest_first[-1].id if newest_first else before_message_id or None,
+                limit=page_size + 1 - len(newest_first),
+            )
+        )
+    has_more = len(newest_first) > page_size
+    page = newest_first[:page_size]
+    page.reverse()
+    return page, has_more
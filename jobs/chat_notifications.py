@@ -1,4 +1,9 @@
-from .models import PushDevice
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import ChatConversation, PushDevice
 from .push_gateway import send_push_message
 
 
@@ -32,6 +37,55 @@ def _notification_body(message_text):
     return f"{text[:99].rstrip()}…"
 
 
+def chat_push_collapse_key(conversation_id):
+    return f"chat-{conversation_id}"
+
+
+def _coalesce_cache_key(conversation_id, recipient_id):
+    return f"chat-push:{conversation_id}:{recipient_id}"
+
+
+def _recipient_last_read_at(conversation_id, recipient_id):
+    row = (
+        ChatConversation.objects.filter(id=conversation_id)
+        .values("candidate_id", "candidate_last_read_at", "employer_last_read_at")
+        .first()
+    )
+    if not row:
+        return None
+    if row["candidate_id"] == recipient_id:
+        return row["candidate_last_read_at"]
+    return row["employer_last_read_at"]
+
+
+def _claim_push_slot(message, recipient):
+    """Return "new" or "replace" for how this message is pushed.
+
+    A push opens a CHAT_PUSH_COALESCE_SECONDS window for the conversation.
+    Every later message inside it is pushed as a silent replacement under the
+    same collapse id, so the device always shows the latest text but only
+    alerts once per window. Reading the chat closes the window. Windows live
+    in the default cache, so they are shared by workers only with a shared
+    CACHE_BACKEND (redis or database).
+    """
+
+    window = int(getattr(settings, "CHAT_PUSH_COALESCE_SECONDS", 0) or 0)
+    if window <= 0:
+        return "new"
+
+    key = _coalesce_cache_key(message.conversation_id, recipient.id)
+    pushed_at = message.created_at.isoformat()
+    if cache.add(key, pushed_at, timeout=window):
+        return "new"
+
+    previous = cache.get(key)
+    last_read_at = _recipient_last_read_at(message.conversation_id, recipient.id)
+    if not previous or (last_read_at and last_read_at >= datetime.fromisoformat(previous)):
+        cache.set(key, pushed_at, timeout=window)
+        return "new"
+    return "replace"
+
+
 def notify_user_about_chat_message(message, *, recipient, sender_name):
     """Send a new-message notification to every active device of the recipient."""
 
@@ -39,9 +93,14 @@ def notify_user_about_chat_message(message, *, recipient, sender_name):
         "devices": 0,
         "sent": 0,
         "failed": 0,
+        "replaced": 0,
         "skipped_not_configured": 0,
         "skipped_no_device": 0,
     }
+    slot = _claim_push_slot(message, recipient)
+    if slot == "replace":
+        summary["replaced"] = 1
+
     devices = list(
         PushDevice.objects.filter(user=recipient, is_active=True).order_by(
             "-last_seen_at", "-id"
@@ -62,7 +121,10 @@ def notify_user_about_chat_message(message, *, recipient, sender_name):
                 "type": "chat_message",
                 "conversation_id": message.conversation_id,
                 "message_id": message.id,
+                "replaces_previous": "1" if slot == "replace" else "0",
             },
+            collapse_key=chat_push_collapse_key(message.conversation_id),
+            silent=slot == "replace",
         )
         if push_status == "sent":
             summary["sent"] += 1
@@ -0,0 +1,188 @@
+import re
+
+from django.db import connection
+
+from .models import ChatConversation, ChatMessage, UserBlock
+from .text_filters import normalize_search_text
+
+
+CHAT_SEARCH_PAGE_SIZE = 20
+CHAT_SEARCH_MIN_QUERY_LENGTH = 2
+CHAT_SEARCH_MAX_TERMS = 8
+SNIPPET_RADIUS = 60
+
+_TERM_RE = re.compile(r"\w+")
+
+
+def search_terms(query):
+    terms = []
+    for term in _TERM_RE.findall(normalize_search_text(query)):
+        if term not in terms:
+            terms.append(term)
+    return terms[:CHAT_SEARCH_MAX_TERMS]
+
+
+def searchable_conversations(user, *, roles=("candidate", "employer")):
+    """Map conversation id -> other participant id for chats the user may search.
+
+    Conversations with a block in either direction are left out, so blocked
+    people never resurface through search results.
+    """
+
+    blocked_user_ids = set(
+        UserBlock.objects.filter(blocker=user).values_list("blocked_user_id", flat=True)
+    ) | set(UserBlock.objects.filter(blocked_user=user).values_list("blocker_id", flat=True))
+
+    other_by_conversation = {}
+    if "candidate" in roles:
+        other_by_conversation.update(
+            ChatConversation.objects.filter(candidate=user).values_list("id", "employer_id")
+        )
+    if "employer" in roles:
+        other_by_conversation.update(
+            ChatConversation.objects.filter(employer=user).values_list("id", "candidate_id")
+        )
+    return {
+        conversation_id: other_user_id
+        for conversation_id, other_user_id in other_by_conversation.items()
+        if other_user_id not in blocked_user_ids
+    }
+
+
+def _sqlite_fts_available():
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'jobs_chatmessage_fts'"
+        )
+        return cursor.fetchone() is not None
+
+
+def _ranked_message_ids(conversation_ids, terms, *, offset, limit):
+    placeholders = ", ".join(["%s"] * len(conversation_ids))
+
+    if connection.vendor == "postgresql":
+        ts_query = " & ".join(f"{term}:*" for term in terms)
+        sql = f"""
+            SELECT id FROM jobs_chatmessage
+            WHERE deleted_at IS NULL
+              AND conversation_id IN ({placeholders})
+              AND to_tsvector('simple', search_text) @@ to_tsquery('simple', %s)
+            ORDER BY ts_rank(to_tsvector('simple', search_text), to_tsquery('simple', %s)) DESC, id DESC
+            LIMIT %s OFFSET %s
+        """
+        params = [*conversation_ids, ts_query, ts_query, limit, offset]
+    elif connection.vendor == "sqlite" and _sqlite_fts_available():
+        match_query = " ".join(f'"{term}"*' for term in terms)
+        sql = f"""
+            SELECT jobs_chatmessage.id FROM jobs_chatmessage_fts
+            JOIN jobs_chatmessage ON jobs_chatmessage.id = jobs_chatmessage_fts.rowid
+            WHERE jobs_chatmessage_fts MATCH %s
+              AND jobs_chatmessage.deleted_at IS NULL
+              AND jobs_chatmessage.conversation_id IN ({placeholders})
+            ORDER BY jobs_chatmessage_fts.rank, jobs_chatmessage.id DESC
+            LIMIT %s OFFSET %s
+        """
+        params = [match_query, *conversation_ids, limit, offset]
+    else:
+        # No full-text index on this backend: stay inside the user's own
+        # conversations (conversation_id index) and rank by recency.
+        queryset = ChatMessage.objects.filter(
+            conversation_id__in=conversation_ids,
+            deleted_at__isnull=True,
+        )
+        for term in terms:
+            queryset = queryset.filter(search_text__contains=term)
+        return list(queryset.order_by("-id").values_list("id", flat=True)[offset : offset + limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def build_snippet(body, terms, *, radius=SNIPPET_RADIUS):
+    """Cut a window of body around the first match and locate every match in it.
+
+    Matching runs on the folded text, but offsets point into the original
+    body, so the client can highlight the text exactly as it was written.
+    """
+
+    body = body or ""
+    folded_chars = []
+    original_index = []
+    for index, char in enumerate(body):
+        folded = normalize_search_text(char) if not char.isspace() else " "
+        for folded_char in folded or "":
+            folded_chars.append(folded_char)
+            original_index.append(index)
+    folded_text = "".join(folded_chars)
+
+    matches = []
+    for term in terms:
+        for match in re.finditer(re.escape(term), folded_text):
+            start = original_index[match.start()]
+            end = original_index[match.end() - 1] + 1
+            matches.append((start, end))
+    matches.sort()
+
+    anchor = matches[0][0] if matches else 0
+    start = max(0, anchor - radius)
+    end = min(len(body), anchor + radius * 2)
+    snippet = body[start:end]
+    highlights = [
+        [match_start - start, match_end - start]
+        for match_start, match_end in matches
+        if match_start >= start and match_end <= end
+    ]
+    if start > 0:
+        snippet = f"…{snippet}"
+        highlights = [[left + 1, right + 1] for left, right in highlights]
+    if end < len(body):
+        snippet = f"{snippet}…"
+    return snippet, highlights
+
+
+def search_chat_messages(
+    user,
+    query,
+    *,
+    page=1,
+    page_size=CHAT_SEARCH_PAGE_SIZE,
+    roles=("candidate", "employer"),
+):
+    """Return ranked message hits across the user's conversations.
+
+    The result holds at most page_size hits and a has_more flag. Only the
+    full-text index and the user's conversation ids are touched; the
+    message table itself is read for the hits on this page only.
+    """
+
+    terms = search_terms(query)
+    other_by_conversation = searchable_conversations(user, roles=roles) if terms else {}
+    if not terms or not other_by_conversation:
+        return [], False
+
+    page = max(1, int(page))
+    message_ids = _ranked_message_ids(
+        list(other_by_conversation),
+        terms,
+        offset=(page - 1) * page_size,
+        limit=page_size + 1,
+    )
+    has_more = len(message_ids) > page_size
+    message_ids = message_ids[:page_size]
+    messages_by_id = ChatMessage.objects.select_related(
+        "conversation",
+        "conversation__candidate",
+        "conversation__candidate__profile",
+        "conversation__employer",
+        "conversation__employer__profile",
+    ).in_bulk(message_ids)
+
+    hits = []
+    for message_id in message_ids:
+        message = messages_by_id.get(message_id)
+        if message is None:
+            continue
+        snippet, highlights = build_snippet(message.body, terms)
+        hits.append({"message": message, "snippet": snippet, "highlights": highlights})
+    return hits, has_more
@@ -1,14 +1,23 @@
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import timedelta
 from decimal import Decimal, ROUND_HALF_UP
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
 from django.db.models import Count, Max, Q, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
 from .models import (
     EconomyConfig,
     PurchaseRecord,
+    StoreProduct,
     UnlockedContact,
     UserMonetizationProfile,
     UserWallet,
@@ -41,19 +50,109 @@ def rewarded_ads_enabled():
     return bool(getattr(settings, "REWARDED_ADS_ENABLED", False))
 
 
+ECONOMY_CATALOG_VERSION_KEY = "economy-catalog:version"
+
+# (version, config, active products, loaded at) for this process. Rows handed
+# out from here are shared between threads and must be treated as read-only.
+# The version key only reaches other workers through a shared CACHE_BACKEND;
+# with the per-process locmem cache each copy is still reloaded after
+# ECONOMY_CATALOG_LOCAL_SECONDS, so admin changes show up everywhere within it.
+_economy_catalog = (None, None, (), 0.0)
+_economy_catalog_lock = threading.Lock()
+_request_catalog_version = ContextVar("economy_catalog_version", default=None)
+
+
+def _economy_catalog_version():
+    version = _request_catalog_version.get()
+    if version is not None:
+        return version
+
+    version = cache.get(ECONOMY_CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(ECONOMY_CATALOG_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        version = cache.get(ECONOMY_CATALOG_VERSION_KEY) or ""
+    return version
+
+
+def _economy_catalog_fresh(cached_version, config, loaded_at, version):
+    max_age = int(getattr(settings, "ECONOMY_CATALOG_LOCAL_SECONDS", 30) or 0)
+    return (
+        config is not None
+        and cached_version == version
+        and time.monotonic() - loaded_at < max_age
+    )
+
+
+def _load_economy_catalog():
+    global _economy_catalog
+    version = _economy_catalog_version()
+    cached_version, config, products, loaded_at = _economy_catalog
+    if _economy_catalog_fresh(cached_version, config, loaded_at, version):
+        return config, products
+
+    with _economy_catalog_lock:
+        cached_version, config, products, loaded_at = _economy_catalog
+        if _economy_catalog_fresh(cached_version, config, loaded_at, version):
+            return config, products
+        config, _ = EconomyConfig.objects.get_or_create(singleton_key=1)
+        products = tuple(StoreProduct.objects.filter(is_active=True).order_by("sort_order", "id"))
+        _economy_catalog = (version, config, products, time.monotonic())
+    return config, products
+
+
+@contextmanager
+def economy_catalog_request_scope():
+    """Read the shared catalog version once for the whole request."""
+
+    token = _request_catalog_version.set(None)
+    _request_catalog_version.set(_economy_catalog_version())
+    try:
+        yield
+    finally:
+        _request_catalog_version.reset(token)
+
+
+def invalidate_economy_catalog():
+    global _economy_catalog
+    with _economy_catalog_lock:
+        _economy_catalog = (None, None, (), 0.0)
+    _request_catalog_version.set(None)
+    # Other processes only see the new version once the change is committed,
+    # otherwise they could cache the old rows under it.
+    transaction.on_commit(
+        lambda: cache.set(ECONOMY_CATALOG_VERSION_KEY, uuid.uuid4().hex, timeout=None)
+    )
+
+
+@receiver(post_save, sender=EconomyConfig)
+@receiver(post_delete, sender=EconomyConfig)
+@receiver(post_save, sender=StoreProduct)
+@receiver(post_delete, sender=StoreProduct)
+def _invalidate_economy_catalog_on_change(sender, **kwargs):
+    invalidate_economy_catalog()
+
+
 def get_economy_config():
-    config, _ = EconomyConfig.objects.get_or_create(singleton_key=1)
-    return config
+    return _load_economy_catalog()[0]
 
 
-def get_or_create_wallet(user):
-    wallet, _ = UserWallet.objects.get_or_create(user=user)
-    return wallet
+def get_active_store_products():
+    return _load_economy_catalog()[1]
 
 
-def get_or_create_monetization_profile(user):
-    profile, _ = UserMonetizationProfile.objects.get_or_create(user=user)
-    return profile
+def get_active_store_product(code):
+    for product in get_active_store_products():
+        if product.code == code:
+            return product
+    return None
+
+
+def get_wallet(user):
+    return UserWallet.objects.get(user=user)
+
+
+def get_monetization_profile(user):
+    return UserMonetizationProfile.objects.get(user=user)
 
 
 def get_or_create_contact_policy(vacancy):
@@ -248,6 +347,7 @@ def spend_credits(
     note="",
     related_vacancy=None,
     metadata=None,
+    unlock_method="",
 ):
     amount = _credit_decimal(amount)
     if amount <= ZERO_CREDITS:
@@ -276,12 +376,12 @@ def spend_credits(
         balance_bonus_after=wallet.bonus_credits,
         note=(note or "").strip(),
         related_vacancy=related_vacancy,
+        unlock_method=unlock_method,
         metadata=metadata or {},
     )
     return wallet, tx
 
 
-@transaction.atomic
 def record_wallet_event(
     user,
     *,
@@ -289,10 +389,20 @@ def record_wallet_event(
     note="",
     related_vacancy=None,
     metadata=None,
+    unlock_method="",
 ):
-    wallet = UserWallet.objects.select_for_update().filter(user=user).first()
-    if wallet is None:
-        wallet = UserWallet.objects.create(user=user)
+    """Append an audit-only ledger row that does not change the balance.
+
+    Ledger writes come in two kinds. Balance-mutating ones (grant_credits,
+    spend_credits, set_wallet_balances) lock the wallet row, so they are
+    applied one at a time per wallet and their balance_*_after follows the
+    ledger order exactly. Audit-only events take no wallet lock: any number of
+    them can be written for the same user at once, and they never wait on a
+    purchase or a spend. Their balance_*_after is a snapshot of the last
+    committed balance, which may already be stale when the row is inserted.
+    """
+
+    wallet = UserWallet.objects.get(user=user)
 
     tx = WalletTransaction.objects.create(
         user=user,
@@ -304,6 +414,7 @@ def record_wallet_event(
         balance_bonus_after=wallet.bonus_credits,
         note=(note or "").strip(),
         related_vacancy=related_vacancy,
+        unlock_method=unlock_method,
         metadata=metadata or {},
     )
     return wallet, tx
@@ -615,26 +726,20 @@ def _contact_unlock_campaign_started_at(policy):
     )
 
 
-def get_vacancy_contact_unlock_stats(vacancy, *, policy=None):
-    policy = policy or getattr(vacancy, "contact_access_policy", None)
-    campaign_started_at = _contact_unlock_campaign_started_at(policy)
-    tx_qs = WalletTransaction.objects.filter(
-        kind="contact_unlock",
-        related_vacancy=vacancy,
-    )
-    if campaign_started_at is not None:
-        tx_qs = tx_qs.filter(created_at__gte=campaign_started_at)
+def _contact_unlock_stats_aggregates():
+    return {
+        "total_unlocks": Count("id"),
+        "paid_unlocks": Count("id", filter=Q(unlock_method="credits")),
+        "ad_unlocks": Count("id", filter=Q(unlock_method="ad")),
+        "subscription_unlocks": Count("id", filter=Q(unlock_method="subscription")),
+        "unique_users": Count("user", distinct=True),
+        "paid_spent": Sum("delta_paid_credits", filter=Q(unlock_method="credits")),
+        "bonus_spent": Sum("delta_bonus_credits", filter=Q(unlock_method="credits")),
+        "last_opened_at": Max("created_at"),
+    }
 
-    aggregate = tx_qs.aggregate(
-        total_unlocks=Count("id"),
-        paid_unlocks=Count("id", filter=Q(metadata__method="credits")),
-        ad_unlocks=Count("id", filter=Q(metadata__method="ad")),
-        subscription_unlocks=Count("id", filter=Q(metadata__method="subscription")),
-        unique_users=Count("user", distinct=True),
-        paid_spent=Sum("delta_paid_credits", filter=Q(metadata__method="credits")),
-        bonus_spent=Sum("delta_bonus_credits", filter=Q(metadata__method="credits")),
-        last_opened_at=Max("created_at"),
-    )
+
+def _contact_unlock_stats_payload(aggregate, *, campaign_started_at):
     paid_spent = _credit_decimal(aggregate.get("paid_spent") or ZERO_CREDITS)
     bonus_spent = _credit_decimal(aggregate.get("bonus_spent") or ZERO_CREDITS)
     return {
@@ -649,10 +754,58 @@ def get_vacancy_contact_unlock_stats(vacancy, *, policy=None):
     }
 
 
-def _contact_unlock_mode_state(vacancy, *, policy=None, now=None):
+def get_vacancy_contact_unlock_stats(vacancy, *, policy=None):
+    policy = policy or getattr(vacancy, "contact_access_policy", None)
+    campaign_started_at = _contact_unlock_campaign_started_at(policy)
+    tx_qs = WalletTransaction.objects.filter(
+        kind="contact_unlock",
+        related_vacancy=vacancy,
+    )
+    if campaign_started_at is not None:
+        tx_qs = tx_qs.filter(created_at__gte=campaign_started_at)
+
+    aggregate = tx_qs.aggregate(**_contact_unlock_stats_aggregates())
+    return _contact_unlock_stats_payload(aggregate, campaign_started_at=campaign_started_at)
+
+
+def get_contact_unlock_stats_for_policies(policies):
+    """Unlock stats for many vacancies from one grouped query.
+
+    Every policy has set_at, so the campaign start is always known and can be
+    compared per row in SQL.
+    """
+
+    policies = list(policies)
+    if not policies:
+        return {}
+    campaign_filter = Q()
+    for policy in policies:
+        campaign_filter |= Q(
+            related_vacancy_id=policy.vacancy_id,
+            created_at__gte=_contact_unlock_campaign_started_at(policy),
+        )
+    rows = (
+        WalletTransaction.objects.filter(kind="contact_unlock")
+        .filter(campaign_filter)
+        .values("related_vacancy_id")
+        .annotate(**_contact_unlock_stats_aggregates())
+        .order_by()
+    )
+    aggregates = {row["related_vacancy_id"]: row for row in rows}
+    return {
+        policy.vacancy_id: _contact_unlock_stats_payload(
+            aggregates.get(policy.vacancy_id, {}),
+            campaign_started_at=_contact_unlock_campaign_started_at(policy),
+        )
+        for policy in policies
+    }
+
+
+def _contact_unlock_mode_state(vacancy, *, policy=None, now=None, stats=None):
     current_time = now or timezone.now()
     policy = policy or get_or_create_contact_policy(vacancy)
-    stats = get_vacancy_contact_unlock_stats(vacancy, policy=policy)
+    if stats is None:
+        stats = get_vacancy_contact_unlock_stats(vacancy, policy=policy)
     deadline = policy.paid_window_deadline()
     paid_window_active = bool(deadline and current_time < deadline)
     paid_click_limit = getattr(policy, "contact_unlock_paid_click_limit", None)
@@ -716,8 +869,8 @@ def build_vacancy_submission_state(user, *, flow, now=None):
 
     current_time = now or timezone.now()
     config = get_economy_config()
-    profile = get_or_create_monetization_profile(user)
-    wallet = get_or_create_wallet(user)
+    profile = get_monetization_profile(user)
+    wallet = get_wallet(user)
 
     if flow == "create":
         free_limit = int(config.free_create_ad_submissions_limit or 0)
@@ -857,53 +1010,135 @@ def apply_vacancy_submission_action(
     return refreshed_state, tx
 
 
+def _has_owner_contact_access(user, vacancy):
+    if not getattr(user, "is_authenticated", False):
+        return False
+    return bool(getattr(user, "is_staff", False) or vacancy.created_by_id == getattr(user, "id", None))
+
+
 def build_contact_access_state(user, vacancy, *, now=None):
     current_time = now or timezone.now()
     policy = get_or_create_contact_policy(vacancy)
-    config = get_economy_config()
     mode_state = _contact_unlock_mode_state(vacancy, policy=policy, now=current_time)
+    profile = wallet = unlocked = None
+    if getattr(user, "is_authenticated", False) and not _has_owner_contact_access(user, vacancy):
+        profile = get_monetization_profile(user)
+        wallet = get_wallet(user)
+        unlocked = get_active_unlocked_contact(user, vacancy, now=current_time)
+    return _contact_access_state(
+        user,
+        vacancy,
+        policy=policy,
+        mode_state=mode_state,
+        profile=profile,
+        wallet=wallet,
+        unlocked=unlocked,
+        now=current_time,
+    )
+
+
+def build_contact_access_states(user, vacancies, *, now=None):
+    """build_contact_access_state() for many vacancies with set-based queries.
+
+    Returns a dict keyed by vacancy id.
+    """
+
+    current_time = now or timezone.now()
+    vacancies = {vacancy.id: vacancy for vacancy in vacancies}
+    if not vacancies:
+        return {}
+
+    policies = {
+        policy.vacancy_id: policy
+        for policy in VacancyContactAccessPolicy.objects.filter(vacancy_id__in=vacancies)
+    }
+    missing_ids = [vacancy_id for vacancy_id in vacancies if vacancy_id not in policies]
+    if missing_ids:
+        VacancyContactAccessPolicy.objects.bulk_create(
+            [VacancyContactAccessPolicy(vacancy_id=vacancy_id) for vacancy_id in missing_ids],
+            ignore_conflicts=True,
+        )
+        policies.update(
+            (policy.vacancy_id, policy)
+            for policy in VacancyContactAccessPolicy.objects.filter(vacancy_id__in=missing_ids)
+        )
+    for vacancy_id, policy in policies.items():
+        policy.vacancy = vacancies[vacancy_id]
+
+    stats_by_vacancy = get_contact_unlock_stats_for_policies(policies.values())
+
+    profile = wallet = None
+    unlocked_by_vacancy = {}
+    if getattr(user, "is_authenticated", False):
+        profile = get_monetization_profile(user)
+        wallet = get_wallet(user)
+        unlocked_rows = UnlockedContact.objects.filter(
+            user=user,
+            vacancy_id__in=vacancies,
+        ).order_by("vacancy_id", "-opened_at", "-id")
+        for unlocked in unlocked_rows:
+            unlocked_by_vacancy.setdefault(unlocked.vacancy_id, unlocked)
+
+    states = {}
+    for vacancy_id, vacancy in vacancies.items():
+        policy = policies[vacancy_id]
+        mode_state = _contact_unlock_mode_state(
+            vacancy,
+            policy=policy,
+            now=current_time,
+            stats=stats_by_vacancy[vacancy_id],
+        )
+        states[vacancy_id] = _contact_access_state(
+            user,
+            vacancy,
+            policy=policy,
+            mode_state=mode_state,
+            profile=profile,
+            wallet=wallet,
+            unlocked=_valid_unlocked_contact(unlocked_by_vacancy.get(vacancy_id), now=current_time),
+            now=current_time,
+        )
+    return states
+
+
+def _contact_access_state(user, vacancy, *, policy, mode_state, profile, wallet, unlocked, now):
+    current_time = now
+    config = get_economy_config()
     deadline = mode_state["deadline"]
     paid_window_active = bool(mode_state["paid_window_active"])
     paid_click_limit = mode_state["paid_click_limit"]
     paid_unlocks_count = mode_state["paid_unlocks_count"]
     paid_unlocks_remaining = mode_state["paid_unlocks_remaining"]
     paid_click_limit_reached = bool(mode_state["paid_click_limit_reached"])
-    if getattr(user, "is_authenticated", False):
-        if getattr(user, "is_staff", False) or vacancy.created_by_id == getattr(user, "id", None):
-            return {
-                "vacancy_id": vacancy.id,
-                "is_unlocked": True,
-                "unlocked_until": None,
-                "unlock_source": "owner_free",
-                "contact_access_duration_minutes": int(
-                    getattr(config, "contact_access_duration_minutes", CONTACT_ACCESS_DURATION_MINUTES_DEFAULT)
-                    or CONTACT_ACCESS_DURATION_MINUTES_DEFAULT
-                ),
-                "mode": policy.contact_unlock_mode,
-                "current_action": "already_unlocked",
-                "expected_method": "",
-                "base_price_credits": _credit_json_value(policy.contact_unlock_price_credits or ZERO_CREDITS),
-                "effective_price_credits": _credit_json_value(ZERO_CREDITS),
-                "contact_unlock_timer_hours": policy.contact_unlock_timer_hours,
-                "paid_window_deadline": deadline,
-                "paid_window_is_active": paid_window_active,
-                "paid_unlock_click_limit": paid_click_limit,
-                "paid_unlocks_count": paid_unlocks_count,
-                "paid_unlocks_remaining": paid_unlocks_remaining,
-                "paid_click_limit_reached": paid_click_limit_reached,
-                "can_use_ad": False,
-                "ad_required": False,
-                "has_seeker_subscription": False,
-                "wallet_total_credits": _credit_json_value(ZERO_CREDITS),
-                "can_afford": True,
-            }
-
-    profile = get_or_create_monetization_profile(user) if getattr(user, "is_authenticated", False) else None
-    wallet = get_or_create_wallet(user) if getattr(user, "is_authenticated", False) else None
+    if _has_owner_contact_access(user, vacancy):
+        return {
+            "vacancy_id": vacancy.id,
+            "is_unlocked": True,
+            "unlocked_until": None,
+            "unlock_source": "owner_free",
+            "contact_access_duration_minutes": int(
+                getattr(config, "contact_access_duration_minutes", CONTACT_ACCESS_DURATION_MINUTES_DEFAULT)
+                or CONTACT_ACCESS_DURATION_MINUTES_DEFAULT
+            ),
+            "mode": policy.contact_unlock_mode,
+            "current_action": "already_unlocked",
+            "expected_method": "",
+            "base_price_credits": _credit_json_value(policy.contact_unlock_price_credits or ZERO_CREDITS),
+            "effective_price_credits": _credit_json_value(ZERO_CREDITS),
+            "contact_unlock_timer_hours": policy.contact_unlock_timer_hours,
+            "paid_window_deadline": deadline,
+            "paid_window_is_active": paid_window_active,
+            "paid_unlock_click_limit": paid_click_limit,
+            "paid_unlocks_count": paid_unlocks_count,
+            "paid_unlocks_remaining": paid_unlocks_remaining,
+            "paid_click_limit_reached": paid_click_limit_reached,
+            "can_use_ad": False,
+            "ad_required": False,
+            "has_seeker_subscription": False,
+            "wallet_total_credits": _credit_json_value(ZERO_CREDITS),
+            "can_afford": True,
+        }
 
-    unlocked = None
-    if getattr(user, "is_authenticated", False):
-        unlocked = get_active_unlocked_contact(user, vacancy, now=current_time)
     current_mode = mode_state["current_mode"]
     if current_mode == "ad" and not rewarded_ads_enabled():
         current_mode = "paid"
@@ -1048,6 +1283,7 @@ def unlock_vacancy_contacts(
                 note="Paid contact unlock",
                 related_vacancy=vacancy,
                 metadata=metadata,
+                unlock_method=normalized_method,
             )
         else:
             # Some legacy/imported vacancies still have a zero contact price.
@@ -1059,6 +1295,7 @@ def unlock_vacancy_contacts(
                 note="Free contact unlock",
                 related_vacancy=vacancy,
                 metadata=metadata,
+                unlock_method=normalized_method,
             )
     elif state["current_action"] == "ad":
         should_persist_unlock = False
@@ -1069,6 +1306,7 @@ def unlock_vacancy_contacts(
             note="Rewarded ad contact unlock",
             related_vacancy=vacancy,
             metadata=metadata,
+            unlock_method=normalized_method,
         )
     else:
         config = get_economy_config()
@@ -1084,6 +1322,7 @@ def unlock_vacancy_contacts(
             note="Subscription contact unlock",
             related_vacancy=vacancy,
             metadata=metadata,
+            unlock_method=normalized_method,
         )
 
     unlocked = None
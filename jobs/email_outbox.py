@@ -0,0 +1,165 @@
+"""Email outbox: requests queue mail, a worker delivers it over one SMTP connection.
+
+Scheduled retries are only picked up when something runs deliver_pending_emails:
+the next queued message or `python manage.py deliver_emails` from cron (see
+README).
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .background import submit_background_task
+from .models import OutboundEmail
+
+
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 6
+EMAIL_OUTBOX_RETRY_BASE = timedelta(seconds=30)
+EMAIL_OUTBOX_RETRY_MAX = timedelta(hours=1)
+# A worker that dies mid-batch leaves rows in "sending"; they become due
+# again once this lease runs out.
+EMAIL_OUTBOX_SENDING_LEASE = timedelta(minutes=10)
+# Verification codes (kind "email_code:*") are valid for 10 minutes; a code
+# that could not be delivered by then is useless, so it is not retried.
+EMAIL_CODE_VALIDITY = timedelta(minutes=10)
+
+
+def queue_email(subject, body, recipients, *, kind="", from_email=None):
+    """Store the message and wake the delivery worker after commit."""
+
+    email = OutboundEmail.objects.create(
+        kind=kind,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=list(recipients),
+        subject=subject[:255],
+        body=body,
+    )
+    transaction.on_commit(lambda: submit_background_task("email_outbox", deliver_pending_emails))
+    return email
+
+
+def _retry_delay(attempts):
+    return min(EMAIL_OUTBOX_RETRY_MAX, EMAIL_OUTBOX_RETRY_BASE * (2 ** max(0, attempts - 1)))
+
+
+def _due_emails():
+    return OutboundEmail.objects.filter(Q(status="pending") | Q(status="sending"))
+
+
+def _claim_email(email, now):
+    # The due check is repeated in the UPDATE: without SKIP LOCKED (SQLite)
+    # another worker may have claimed the row since it was read.
+    return _due_emails().filter(pk=email.pk, next_attempt_at__lte=now).update(
+        status="sending",
+        next_attempt_at=now + EMAIL_OUTBOX_SENDING_LEASE,
+    )
+
+
+def _claim_due_emails(now, limit):
+    with transaction.atomic():
+        candidates = list(
+            _due_emails()
+            .select_for_update(skip_locked=True)
+            .filter(next_attempt_at__lte=now)
+            .order_by("next_attempt_at", "id")[:limit]
+        )
+        return [email for email in candidates if _claim_email(email, now)]
+
+
+def _finished_body(email):
+    # Delivered or abandoned codes are not kept readable in the admin.
+    return "" if email.kind.startswith("email_code:") else email.body
+
+
+def _code_expired(email, now):
+    return email.kind.startswith("email_code:") and email.created_at <= now - EMAIL_CODE_VALIDITY
+
+
+def _record_failure(email, exc, now):
+    email.attempts += 1
+    email.last_error = str(exc)[:2000]
+    if email.attempts >= EMAIL_OUTBOX_MAX_ATTEMPTS or _code_expired(email, now):
+        email.status = "failed"
+        email.body = _finished_body(email)
+    else:
+        email.status = "pending"
+        email.next_attempt_at = now + _retry_delay(email.attempts)
+    email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at", "body"])
+    print(
+        f"[EMAIL-OUTBOX-ERROR] email={email.id} kind={email.kind or '-'} "
+        f"attempts={email.attempts} status={email.status}: {exc}"
+    )
+
+
+def deliver_pending_emails(*, limit=EMAIL_OUTBOX_BATCH_SIZE, max_batches=None):
+    """Send due outbox rows in batches, one SMTP connection per batch.
+
+    Failed messages are retried with exponential backoff and marked failed
+    after EMAIL_OUTBOX_MAX_ATTEMPTS, or once an email code has expired.
+    Returns sent/failed/retried counts.
+    """
+
+    totals = {"sent": 0, "retried": 0, "failed": 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        now = timezone.now()
+        emails = _claim_due_emails(now, limit)
+        if not emails:
+            break
+        batches += 1
+        connection = get_connection(fail_silently=False)
+        try:
+            connection.open()
+        except Exception as exc:
+            for email in emails:
+                _record_failure(email, exc, now)
+                totals["failed" if email.status == "failed" else "retried"] += 1
+            break
+        try:
+            for email in emails:
+                if _code_expired(email, timezone.now()):
+                    OutboundEmail.objects.filter(pk=email.pk).update(
+                        status="failed",
+                        last_error="code_expired",
+                        body=_finished_body(email),
+                    )
+                    totals["failed"] += 1
+                    continue
+                message = EmailMessage(
+                    email.subject,
+                    email.body,
+                    email.from_email,
+                    email.recipients,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except Exception as exc:
+                    _record_failure(email, exc, timezone.now())
+                    totals["failed" if email.status == "failed" else "retried"] += 1
+                    # The server may have dropped us; start the rest of the
+                    # batch on a fresh connection.
+                    connection.close()
+                    try:
+                        connection.open()
+                    except Exception:
+                        pass
+                    continue
+                OutboundEmail.objects.filter(pk=email.pk).update(
+                    status="sent",
+                    attempts=email.attempts + 1,
+                    last_error="",
+                    body=_finished_body(email),
+                    sent_at=timezone.now(),
+                )
+                totals["sent"] += 1
+        finally:
+            connection.close()
+    if any(totals.values()):
+        print(f"[EMAIL-OUTBOX] sent={totals['sent']} retried={totals['retried']} failed={totals['failed']}")
+    return totals
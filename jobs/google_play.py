@@ -1,7 +1,13 @@
 import json
+import threading
+import time
+from datetime import timezone as dt_timezone
 from urllib.parse import quote
 
 from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 
 GOOGLE_PLAY_SCOPE = "https://www.googleapis.com/auth/androidpublisher"
@@ -48,7 +54,45 @@ def _google_play_package_name():
     return package_name
 
 
-def _google_play_access_token():
+ACCESS_TOKEN_CACHE_KEY = "google-play:access-token"
+# Refresh this long before Google's expiry so a token never dies mid-request.
+ACCESS_TOKEN_REFRESH_MARGIN_SECONDS = 300
+
+_token_lock = threading.Lock()
+_cached_access_token = ("", 0.0)
+_session_lock = threading.Lock()
+_session = None
+
+
+def _google_play_session():
+    global _session
+    if _session is not None:
+        return _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def _google_play_api_base_url():
+    return (
+        getattr(settings, "GOOGLE_PLAY_API_BASE_URL", "")
+        or "https://androidpublisher.googleapis.com/androidpublisher/v3"
+    ).rstrip("/")
+
+
+def _fresh_access_token(token, expires_at):
+    return bool(token) and expires_at - ACCESS_TOKEN_REFRESH_MARGIN_SECONDS > time.time()
+
+
+def _refresh_google_play_access_token():
     try:
         from google.auth.transport.requests import Request
         from google.oauth2 import service_account
@@ -63,14 +107,79 @@ def _google_play_access_token():
         info,
         scopes=[GOOGLE_PLAY_SCOPE],
     )
-    credentials.refresh(Request())
+    credentials.refresh(Request(session=_google_play_session()))
     token = (getattr(credentials, "token", "") or "").strip()
     if not token:
         raise GooglePlayVerificationError("google_play_access_token_failed")
-    return token
+    expiry = getattr(credentials, "expiry", None)
+    # google-auth reports expiry as naive UTC.
+    expires_at = (
+        expiry.replace(tzinfo=dt_timezone.utc).timestamp()
+        if expiry is not None
+        else time.time() + 3600
+    )
+    return token, expires_at
+
+
+def _google_play_access_token():
+    """Return (token, source) where source is memory, cache or oauth.
+
+    The token is kept in process memory and in the shared cache, so one OAuth
+    round-trip serves every worker until shortly before the token expires.
+    """
+
+    global _cached_access_token
+    token, expires_at = _cached_access_token
+    if _fresh_access_token(token, expires_at):
+        return token, "memory"
 
+    with _token_lock:
+        token, expires_at = _cached_access_token
+        if _fresh_access_token(token, expires_at):
+            return token, "memory"
 
-def _google_play_request(path):
+        shared = cache.get(ACCESS_TOKEN_CACHE_KEY) or {}
+        token, expires_at = shared.get("token", ""), float(shared.get("expires_at") or 0)
+        source = "cache"
+        if not _fresh_access_token(token, expires_at):
+            token, expires_at = _refresh_google_play_access_token()
+            source = "oauth"
+            cache.set(
+                ACCESS_TOKEN_CACHE_KEY,
+                {"token": token, "expires_at": expires_at},
+                timeout=max(1, int(expires_at - ACCESS_TOKEN_REFRESH_MARGIN_SECONDS - time.time())),
+            )
+        _cached_access_token = (token, expires_at)
+        return token, source
+
+
+def _forget_google_play_access_token(token):
+    global _cached_access_token
+    with _token_lock:
+        if _cached_access_token[0] == token:
+            _cached_access_token = ("", 0.0)
+        shared = cache.get(ACCESS_TOKEN_CACHE_KEY) or {}
+        if shared.get("token") == token:
+            cache.delete(ACCESS_TOKEN_CACHE_KEY)
+
+
+_verification_count = 0
+_verification_count_lock = threading.Lock()
+
+
+def _should_log_verification():
+    """Log the timing line for every GOOGLE_PLAY_VERIFY_LOG_EVERY-th call."""
+
+    global _verification_count
+    log_every = int(getattr(settings, "GOOGLE_PLAY_VERIFY_LOG_EVERY", 0) or 0)
+    if log_every <= 0:
+        return False
+    with _verification_count_lock:
+        _verification_count += 1
+        return _verification_count % log_every == 0
+
+
+def _google_play_request(path, *, endpoint=""):
     try:
         import requests
     except ImportError as exc:
@@ -79,16 +188,36 @@ def _google_play_request(path):
             detail="Install requests on the backend.",
         ) from exc
 
-    token = _google_play_access_token()
-    url = f"https://androidpublisher.googleapis.com/androidpublisher/v3/{path.lstrip('/')}"
-    response = requests.get(
-        url,
-        headers={
-            "Authorization": f"Bearer {token}",
-            "Accept": "application/json",
-        },
-        timeout=15,
-    )
+    started = time.perf_counter()
+    token, token_source = _google_play_access_token()
+    token_ms = int((time.perf_counter() - started) * 1000)
+    url = f"{_google_play_api_base_url()}/{path.lstrip('/')}"
+    api_started = time.perf_counter()
+    try:
+        response = _google_play_session().get(
+            url,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Accept": "application/json",
+            },
+            timeout=15,
+        )
+    except requests.RequestException as exc:
+        print(
+            f"[GOOGLE-PLAY-VERIFY] endpoint={endpoint} status=network_error "
+            f"token_source={token_source} token_ms={token_ms} "
+            f"api_ms={int((time.perf_counter() - api_started) * 1000)}"
+        )
+        raise GooglePlayVerificationError("google_play_network_error", detail=str(exc)) from exc
+    api_ms = int((time.perf_counter() - api_started) * 1000)
+    if _should_log_verification() or response.status_code >= 400:
+        print(
+            f"[GOOGLE-PLAY-VERIFY] endpoint={endpoint} status={response.status_code} "
+            f"token_source={token_source} token_ms={token_ms} api_ms={api_ms}"
+        )
+    if response.status_code == 401:
+        # Revoked or rotated credentials: make the next call fetch a new token.
+        _forget_google_play_access_token(token)
 
     if 200 <= response.status_code < 300:
         if not response.content:
@@ -135,7 +264,8 @@ def verify_google_play_product_purchase(*, product_id, purchase_token):
     payload = _google_play_request(
         "applications/"
         f"{quote(package_name, safe='')}/purchases/productsv2/tokens/"
-        f"{quote((purchase_token or '').strip(), safe='')}"
+        f"{quote((purchase_token or '').strip(), safe='')}",
+        endpoint="productsv2",
     )
     line_items = payload.get("productLineItem") or payload.get("productLineItems") or []
     if not any((item.get("productId") or "").strip() == product_id for item in line_items):
@@ -156,7 +286,8 @@ def verify_google_play_subscription_purchase(*, subscription_id, purchase_token)
     payload = _google_play_request(
         "applications/"
         f"{quote(package_name, safe='')}/purchases/subscriptionsv2/tokens/"
-        f"{quote((purchase_token or '').strip(), safe='')}"
+        f"{quote((purchase_token or '').strip(), safe='')}",
+        endpoint="subscriptionsv2",
     )
     line_items = payload.get("lineItems") or []
     if not any((item.get("productId") or "").strip() == subscription_id for item in line_items):
@@ -173,3 +304,16 @@ def verify_google_play_subscription_purchase(*, subscription_id, purchase_token)
             payload=payload,
         )
     return payload
+
+
+def google_subscription_expires_at(payload, *, subscription_id):
+    line_items = payload.get("lineItems") or []
+    for item in line_items:
+        if (item.get("productId") or "").strip() != subscription_id:
+            continue
+        raw = (item.get("expiryTime") or "").strip()
+        parsed = parse_datetime(raw) if raw else None
+        if parsed and timezone.is_naive(parsed):
+            parsed = timezone.make_aware(parsed, dt_timezone.utc)
+        return parsed
+    return None
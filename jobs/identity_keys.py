@@ -0,0 +1,148 @@
+"""Shared cache of the Google and Apple Sign-In signing keys.
+
+Key documents are kept in the default cache for as long as the provider's
+Cache-Control max-age allows, so every worker shares one copy. A request
+that arrives in the last part of that window is served from cache while one
+process refetches in the background. A token signed with an unknown key id
+forces a refetch (rate limited) to pick up rotated keys.
+"""
+
+import json
+import re
+import threading
+import time
+from urllib import request as urllib_request
+
+from django.core.cache import cache
+
+from .background import submit_background_task
+
+
+GOOGLE_ID_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+APPLE_ID_KEYS_URL = "https://appleid.apple.com/auth/keys"
+IDENTITY_KEY_URLS = {
+    "google": GOOGLE_ID_CERTS_URL,
+    "apple": APPLE_ID_KEYS_URL,
+}
+IDENTITY_KEYS_DEFAULT_MAX_AGE = 60 * 60
+# Refresh in the background once this share of max-age has passed.
+IDENTITY_KEYS_REFRESH_AHEAD = 0.8
+IDENTITY_KEYS_FORCED_REFRESH_INTERVAL = 60
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+_local_documents = {}
+_local_lock = threading.Lock()
+
+
+def _identity_keys_cache_key(provider):
+    return f"identity-keys:{provider}"
+
+
+def _max_age(headers):
+    match = _MAX_AGE_RE.search(headers.get("Cache-Control") or "")
+    if not match:
+        return IDENTITY_KEYS_DEFAULT_MAX_AGE
+    age = headers.get("Age") or "0"
+    return max(60, int(match.group(1)) - (int(age) if age.isdigit() else 0))
+
+
+def _fetch_identity_keys(provider):
+    """Download the provider's key document. Returns (document, max_age)."""
+
+    url = IDENTITY_KEY_URLS[provider]
+    started = time.monotonic()
+    try:
+        with urllib_request.urlopen(url, timeout=5) as response:
+            document = json.loads(response.read().decode("utf-8"))
+            max_age = _max_age(response.headers)
+    except Exception as exc:
+        raise RuntimeError(f"{provider}_sign_in_keys_unavailable") from exc
+    print(
+        f"[IDENTITY-KEYS] provider={provider} max_age={max_age} "
+        f"fetch_ms={int((time.monotonic() - started) * 1000)}"
+    )
+    return document, max_age
+
+
+def identity_key_ids(provider, document):
+    if provider == "apple":
+        keys = document.get("keys") if isinstance(document, dict) else None
+        return {item.get("kid") for item in keys or [] if isinstance(item, dict)}
+    return set(document) if isinstance(document, dict) else set()
+
+
+def _store(provider, document, max_age):
+    now = time.time()
+    entry = {
+        "document": document,
+        "refresh_at": now + max_age * IDENTITY_KEYS_REFRESH_AHEAD,
+        "expires_at": now + max_age,
+    }
+    cache.set(_identity_keys_cache_key(provider), entry, timeout=max_age)
+    with _local_lock:
+        _local_documents[provider] = entry
+    return entry
+
+
+def _refresh(provider):
+    document, max_age = _fetch_identity_keys(provider)
+    if not identity_key_ids(provider, document):
+        raise RuntimeError(f"{provider}_sign_in_keys_invalid")
+    return _store(provider, document, max_age)
+
+
+def _refresh_in_background(provider):
+    # Only one process refreshes; the rest keep serving the cached document.
+    if cache.add(f"identity-keys-refresh:{provider}", 1, timeout=30):
+        submit_background_task("identity_keys_refresh", _refresh, provider)
+
+
+def _cached_entry(provider):
+    now = time.time()
+    with _local_lock:
+        entry = _local_documents.get(provider)
+    if entry and now < entry["refresh_at"]:
+        return entry
+    shared = cache.get(_identity_keys_cache_key(provider))
+    if shared and (not entry or shared["expires_at"] > entry["expires_at"]):
+        with _local_lock:
+            _local_documents[provider] = shared
+        entry = shared
+    if entry and now >= entry["expires_at"]:
+        return None
+    return entry
+
+
+def identity_keys(provider):
+    entry = _cached_entry(provider)
+    if entry is None:
+        return _refresh(provider)["document"]
+    if time.time() >= entry["refresh_at"]:
+        _refresh_in_background(provider)
+    return entry["document"]
+
+
+def identity_keys_for(provider, key_id):
+    """Key document that contains key_id, refetching once for rotated keys.
+
+    Returns the cached document unchanged when key_id is still unknown, so
+    callers reject the token as usual.
+    """
+
+    document = identity_keys(provider)
+    if key_id in identity_key_ids(provider, document):
+        return document
+    if cache.add(f"identity-keys-forced:{provider}", 1, timeout=IDENTITY_KEYS_FORCED_REFRESH_INTERVAL):
+        return _refresh(provider)["document"]
+    # Another process refetched recently; its copy may already have the key.
+    shared = cache.get(_identity_keys_cache_key(provider))
+    if not shared:
+        return document
+    with _local_lock:
+        _local_documents[provider] = shared
+    return shared["document"]
+
+
+def clear_local_identity_keys():
+    with _local_lock:
+        _local_documents.clear()
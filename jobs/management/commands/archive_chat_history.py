@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from jobs.chat_archive import ARCHIVE_SEGMENT_SIZE, archive_conversation_history, idle_conversations
+
+
+class Command(BaseCommand):
+    help = "Move old messages of idle chat conversations into compressed archive segments."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=getattr(settings, "CHAT_ARCHIVE_AFTER_DAYS", 180),
+        )
+        parser.add_argument(
+            "--idle-days",
+            type=int,
+            default=getattr(settings, "CHAT_ARCHIVE_IDLE_DAYS", 30),
+        )
+        parser.add_argument("--segment-size", type=int, default=ARCHIVE_SEGMENT_SIZE)
+        parser.add_argument("--limit", type=int, default=0, help="Max conversations per run (0 = all).")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        older_than = now - timedelta(days=max(1, int(options["older_than_days"])))
+        idle_since = now - timedelta(days=max(0, int(options["idle_days"])))
+        segment_size = max(1, int(options["segment_size"]))
+        limit = max(0, int(options["limit"]))
+
+        conversations_seen = 0
+        conversations_archived = 0
+        messages_archived = 0
+        conversations = idle_conversations(idle_since=idle_since, older_than=older_than)
+        if limit:
+            conversations = conversations[:limit]
+        for conversation in conversations.iterator():
+            conversations_seen += 1
+            archived = archive_conversation_history(
+                conversation,
+                older_than=older_than,
+                segment_size=segment_size,
+            )
+            if archived:
+                conversations_archived += 1
+                messages_archived += archived
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Archived chat history: "
+                f"conversations_seen={conversations_seen} "
+                f"conversations_archived={conversations_archived} "
+                f"messages={messages_archived}"
+            )
+        )
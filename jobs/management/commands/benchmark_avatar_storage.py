@@ -0,0 +1,66 @@
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from jobs import avatar_storage
+from jobs.testing.store_standins import ObjectStoreStandIn
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare a new boto3 client per avatar upload/delete with the pooled process-wide client. "
+        "Runs against a local filesystem object store stand-in, no R2 credentials needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--objects", type=int, default=200)
+        parser.add_argument("--size", type=int, default=20_000, help="Payload bytes per object.")
+
+    def handle(self, *args, **options):
+        objects = max(1, options["objects"])
+        payload = b"\0" * max(1, options["size"])
+        with tempfile.TemporaryDirectory() as root, ObjectStoreStandIn(root) as store, override_settings(
+            R2_ENDPOINT_URL=store.endpoint_url,
+            R2_BUCKET=store.bucket,
+            R2_ACCESS_KEY_ID="benchmark",
+            R2_SECRET_ACCESS_KEY="benchmark",
+        ):
+            fresh = self._time(lambda key: self._fresh_client_round_trip(key, payload), objects, "fresh")
+            pooled = self._time(lambda key: self._pooled_round_trip(key, payload), objects, "pooled")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Avatar storage benchmark: "
+                f"objects={objects} fresh_client_ms_per_op={fresh:.2f} pooled_client_ms_per_op={pooled:.2f}"
+            )
+        )
+
+    def _fresh_client_round_trip(self, key, payload):
+        import boto3  # type: ignore
+
+        endpoint, key_id, secret, region = avatar_storage._r2_settings()
+        bucket = avatar_storage.settings.R2_BUCKET
+        for method, kwargs in (
+            ("put_object", {"Body": payload, "ContentType": "image/webp"}),
+            ("delete_object", {}),
+        ):
+            client = boto3.client(
+                "s3",
+                endpoint_url=endpoint,
+                aws_access_key_id=key_id,
+                aws_secret_access_key=secret,
+                region_name=region,
+            )
+            getattr(client, method)(Bucket=bucket, Key=key, **kwargs)
+
+    def _pooled_round_trip(self, key, payload):
+        avatar_storage.upload_avatar_bytes(object_key=key, payload=payload, content_type="image/webp")
+        avatar_storage.delete_avatar_objects([key])
+
+    def _time(self, func, objects, label):
+        started = time.perf_counter()
+        for index in range(objects):
+            func(f"benchmark/{label}/{index}.webp")
+        return (time.perf_counter() - started) * 1000 / (objects * 2)
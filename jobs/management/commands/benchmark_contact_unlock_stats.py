@@ -0,0 +1,93 @@
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count, Q
+
+from jobs.models import Vacancy, WalletTransaction
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare contact unlock stats filtered by metadata JSON vs the unlock_method column. "
+        "Synthetic ledger rows are inserted inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=100_000, help="Synthetic rows (use 10000000 for the full run).")
+        parser.add_argument("--vacancies", type=int, default=200)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        vacancy_ids = list(Vacancy.objects.order_by("-id").values_list("id", flat=True)[: max(1, options["vacancies"])])
+        if not vacancy_ids:
+            raise CommandError("At least one vacancy is required.")
+
+        with transaction.atomic():
+            self._seed(vacancy_ids, rows=max(0, options["rows"]), batch_size=max(1, options["batch_size"]))
+            target_id = vacancy_ids[0]
+            legacy = self._time(
+                lambda: list(self._stats_queryset(target_id, Q(metadata__method="credits"), Q(metadata__method="ad"))),
+                repeat=options["repeat"],
+            )
+            column = self._time(
+                lambda: list(self._stats_queryset(target_id, Q(unlock_method="credits"), Q(unlock_method="ad"))),
+                repeat=options["repeat"],
+            )
+            plan = self._stats_queryset(target_id, Q(unlock_method="credits"), Q(unlock_method="ad")).explain()
+            transaction.set_rollback(True)
+
+        self.stdout.write(plan)
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Contact unlock stats benchmark: "
+                f"vendor={connection.vendor} rows={options['rows']} "
+                f"metadata_ms={legacy:.2f} column_ms={column:.2f}"
+            )
+        )
+
+    def _seed(self, vacancy_ids, *, rows, batch_size):
+        user = User.objects.create_user(username=f"unlock-bench-{int(time.time())}")
+        wallet = user.wallet
+        kinds = ["contact_unlock", "contact_unlock", "vacancy_submit", "purchase_credit_pack"]
+        methods = ["credits", "ad", "subscription"]
+        for offset in range(0, rows, batch_size):
+            batch = []
+            for _ in range(min(batch_size, rows - offset)):
+                kind = random.choice(kinds)
+                method = random.choice(methods) if kind == "contact_unlock" else ""
+                batch.append(
+                    WalletTransaction(
+                        user=user,
+                        wallet=wallet,
+                        kind=kind,
+                        related_vacancy_id=random.choice(vacancy_ids),
+                        unlock_method=method,
+                        metadata={"method": method} if method else {},
+                    )
+                )
+            WalletTransaction.objects.bulk_create(batch)
+
+    def _stats_queryset(self, vacancy_id, credits_filter, ad_filter):
+        return (
+            WalletTransaction.objects.filter(kind="contact_unlock", related_vacancy_id=vacancy_id)
+            .values("related_vacancy_id")
+            .annotate(
+                total_unlocks=Count("id"),
+                paid_unlocks=Count("id", filter=credits_filter),
+                ad_unlocks=Count("id", filter=ad_filter),
+            )
+            .order_by()
+        )
+
+    def _time(self, func, *, repeat):
+        best = None
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            func()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
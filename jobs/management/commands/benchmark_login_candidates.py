@@ -0,0 +1,77 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from jobs.auth_api import _login_candidates, _login_candidates_queryset
+from jobs.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the three iexact login lookups with the single UNION query over UPPER() indexes. "
+        "Synthetic users are inserted inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100_000, help="Synthetic users (use 1000000 for the full run).")
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        users = max(1, options["users"])
+        prefix = f"login-bench-{int(time.time())}"
+        with transaction.atomic():
+            self._seed(prefix, users=users, batch_size=max(1, options["batch_size"]))
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+            # Look up a nickname near the end so neither path gets an early hit.
+            identifier = f"Bench Nick {users - 1}".upper()
+            legacy = self._time(lambda: self._legacy_candidates(identifier), repeat=options["repeat"])
+            union = self._time(lambda: _login_candidates(identifier), repeat=options["repeat"])
+            plan = _login_candidates_queryset(identifier).explain()
+            transaction.set_rollback(True)
+
+        self.stdout.write(plan)
+        self.stdout.write(
+            self.style.SUCCESS(
+                "Login candidates benchmark: "
+                f"vendor={connection.vendor} users={users} "
+                f"iexact_ms={legacy:.2f} union_ms={union:.2f}"
+            )
+        )
+
+    def _seed(self, prefix, *, users, batch_size):
+        for offset in range(0, users, batch_size):
+            created = User.objects.bulk_create(
+                [
+                    User(
+                        username=f"{prefix}-{index}",
+                        email=f"{prefix}-{index}@example.com",
+                        password="!",
+                    )
+                    for index in range(offset, min(users, offset + batch_size))
+                ]
+            )
+            UserProfile.objects.bulk_create(
+                [
+                    UserProfile(user_id=user.id, nickname=f"Bench Nick {offset + position}")
+                    for position, user in enumerate(created)
+                ]
+            )
+
+    def _legacy_candidates(self, identifier):
+        users = list(User.objects.filter(username__iexact=identifier))
+        users += list(User.objects.filter(email__iexact=identifier))
+        users += [profile.user for profile in UserProfile.objects.filter(nickname__iexact=identifier).select_related("user")]
+        return users
+
+    def _time(self, func, *, repeat):
+        best = None
+        for _ in range(max(1, repeat)):
+            started = time.perf_counter()
+            func()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from jobs.email_outbox import EMAIL_OUTBOX_BATCH_SIZE, deliver_pending_emails
+
+
+class Command(BaseCommand):
+    help = "Deliver due outbox emails, including scheduled retries. Run it from cron every minute."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=EMAIL_OUTBOX_BATCH_SIZE)
+        parser.add_argument("--max-batches", type=int, default=None)
+
+    def handle(self, *args, **options):
+        totals = deliver_pending_emails(
+            limit=max(1, options["batch_size"]),
+            max_batches=options["max_batches"],
+        )
+        self.stdout.write(self.style.SUCCESS(f"Delivered outbox emails: {totals}"))
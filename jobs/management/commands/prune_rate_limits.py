@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from jobs.rate_limits import prune_rate_limits
+
+
+class Command(BaseCommand):
+    help = "Delete rate limit counters whose window has ended. Run it from cron daily."
+
+    def handle(self, *args, **options):
+        deleted = prune_rate_limits()
+        self.stdout.write(self.style.SUCCESS(f"Pruned rate limit counters: {deleted}"))
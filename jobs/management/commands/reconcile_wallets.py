@@ -0,0 +1,93 @@
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.models import UserWallet
+from jobs.wallet_ledger import CHECKPOINT_EVERY_TRANSACTIONS, reconcile_wallets
+
+
+class Command(BaseCommand):
+    help = "Replay wallet ledgers, report balance drift, optionally repair it and write balance checkpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repair", action="store_true", help="Set drifted wallets to the ledger balance.")
+        parser.add_argument("--workers", type=int, default=1, help="Worker processes (1 = run inline).")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Wallets per keyset chunk.")
+        parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY_TRANSACTIONS)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        workers = max(1, int(options["workers"]))
+        chunk_size = max(1, int(options["chunk_size"]))
+        task_options = {
+            "repair": bool(options["repair"]),
+            "checkpoint_every": max(1, int(options["checkpoint_every"])),
+        }
+        totals = {
+            "wallets": 0,
+            "transactions": 0,
+            "ledger_drift": 0,
+            "wallet_drift": 0,
+            "repaired": 0,
+            "checkpoints": 0,
+        }
+
+        def collect(results):
+            for result in results:
+                totals["wallets"] += 1
+                totals["transactions"] += result["transactions"]
+                totals["ledger_drift"] += result["ledger_drift"]
+                totals["wallet_drift"] += int(result["wallet_drift"])
+                totals["repaired"] += int(result["repaired"])
+                totals["checkpoints"] += result["checkpoints"]
+                if result["ledger_drift"]:
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f"Ledger drift: wallet={result['wallet_id']} rows={result['ledger_drift']} "
+                            f"first_tx={result['first_drift_transaction_id']}"
+                        )
+                    )
+
+        if workers == 1:
+            for wallet_ids in self._wallet_id_chunks(chunk_size):
+                collect(reconcile_wallets(wallet_ids, **task_options))
+        else:
+            # Spawned workers set Django up from scratch and open their own
+            # connections; forked ones would share the parent's sockets.
+            connections.close_all()
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=django.setup,
+            ) as executor:
+                pending = deque()
+                for wallet_ids in self._wallet_id_chunks(chunk_size):
+                    pending.append(executor.submit(reconcile_wallets, wallet_ids, **task_options))
+                    # Keep a bounded number of chunks in flight.
+                    if len(pending) >= workers * 2:
+                        collect(pending.popleft().result())
+                while pending:
+                    collect(pending.popleft().result())
+
+        duration_ms = int((time.monotonic() - started) * 1000)
+        metrics = " ".join(f"{key}={value}" for key, value in totals.items())
+        print(f"[WALLET-RECONCILE] {metrics} duration_ms={duration_ms}")
+        self.stdout.write(self.style.SUCCESS(f"Reconciled wallets: {metrics}"))
+
+    def _wallet_id_chunks(self, chunk_size):
+        last_id = 0
+        while True:
+            wallet_ids = list(
+                UserWallet.objects.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:chunk_size]
+            )
+            if not wallet_ids:
+                return
+            yield wallet_ids
+            last_id = wallet_ids[-1]
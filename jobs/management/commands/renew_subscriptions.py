@@ -0,0 +1,35 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from jobs.subscription_renewals import (
+    RENEWAL_BATCH_SIZE,
+    RENEWAL_WORKERS,
+    renew_expiring_subscriptions,
+)
+
+
+class Command(BaseCommand):
+    help = "Re-verify store subscriptions that expire soon and extend the ones the store has renewed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--window-hours", type=int, default=24, help="Check subscriptions expiring within this window.")
+        parser.add_argument("--lookback-hours", type=int, default=72, help="Also re-check subscriptions that lapsed this recently.")
+        parser.add_argument("--workers", type=int, default=RENEWAL_WORKERS, help="Parallel store requests.")
+        parser.add_argument("--batch-size", type=int, default=RENEWAL_BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Verify with the stores but do not update entitlements.")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        totals = renew_expiring_subscriptions(
+            window=timedelta(hours=max(0, options["window_hours"])),
+            lookback=timedelta(hours=max(0, options["lookback_hours"])),
+            workers=max(1, options["workers"]),
+            batch_size=max(1, options["batch_size"]),
+            dry_run=options["dry_run"],
+        )
+        duration_ms = int((time.monotonic() - started) * 1000)
+        metrics = " ".join(f"{key}={value}" for key, value in totals.items())
+        print(f"[SUBSCRIPTION-RENEWAL] {metrics} dry_run={options['dry_run']} duration_ms={duration_ms}")
+        self.stdout.write(self.style.SUCCESS(f"Checked subscriptions: {metrics}"))
@@ -0,0 +1,10 @@
+from .economy import economy_catalog_request_scope
+
+
+class EconomyCatalogMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with economy_catalog_request_scope():
+            return self.get_response(request)
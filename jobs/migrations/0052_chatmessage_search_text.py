@@ -0,0 +1,104 @@
+from django.db import migrations, models
+
+
+POSTGRES_CREATE_SQL = [
+    # Partial index: deleted messages are never searchable, so keep them out.
+    """
+    CREATE INDEX IF NOT EXISTS jobs_chatmessage_search_gin
+    ON jobs_chatmessage USING GIN (to_tsvector('simple', search_text))
+    WHERE deleted_at IS NULL
+    """,
+]
+POSTGRES_DROP_SQL = ["DROP INDEX IF EXISTS jobs_chatmessage_search_gin"]
+
+SQLITE_CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS jobs_chatmessage_fts
+    USING fts5(search_text, tokenize = 'unicode61 remove_diacritics 2')
+    """,
+    """
+    INSERT INTO jobs_chatmessage_fts(rowid, search_text)
+    SELECT id, search_text FROM jobs_chatmessage WHERE deleted_at IS NULL
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_chatmessage_fts_ai
+    AFTER INSERT ON jobs_chatmessage WHEN new.deleted_at IS NULL
+    BEGIN
+        INSERT INTO jobs_chatmessage_fts(rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_chatmessage_fts_au
+    AFTER UPDATE OF search_text, deleted_at ON jobs_chatmessage
+    BEGIN
+        DELETE FROM jobs_chatmessage_fts WHERE rowid = old.id;
+        INSERT INTO jobs_chatmessage_fts(rowid, search_text)
+        SELECT new.id, new.search_text WHERE new.deleted_at IS NULL;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_chatmessage_fts_ad
+    AFTER DELETE ON jobs_chatmessage
+    BEGIN
+        DELETE FROM jobs_chatmessage_fts WHERE rowid = old.id;
+    END
+    """,
+]
+SQLITE_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS jobs_chatmessage_fts_ai",
+    "DROP TRIGGER IF EXISTS jobs_chatmessage_fts_au",
+    "DROP TRIGGER IF EXISTS jobs_chatmessage_fts_ad",
+    "DROP TABLE IF EXISTS jobs_chatmessage_fts",
+]
+
+
+def backfill_search_text(apps, schema_editor):
+    from jobs.text_filters import normalize_search_text
+
+    ChatMessage = apps.get_model("jobs", "ChatMessage")
+    messages = ChatMessage.objects.filter(deleted_at__isnull=True).only("id", "body")
+    batch = []
+    for message in messages.iterator(chunk_size=2000):
+        message.search_text = normalize_search_text(message.body)
+        batch.append(message)
+        if len(batch) >= 2000:
+            ChatMessage.objects.bulk_update(batch, ["search_text"])
+            batch = []
+    if batch:
+        ChatMessage.objects.bulk_update(batch, ["search_text"])
+
+
+def _run_for_vendor(schema_editor, statements_by_vendor):
+    for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    _run_for_vendor(
+        schema_editor,
+        {"postgresql": POSTGRES_CREATE_SQL, "sqlite": SQLITE_CREATE_SQL},
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    _run_for_vendor(
+        schema_editor,
+        {"postgresql": POSTGRES_DROP_SQL, "sqlite": SQLITE_DROP_SQL},
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0051_employerboardpublishingauthorization_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(backfill_search_text, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
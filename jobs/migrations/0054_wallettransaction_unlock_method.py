@@ -0,0 +1,38 @@
+# Generated by Django 5.2.10 on 2026-10-19 01:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_unlock_method(apps, schema_editor):
+    WalletTransaction = apps.get_model("jobs", "WalletTransaction")
+    for method in ("credits", "ad", "subscription"):
+        WalletTransaction.objects.filter(
+            kind="contact_unlock",
+            metadata__method=method,
+        ).update(unlock_method=method)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0053_chatarchivesegment'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wallettransaction',
+            name='unlock_method',
+            field=models.CharField(blank=True, choices=[('credits', 'Credits'), ('ad', 'Rewarded ad'), ('subscription', 'Subscription')], default='', max_length=20),
+        ),
+        migrations.RunPython(backfill_unlock_method, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='wallettransaction',
+            index=models.Index(fields=['related_vacancy', 'kind', 'created_at'], name='jobs_wallet_related_6c4db7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='wallettransaction',
+            index=models.Index(fields=['kind', 'unlock_method'], name='jobs_wallet_kind_b833c4_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.10 on 2026-10-19 01:39
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0054_wallettransaction_unlock_method'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WalletBalanceCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_transaction_id', models.PositiveBigIntegerField()),
+                ('last_transaction_at', models.DateTimeField()),
+                ('paid_credits', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('bonus_credits', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=12)),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('wallet', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_checkpoints', to='jobs.userwallet')),
+            ],
+            options={
+                'ordering': ['wallet_id', '-last_transaction_id'],
+                'indexes': [models.Index(fields=['wallet', 'last_transaction_at'], name='jobs_wallet_wallet__b398cf_idx')],
+                'constraints': [models.UniqueConstraint(fields=('wallet', 'last_transaction_id'), name='uniq_wallet_checkpoint_position')],
+            },
+        ),
+    ]
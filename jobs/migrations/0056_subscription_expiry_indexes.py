@@ -0,0 +1,27 @@
+# Generated by Django 5.2.10 on 2026-10-19 01:50
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0055_walletbalancecheckpoint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='purchaserecord',
+            index=models.Index(fields=['user', 'product_type', 'status'], name='jobs_purcha_user_id_cdd62d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usermonetizationprofile',
+            index=models.Index(fields=['employer_subscription_until'], name='jobs_usermo_employe_69c0ee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='usermonetizationprofile',
+            index=models.Index(fields=['seeker_subscription_until'], name='jobs_usermo_seeker__c07487_idx'),
+        ),
+    ]
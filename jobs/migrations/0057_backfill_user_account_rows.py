@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.db import migrations
+
+
+BATCH_SIZE = 1000
+
+
+def backfill_user_account_rows(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    UserProfile = apps.get_model("jobs", "UserProfile")
+    UserWallet = apps.get_model("jobs", "UserWallet")
+    UserMonetizationProfile = apps.get_model("jobs", "UserMonetizationProfile")
+
+    last_id = 0
+    while True:
+        user_ids = list(
+            User.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:BATCH_SIZE]
+        )
+        if not user_ids:
+            return
+        # Historical models skip UserProfile.save(), so the generated nickname
+        # is filled in here the same way.
+        UserProfile.objects.bulk_create(
+            [UserProfile(user_id=user_id, nickname=f"User {1000 + user_id}") for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+        UserWallet.objects.bulk_create(
+            [UserWallet(user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+        UserMonetizationProfile.objects.bulk_create(
+            [UserMonetizationProfile(user_id=user_id) for user_id in user_ids],
+            ignore_conflicts=True,
+        )
+        last_id = user_ids[-1]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("jobs", "0056_subscription_expiry_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_user_account_rows, migrations.RunPython.noop),
+    ]
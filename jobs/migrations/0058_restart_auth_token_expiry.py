@@ -0,0 +1,21 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def restart_auth_token_expiry(apps, schema_editor):
+    # Token.created now means "last refreshed"; give every existing token a
+    # full expiry window instead of logging out long-standing sessions.
+    Token = apps.get_model("authtoken", "Token")
+    Token.objects.update(created=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("authtoken", "0004_alter_tokenproxy_options"),
+        ("jobs", "0057_backfill_user_account_rows"),
+    ]
+
+    operations = [
+        migrations.RunPython(restart_auth_token_expiry, migrations.RunPython.noop),
+    ]
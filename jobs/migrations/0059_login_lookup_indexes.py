@@ -0,0 +1,30 @@
+# Generated by Django 5.2.10 on 2026-10-19 02:09
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0058_restart_auth_token_expiry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # auth_user belongs to django.contrib.auth, so its expression indexes are
+    # created here. Both PostgreSQL and SQLite accept this syntax.
+    operations = [
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "auth_user_username_upper" ON "auth_user" (UPPER("username"))',
+            'DROP INDEX IF EXISTS "auth_user_username_upper"',
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX IF NOT EXISTS "auth_user_email_upper" ON "auth_user" (UPPER("email"))',
+            'DROP INDEX IF EXISTS "auth_user_email_upper"',
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(django.db.models.functions.text.Upper('nickname'), name='jobs_profile_nickname_upper'),
+        ),
+    ]
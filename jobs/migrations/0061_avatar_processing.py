@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-19 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0060_outbound_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='avatar_processing_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
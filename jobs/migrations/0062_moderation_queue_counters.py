@@ -0,0 +1,74 @@
+# Generated by Django 5.2.10 on 2026-10-19 02:23
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_moderation_queue_counters(apps, schema_editor):
+    Vacancy = apps.get_model("jobs", "Vacancy")
+    VacancyModerationAttempt = apps.get_model("jobs", "VacancyModerationAttempt")
+
+    def attempts_aggregate(aggregate):
+        return Coalesce(
+            Subquery(
+                VacancyModerationAttempt.objects.filter(vacancy_id=OuterRef("pk"))
+                .order_by()
+                .values("vacancy_id")
+                .annotate(value=aggregate)
+                .values("value")[:1],
+                output_field=IntegerField(),
+            ),
+            Value(0),
+        )
+
+    Vacancy.objects.update(
+        queue_anchor=Coalesce("editing_started_at", "published_at"),
+        moderation_attempts_total=attempts_aggregate(Count("id")),
+        moderation_approved_total=attempts_aggregate(Count("id", filter=Q(decision="approved"))),
+        moderation_rejected_total=attempts_aggregate(Count("id", filter=Q(decision="rejected"))),
+        latest_moderation_attempt_no=attempts_aggregate(Max("attempt_no")),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0061_avatar_processing'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vacancy',
+            name='latest_moderation_attempt_no',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='moderation_approved_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='moderation_attempts_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='moderation_rejected_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='queue_anchor',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(backfill_moderation_queue_counters, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='vacancy',
+            index=models.Index(fields=['is_approved', 'is_rejected', 'is_editing', 'queue_anchor', 'id'], name='jobs_vacanc_is_appr_7db57a_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.10 on 2026-10-19 02:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0062_moderation_queue_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vacancy',
+            name='moderation_claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='claimed_moderation_vacancies', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='vacancy',
+            name='moderation_claimed_until',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,9 +1,10 @@
 from decimal import Decimal
 import secrets
 
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 from django.db.models import Q
+from django.db.models.functions import Upper
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
@@ -17,6 +18,7 @@ from .monetization import (
     CONTACT_PAID_CLICK_LIMIT_CHOICES,
     CONTACT_PRICE_PRESET_CHOICES,
     CONTACT_TIMER_PRESET_CHOICES,
+    CONTACT_UNLOCK_METHOD_CHOICES,
     CONTACT_UNLOCK_SOURCE_CHOICES,
     EMPLOYER_DAILY_FREE_SUBMISSIONS_DEFAULT,
     INITIAL_FREE_CREATE_SUBMISSIONS_DEFAULT,
@@ -31,6 +33,7 @@ from .monetization import (
     contact_paid_window_deadline,
 )
 from .review_presets import REVIEW_PRESET_CHOICES
+from .text_filters import normalize_search_text
 
 
 class Vacancy(models.Model):
@@ -187,6 +190,29 @@ class Vacancy(models.Model):
     )
     pinned_from = models.DateTimeField(blank=True, null=True)
     pinned_until = models.DateTimeField(blank=True, null=True)
+    # Moderation queue bookkeeping, kept up to date by the moderation attempt
+    # helpers so the pending list neither joins attempts nor sorts on an
+    # expression. queue_anchor is the submission time the queue orders by.
+    queue_anchor = models.DateTimeField(default=timezone.now)
+    moderation_attempts_total = models.PositiveIntegerField(default=0)
+    moderation_approved_total = models.PositiveIntegerField(default=0)
+    moderation_rejected_total = models.PositiveIntegerField(default=0)
+    latest_moderation_attempt_no = models.PositiveIntegerField(default=0)
+    # Moderation work lease: the moderator reviewing this vacancy until the
+    # lease runs out. Other moderators' queues skip leased vacancies.
+    moderation_claimed_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name="claimed_moderation_vacancies",
+    )
+    moderation_claimed_until = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["is_approved", "is_rejected", "is_editing", "queue_anchor", "id"]),
+        ]
 
     @property
     def moderation_status(self):
@@ -388,6 +414,12 @@ class WalletTransaction(models.Model):
         blank=True,
         related_name="wallet_transactions",
     )
+    unlock_method = models.CharField(
+        max_length=20,
+        choices=CONTACT_UNLOCK_METHOD_CHOICES,
+        blank=True,
+        default="",
+    )
     metadata = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -396,6 +428,8 @@ class WalletTransaction(models.Model):
         indexes = [
             models.Index(fields=["user", "created_at"]),
             models.Index(fields=["kind", "created_at"]),
+            models.Index(fields=["related_vacancy", "kind", "created_at"]),
+            models.Index(fields=["kind", "unlock_method"]),
         ]
 
     def __str__(self):
@@ -405,6 +439,51 @@ class WalletTransaction(models.Model):
         )
 
 
+class WalletBalanceCheckpoint(models.Model):
+    """Ledger-derived wallet balance up to and including last_transaction_id.
+
+    Written by the reconcile_wallets command; see jobs.wallet_ledger.
+    """
+
+    wallet = models.ForeignKey(
+        UserWallet,
+        on_delete=models.CASCADE,
+        related_name="balance_checkpoints",
+    )
+    last_transaction_id = models.PositiveBigIntegerField()
+    last_transaction_at = models.DateTimeField()
+    paid_credits = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal("0.00"),
+    )
+    bonus_credits = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal("0.00"),
+    )
+    transaction_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["wallet_id", "-last_transaction_id"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["wallet", "last_transaction_id"],
+                name="uniq_wallet_checkpoint_position",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["wallet", "last_transaction_at"]),
+        ]
+
+    def __str__(self):
+        return (
+            f"WalletBalanceCheckpoint wallet={self.wallet_id} "
+            f"tx={self.last_transaction_id} paid={self.paid_credits} bonus={self.bonus_credits}"
+        )
+
+
 class StoreProduct(models.Model):
     code = models.CharField(max_length=80, unique=True)
     title = models.CharField(max_length=120)
@@ -467,6 +546,7 @@ class PurchaseRecord(models.Model):
         indexes = [
             models.Index(fields=["user", "created_at"]),
             models.Index(fields=["status", "created_at"]),
+            models.Index(fields=["user", "product_type", "status"]),
         ]
 
     def __str__(self):
@@ -490,6 +570,10 @@ class UserMonetizationProfile(models.Model):
 
     class Meta:
         ordering = ["user_id"]
+        indexes = [
+            models.Index(fields=["employer_subscription_until"]),
+            models.Index(fields=["seeker_subscription_until"]),
+        ]
 
     def has_employer_subscription(self, at_time=None):
         current_time = at_time or timezone.now()
@@ -736,6 +820,14 @@ class UserProfile(models.Model):
     # Object key in Cloudflare R2 bucket (public URL is derived in API layer).
     avatar_key = models.CharField(max_length=500, blank=True, default="")
     avatar_updated_at = models.DateTimeField(blank=True, null=True)
+    # Set while an uploaded avatar is being resized in the background.
+    avatar_processing_started_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            # Backs the case-insensitive nickname match in login lookups.
+            models.Index(Upper("nickname"), name="jobs_profile_nickname_upper"),
+        ]
 
     @staticmethod
     def generated_nickname(user_id):
@@ -921,6 +1013,16 @@ class PhoneVerificationAttempt(models.Model):
         return f"PhoneVerificationAttempt {self.phone_e164 or '-'} {self.status}"
 
 
+class RateLimitCounter(models.Model):
+    # "scope:sha256-prefix" of the limited phone, email or user.
+    key = models.CharField(max_length=100, unique=True)
+    count = models.PositiveIntegerField(default=0)
+    window_ends_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"RateLimitCounter {self.key} {self.count}"
+
+
 class Complaint(models.Model):
     REASON_CHOICES = [
         ("spam", "Spam/advertising"),
@@ -1101,6 +1203,9 @@ class ChatMessage(models.Model):
     edited_at = models.DateTimeField(blank=True, null=True)
     deleted_at = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Case- and accent-folded copy of body that the full-text index is built
+    # on (see jobs.chat_search). Empty for deleted messages.
+    search_text = models.TextField(blank=True, default="", editable=False)
 
     class Meta:
         ordering = ("created_at", "id")
@@ -1115,10 +1220,50 @@ class ChatMessage(models.Model):
             models.Index(fields=("sender", "created_at")),
         ]
 
+    def save(self, *args, **kwargs):
+        self.search_text = "" if self.deleted_at else normalize_search_text(self.body)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = set(update_fields) | {"search_text"}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"ChatMessage #{self.id} conversation={self.conversation_id} sender={self.sender_id}"
 
 
+class ChatArchiveSegment(models.Model):
+    """A compressed, read-only run of old messages moved out of ChatMessage.
+
+    Filled by the archive_chat_history command; see jobs.chat_archive.
+    """
+
+    conversation = models.ForeignKey(
+        ChatConversation,
+        on_delete=models.CASCADE,
+        related_name="archive_segments",
+    )
+    first_message_id = models.PositiveBigIntegerField()
+    last_message_id = models.PositiveBigIntegerField()
+    first_created_at = models.DateTimeField()
+    last_created_at = models.DateTimeField()
+    message_count = models.PositiveIntegerField(default=0)
+    # zlib-compressed JSON list of message dicts, oldest first.
+    payload = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("conversation_id", "first_message_id")
+        indexes = [
+            models.Index(fields=("conversation", "last_message_id")),
+        ]
+
+    def __str__(self):
+        return (
+            f"ChatArchiveSegment conversation={self.conversation_id} "
+            f"messages={self.first_message_id}-{self.last_message_id}"
+        )
+
+
 class ChatReport(models.Model):
     REASON_CHOICES = [
         ("spam", "Spam or advertising"),
@@ -1404,9 +1549,46 @@ class ModeratorNotificationDelivery(models.Model):
         )
 
 
+class OutboundEmail(models.Model):
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("sending", "Sending"),
+        ("sent", "Sent"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=40, blank=True, default="")
+    from_email = models.CharField(max_length=254)
+    recipients = models.JSONField(default=list)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True, default="")
+    # Due time for pending rows; lease expiry for rows being sent.
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"OutboundEmail {self.id} {self.kind or '-'} {self.status}"
+
+
 @receiver(post_save, sender=User)
-def ensure_user_economy_objects(sender, instance, created, **kwargs):
-    if not created:
+def ensure_user_account_rows(sender, instance, created, raw=False, **kwargs):
+    """Create the profile, wallet and monetization rows together with the user.
+
+    Read paths rely on these rows existing and never create them lazily.
+    """
+    if not created or raw:
         return
-    UserWallet.objects.get_or_create(user=instance)
-    UserMonetizationProfile.objects.get_or_create(user=instance)
+    with transaction.atomic():
+        UserProfile.objects.create(user=instance)
+        UserWallet.objects.create(user=instance)
+        UserMonetizationProfile.objects.create(user=instance)
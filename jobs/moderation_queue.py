@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Vacancy
+
+
+MODERATION_QUEUE_PAGE_SIZE = 20
+MODERATION_CLAIM_BATCH_SIZE = 10
+MODERATION_CLAIM_MAX_BATCH = 50
+# A moderator who walks away gives the claimed vacancies back to the queue
+# once this lease runs out.
+MODERATION_CLAIM_LEASE = timedelta(minutes=10)
+_CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _unleased_for(moderator, now):
+    return (
+        Q(moderation_claimed_until__isnull=True)
+        | Q(moderation_claimed_until__lte=now)
+        | Q(moderation_claimed_by=moderator)
+    )
+
+
+def pending_moderation_queryset(moderator=None, *, now=None):
+    """Vacancies waiting for a moderator, newest submission first.
+
+    With a moderator, vacancies leased to someone else are left out.
+    """
+
+    vacancies = (
+        Vacancy.objects.filter(
+            is_approved=False,
+            is_rejected=False,
+            is_editing=False,
+            is_deleted_by_moderator=False,
+        )
+        .filter(Q(rejection_reason="") | Q(rejection_reason__isnull=True))
+        .select_related("created_by", "created_by__profile")
+        .order_by("-queue_anchor", "-id")
+    )
+    if moderator is not None:
+        vacancies = vacancies.filter(_unleased_for(moderator, now or timezone.now()))
+    return vacancies
+
+
+def encode_moderation_queue_cursor(vacancy):
+    """Opaque keyset cursor for the (queue_anchor, id) queue order."""
+
+    delta = vacancy.queue_anchor - _CURSOR_EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return f"{micros}-{vacancy.id}"
+
+
+def decode_moderation_queue_cursor(raw):
+    micros, _, vacancy_id = (raw or "").strip().partition("-")
+    try:
+        return _CURSOR_EPOCH + timedelta(microseconds=int(micros)), int(vacancy_id)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("invalid_cursor")
+
+
+def moderation_queue_page(moderator=None, *, cursor=None, limit=None):
+    """Return one page of the pending queue and whether more exist.
+
+    Walks the (is_approved, is_rejected, is_editing, queue_anchor, id) index
+    from the cursor, so the end of a long import backlog costs the same as
+    its first page.
+    """
+
+    limit = limit or MODERATION_QUEUE_PAGE_SIZE
+    vacancies = pending_moderation_queryset(moderator)
+    if cursor is not None:
+        queue_anchor, vacancy_id = cursor
+        vacancies = vacancies.filter(
+            Q(queue_anchor__lt=queue_anchor) | Q(queue_anchor=queue_anchor, id__lt=vacancy_id)
+        )
+    rows = list(vacancies[: limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def claim_moderation_batch(moderator, *, limit=None, now=None):
+    """Lease the next unclaimed vacancies in queue order to this moderator.
+
+    Vacancies the moderator already holds are included and their lease is
+    renewed. Returns the claimed vacancies and the lease expiry.
+    """
+
+    now = now or timezone.now()
+    limit = max(1, min(limit or MODERATION_CLAIM_BATCH_SIZE, MODERATION_CLAIM_MAX_BATCH))
+    lease_until = now + MODERATION_CLAIM_LEASE
+    with transaction.atomic():
+        candidates = pending_moderation_queryset(moderator, now=now)
+        if connection.features.has_select_for_update_skip_locked:
+            # Concurrent claims each lock a different slice of the queue
+            # instead of queueing up behind the same top rows.
+            candidates = candidates.select_for_update(skip_locked=True, of=("self",))
+        candidate_ids = list(candidates.values_list("id", flat=True)[:limit])
+        # The lease check is repeated in the UPDATE: without SKIP LOCKED
+        # (SQLite) another moderator may have claimed a row since the read.
+        Vacancy.objects.filter(id__in=candidate_ids).filter(_unleased_for(moderator, now)).update(
+            moderation_claimed_by=moderator,
+            moderation_claimed_until=lease_until,
+        )
+    claimed = list(
+        pending_moderation_queryset().filter(
+            moderation_claimed_by=moderator,
+            moderation_claimed_until=lease_until,
+        )
+    )
+    return claimed, lease_until
+
+
+def release_moderation_claims(moderator, vacancy_ids=None):
+    """Hand the moderator's leased vacancies (or just vacancy_ids) back."""
+
+    claims = Vacancy.objects.filter(moderation_claimed_by=moderator)
+    if vacancy_ids is not None:
+        claims = claims.filter(id__in=vacancy_ids)
+    return claims.update(moderation_claimed_by=None, moderation_claimed_until=None)
+
+
+def claimed_by_other_moderator(vacancy, moderator, *, now=None):
+    return bool(
+        vacancy.moderation_claimed_by_id
+        and vacancy.moderation_claimed_by_id != moderator.id
+        and vacancy.moderation_claimed_until
+        and vacancy.moderation_claimed_until > (now or timezone.now())
+    )
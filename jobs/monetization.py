@@ -81,6 +81,13 @@ TRANSACTION_KIND_CHOICES = [
 ]
 
 
+CONTACT_UNLOCK_METHOD_CHOICES = [
+    ("credits", "Credits"),
+    ("ad", "Rewarded ad"),
+    ("subscription", "Subscription"),
+]
+
+
 CONTACT_UNLOCK_SOURCE_CHOICES = [
     ("paid", "Paid credits"),
     ("ad", "Rewarded ad"),
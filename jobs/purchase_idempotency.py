@@ -0,0 +1,65 @@
+import hashlib
+import time
+import uuid
+
+from django.core.cache import cache
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+
+PURCHASE_RESULT_CACHE_SECONDS = 120
+PURCHASE_INFLIGHT_LOCK_SECONDS = 60
+PURCHASE_INFLIGHT_WAIT_SECONDS = 30
+PURCHASE_INFLIGHT_POLL_SECONDS = 0.05
+
+
+def purchase_idempotency_key(*parts):
+    digest = hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f"purchase-complete:{digest}"
+
+
+def _json_response(body, status_code, *, replayed):
+    response = HttpResponse(body, status=status_code, content_type="application/json")
+    response["Idempotent-Replayed"] = "true" if replayed else "false"
+    return response
+
+
+def idempotent_purchase_response(key, compute):
+    """Run compute() once per idempotency key and replay its response.
+
+    A completed 200 response is cached for PURCHASE_RESULT_CACHE_SECONDS, and
+    replays return the exact same bytes. A duplicate that arrives while the
+    first call is still verifying polls until the result appears (up to
+    PURCHASE_INFLIGHT_WAIT_SECONDS) instead of calling the store again. If the
+    first call fails, the next duplicate runs compute() itself. That is safe
+    because apply_store_product_purchase is idempotent per transaction id.
+    """
+
+    lock_key = f"{key}:lock"
+    owner = uuid.uuid4().hex
+    acquired = False
+    deadline = time.monotonic() + PURCHASE_INFLIGHT_WAIT_SECONDS
+    while True:
+        cached = cache.get(key)
+        if cached is not None:
+            return _json_response(cached["body"], cached["status"], replayed=True)
+        if cache.add(lock_key, owner, timeout=PURCHASE_INFLIGHT_LOCK_SECONDS):
+            acquired = True
+            break
+        if time.monotonic() >= deadline:
+            break
+        time.sleep(PURCHASE_INFLIGHT_POLL_SECONDS)
+
+    try:
+        response = compute()
+        body = JSONRenderer().render(response.data)
+        if response.status_code == 200:
+            cache.set(
+                key,
+                {"body": body, "status": response.status_code},
+                timeout=PURCHASE_RESULT_CACHE_SECONDS,
+            )
+        return _json_response(body, response.status_code, replayed=False)
+    finally:
+        if acquired and cache.get(lock_key) == owner:
+            cache.delete(lock_key)
@@ -89,10 +89,18 @@ def _format_send_exception(exc):
     return "; ".join(parts)
 
 
-def send_push_message(*, token, title, body, data=None, platform=""):
+def send_push_message(*, token, title, body, data=None, platform="", collapse_key="", silent=False):
+    """Send one notification to one device token.
+
+    Pushes sharing a collapse_key replace each other on the device instead of
+    stacking up in the notification tray. A silent push updates the text
+    without playing a sound.
+    """
     provider = (getattr(settings, "PUSH_PROVIDER", "") or "").strip().lower()
     token = (token or "").strip()
     platform = (platform or "").strip().lower()
+    # APNs rejects collapse ids longer than 64 bytes.
+    collapse_key = (collapse_key or "").strip()[:64]
     if not token:
         return "failed", "", "device_token_missing"
 
@@ -103,6 +111,7 @@ def send_push_message(*, token, title, body, data=None, platform=""):
         print(
             "[PUSH-LOG] "
             f"title={title!r} body={body!r} token_tail={token[-8:]} data={payload_data}"
+            + (f" collapse_key={collapse_key}" if collapse_key else "")
         )
         return "sent", message_id, ""
 
@@ -117,19 +126,26 @@ def send_push_message(*, token, title, body, data=None, platform=""):
         if platform in ("", "android"):
             android_config = messaging.AndroidConfig(
                 priority="high",
-                notification=messaging.AndroidNotification(sound="default"),
+                collapse_key=collapse_key or None,
+                notification=messaging.AndroidNotification(
+                    sound=None if silent else "default",
+                    tag=collapse_key or None,
+                ),
             )
         if platform in ("", "ios"):
             # iOS delivery is more reliable when APNs alert headers are explicit.
+            apns_headers = {
+                "apns-priority": "10",
+                "apns-push-type": "alert",
+            }
+            if collapse_key:
+                apns_headers["apns-collapse-id"] = collapse_key
             apns_config = messaging.APNSConfig(
-                headers={
-                    "apns-priority": "10",
-                    "apns-push-type": "alert",
-                },
+                headers=apns_headers,
                 payload=messaging.APNSPayload(
                     aps=messaging.Aps(
                         alert=messaging.ApsAlert(title=title, body=body),
-                        sound="default",
+                        sound=None if silent else "default",
                     ),
                 ),
             )
@@ -163,6 +179,9 @@ def send_push_message(*, token, title, body, data=None, platform=""):
         },
         "data": payload_data,
     }
+    if collapse_key:
+        body_payload["collapse_key"] = collapse_key
+        body_payload["notification"]["tag"] = collapse_key
     req = urllib_request.Request(
         "https://fcm.googleapis.com/fcm/send",
         data=json.dumps(body_payload).encode("utf-8"),
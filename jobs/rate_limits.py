@@ -0,0 +1,95 @@
+"""Rate limit counters shared by every worker and instance.
+
+Each (scope, key) pair gets one RateLimitCounter row whose window starts at
+the first hit and ends window later. Increments are single UPDATE ... SET
+count = count + n statements, so they are atomic on every database and do
+not depend on CACHE_BACKEND (DatabaseCache has no atomic incr and would
+reset the expiry). Keys are hashed, so phone numbers and emails are never
+stored verbatim. prune_rate_limits drops finished windows.
+"""
+
+import hashlib
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import RateLimitCounter
+
+
+def _rate_limit_key(scope, key):
+    digest = hashlib.sha256(str(key).encode("utf-8")).hexdigest()[:32]
+    return f"{scope}:{digest}"
+
+
+def _start_window(counter_key, amount, window, now):
+    """Open a new window at amount; False if another request opened it first."""
+
+    # Only an expired row matches, so of two racing requests one resets it.
+    if RateLimitCounter.objects.filter(key=counter_key, window_ends_at__lte=now).update(
+        count=amount,
+        window_ends_at=now + window,
+    ):
+        return True
+    try:
+        with transaction.atomic():
+            RateLimitCounter.objects.create(key=counter_key, count=amount, window_ends_at=now + window)
+    except IntegrityError:
+        return False
+    return True
+
+
+def rate_limit_count(scope, key):
+    return (
+        RateLimitCounter.objects.filter(key=_rate_limit_key(scope, key), window_ends_at__gt=timezone.now())
+        .values_list("count", flat=True)
+        .first()
+        or 0
+    )
+
+
+def hit_rate_limit(scope, key, *, window, amount=1):
+    """Add amount to the counter and return the new value."""
+
+    counter_key = _rate_limit_key(scope, key)
+    for _ in range(3):
+        now = timezone.now()
+        with transaction.atomic():
+            # The UPDATE keeps the row locked until commit, so the read
+            # below returns this request's own total.
+            if RateLimitCounter.objects.filter(key=counter_key, window_ends_at__gt=now).update(
+                count=F("count") + amount
+            ):
+                return RateLimitCounter.objects.filter(key=counter_key).values_list("count", flat=True).get()
+        if _start_window(counter_key, amount, window, now):
+            return amount
+    return amount
+
+
+def rate_limit_exceeded(scope, key, *, limit):
+    return rate_limit_count(scope, key) >= limit
+
+
+def consume_rate_limit(scope, key, *, limit, window):
+    """Take one slot if fewer than limit were used in the window.
+
+    The check is part of the conditional UPDATE, so concurrent requests
+    cannot both take the last slot, and denied requests do not count.
+    """
+
+    counter_key = _rate_limit_key(scope, key)
+    for _ in range(3):
+        now = timezone.now()
+        active = RateLimitCounter.objects.filter(key=counter_key, window_ends_at__gt=now)
+        if active.filter(count__lt=limit).update(count=F("count") + 1):
+            return True
+        if active.exists():
+            return False
+        if _start_window(counter_key, 1, window, now):
+            return limit >= 1
+    return False
+
+
+def prune_rate_limits(*, now=None):
+    deleted, _ = RateLimitCounter.objects.filter(window_ends_at__lte=now or timezone.now()).delete()
+    return deleted
@@ -2,7 +2,7 @@ from decimal import Decimal
 
 from rest_framework import serializers
 import re
-from .avatar_utils import avatar_public_url
+from .avatar_utils import avatar_public_url, avatar_srcset
 from .country_choices import (
     MAX_AUDIENCE_COUNTRY_SELECTIONS,
     MIN_AUDIENCE_COUNTRY_SELECTIONS,
@@ -36,7 +36,7 @@ from .reviews import (
     get_vacancy_review_preset_counts,
 )
 from .service_sources import service_board_meta_for_user
-from .economy import is_employer_profile_visible_for_vacancy
+from .economy import get_active_store_product, is_employer_profile_visible_for_vacancy
 from .text_filters import censor_minimal, contains_link
 from .telegram import (
     is_telegram_username,
@@ -228,7 +228,7 @@ def _creator_display_name(obj):
     return f"Employer #{creator.id}"
 
 
-def _creator_avatar_url(obj):
+def _creator_avatar_key(obj):
     creator = getattr(obj, "created_by", None)
     if not creator:
         return ""
@@ -236,8 +236,15 @@ def _creator_avatar_url(obj):
         profile = creator.profile
     except Exception:
         profile = None
-    avatar_key = (getattr(profile, "avatar_key", "") or "").strip()
-    return avatar_public_url(avatar_key)
+    return (getattr(profile, "avatar_key", "") or "").strip()
+
+
+def _creator_avatar_url(obj):
+    return avatar_public_url(_creator_avatar_key(obj))
+
+
+def _creator_avatar_srcset(obj):
+    return avatar_srcset(_creator_avatar_key(obj))
 
 
 def _creator_is_verified_employer(obj):
@@ -269,9 +276,10 @@ def _user_display_name(user):
 
 
 def _moderation_attempt_counts(obj):
-    attempts = getattr(obj, "moderation_attempts", None)
-    if attempts is not None and hasattr(attempts, "all"):
-        items = list(attempts.all())
+    # Prefer attempts that are already prefetched; otherwise read the counters
+    # the moderation helpers keep on the vacancy instead of querying per row.
+    if "moderation_attempts" in getattr(obj, "_prefetched_objects_cache", {}):
+        items = list(obj.moderation_attempts.all())
         return {
             "total": len(items),
             "approved": sum(1 for item in items if item.decision == "approved"),
@@ -309,6 +317,7 @@ def _contact_payload(obj, *, public_only=False):
         "owner_user_id": getattr(getattr(obj, "created_by", None), "id", None),
         "owner_nickname": _creator_display_name(obj),
         "owner_avatar_url": _creator_avatar_url(obj),
+        "owner_avatar_srcset": _creator_avatar_srcset(obj),
         "owner_employer_verified": _creator_is_verified_employer(obj),
         # compatibility with existing mobile fields
         "nickname": _creator_nickname(obj),
@@ -459,6 +468,7 @@ class VacancyModerationSerializer(VacancyListSerializer):
             "moderation_approved_total",
             "moderation_rejected_total",
             "current_attempt_no",
+            "moderation_claimed_until",
         ]
 
     def get_resubmitted_changed_fields(self, obj):
@@ -488,11 +498,7 @@ class VacancyModerationSerializer(VacancyListSerializer):
         return _moderation_attempt_counts(obj)["rejected"]
 
     def get_current_attempt_no(self, obj):
-        latest = getattr(obj, "latest_moderation_attempt_no", None)
-        if latest is not None:
-            return int(latest or 0)
-        attempt = obj.moderation_attempts.order_by("-attempt_no").first()
-        return int(getattr(attempt, "attempt_no", 0) or 0)
+        return int(getattr(obj, "latest_moderation_attempt_no", 0) or 0)
 
 
 class VacancyModerationAttemptSerializer(serializers.ModelSerializer):
@@ -1274,6 +1280,7 @@ class VacancyContactSerializer(serializers.ModelSerializer):
     owner_user_id = serializers.SerializerMethodField()
     owner_nickname = serializers.SerializerMethodField()
     owner_avatar_url = serializers.SerializerMethodField()
+    owner_avatar_srcset = serializers.SerializerMethodField()
     owner_employer_verified = serializers.SerializerMethodField()
     phone = serializers.SerializerMethodField()
     whatsapp = serializers.SerializerMethodField()
@@ -1293,6 +1300,7 @@ class VacancyContactSerializer(serializers.ModelSerializer):
             "owner_user_id",
             "owner_nickname",
             "owner_avatar_url",
+            "owner_avatar_srcset",
             "owner_employer_verified",
             "nickname",
             "phone",
@@ -1318,6 +1326,9 @@ class VacancyContactSerializer(serializers.ModelSerializer):
     def get_owner_avatar_url(self, obj):
         return _creator_avatar_url(obj)
 
+    def get_owner_avatar_srcset(self, obj):
+        return _creator_avatar_srcset(obj)
+
     def get_owner_employer_verified(self, obj):
         return _creator_is_verified_employer(obj)
 
@@ -1745,10 +1756,9 @@ class GooglePlayPurchaseCompleteSerializer(serializers.Serializer):
         code = (value or "").strip()
         if not code:
             raise serializers.ValidationError("product_code_required")
-        try:
-            product = StoreProduct.objects.get(code=code, is_active=True)
-        except StoreProduct.DoesNotExist as exc:
-            raise serializers.ValidationError("store_product_not_found") from exc
+        product = get_active_store_product(code)
+        if product is None:
+            raise serializers.ValidationError("store_product_not_found")
         if product.platform not in {"android", "shared"}:
             raise serializers.ValidationError("store_product_platform_mismatch")
         if not (product.store_product_id or "").strip():
@@ -1775,10 +1785,9 @@ class ApplePurchaseCompleteSerializer(serializers.Serializer):
         code = (value or "").strip()
         if not code:
             raise serializers.ValidationError("product_code_required")
-        try:
-            product = StoreProduct.objects.get(code=code, is_active=True)
-        except StoreProduct.DoesNotExist as exc:
-            raise serializers.ValidationError("store_product_not_found") from exc
+        product = get_active_store_product(code)
+        if product is None:
+            raise serializers.ValidationError("store_product_not_found")
         self.context["store_product"] = product
         return code
 
@@ -0,0 +1,186 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone as datetime_timezone
+
+from django.db import connections
+from django.utils import timezone
+
+from .apple_iap import (
+    AppleIAPNotConfiguredError,
+    AppleIAPVerificationError,
+    apple_receipt_item_expires_at,
+    apple_store_product_id,
+    find_apple_receipt_item,
+    verify_apple_receipt,
+)
+from .economy import apply_store_product_purchase
+from .google_play import (
+    GooglePlayNotConfiguredError,
+    GooglePlayVerificationError,
+    google_subscription_expires_at,
+    verify_google_play_subscription_purchase,
+)
+from .models import PurchaseRecord, UserMonetizationProfile
+
+
+SUBSCRIPTION_UNTIL_FIELDS = {
+    "employer_subscription": "employer_subscription_until",
+    "seeker_subscription": "seeker_subscription_until",
+}
+RENEWAL_WINDOW = timedelta(hours=24)
+# Store renewals can land after expiry (billing retry, grace period), so
+# recently lapsed subscriptions are checked too.
+RENEWAL_LOOKBACK = timedelta(hours=72)
+RENEWAL_BATCH_SIZE = 200
+RENEWAL_WORKERS = 8
+
+
+def _expiring_user_chunks(field, *, start, end, batch_size):
+    last_user_id = 0
+    while True:
+        rows = list(
+            UserMonetizationProfile.objects.filter(
+                **{f"{field}__gte": start, f"{field}__lt": end},
+                user_id__gt=last_user_id,
+            )
+            .order_by("user_id")
+            .values_list("user_id", field)[:batch_size]
+        )
+        if not rows:
+            return
+        yield dict(rows)
+        last_user_id = rows[-1][0]
+
+
+def _renewable_purchases(product_type, user_ids):
+    latest = {}
+    records = (
+        PurchaseRecord.objects.select_related("user", "product")
+        .filter(
+            user_id__in=user_ids,
+            product_type=product_type,
+            status="validated",
+            platform__in=("android", "ios"),
+        )
+        .order_by("user_id", "-entitlement_expires_at", "-id")
+    )
+    for record in records:
+        latest.setdefault(record.user_id, record)
+    return list(latest.values())
+
+
+def _apple_latest_receipt(record):
+    payload = record.payload or {}
+    verified_payload = payload.get("verified_payload") or {}
+    return (
+        (verified_payload.get("latest_receipt") or "").strip()
+        or (payload.get("verification_data") or "").strip()
+    )
+
+
+def _apple_grace_period_expires_at(verified_payload, *, product_id):
+    for item in verified_payload.get("pending_renewal_info") or []:
+        if (item.get("product_id") or item.get("auto_renew_product_id") or "").strip() != product_id:
+            continue
+        raw_ms = (item.get("grace_period_expires_date_ms") or "").strip()
+        if raw_ms.isdigit():
+            return datetime.fromtimestamp(int(raw_ms) / 1000, tz=datetime_timezone.utc)
+    return None
+
+
+def _store_subscription_expires_at(record, *, now):
+    subscription_id = (record.store_product_id or "").strip()
+    if record.platform == "android":
+        verified_payload = verify_google_play_subscription_purchase(
+            subscription_id=subscription_id,
+            purchase_token=record.purchase_token,
+        )
+        return google_subscription_expires_at(verified_payload, subscription_id=subscription_id)
+
+    if record.product is not None:
+        subscription_id = apple_store_product_id(record.product) or subscription_id
+    receipt_data = _apple_latest_receipt(record)
+    if not receipt_data:
+        raise AppleIAPVerificationError("apple_receipt_missing")
+    verified_payload = verify_apple_receipt(receipt_data, requires_shared_secret=True)
+    item = find_apple_receipt_item(
+        verified_payload=verified_payload,
+        expected_product_id=subscription_id,
+    )
+    expires_at = apple_receipt_item_expires_at(item)
+    if expires_at is None or expires_at <= now:
+        expires_at = _apple_grace_period_expires_at(verified_payload, product_id=subscription_id) or expires_at
+    return expires_at
+
+
+def _verify_record(record, now):
+    try:
+        return record, _store_subscription_expires_at(record, now=now), ""
+    except (
+        GooglePlayNotConfiguredError,
+        GooglePlayVerificationError,
+        AppleIAPNotConfiguredError,
+        AppleIAPVerificationError,
+    ) as exc:
+        return record, None, exc.code
+    finally:
+        # Worker threads may touch the database through the cache backend.
+        connections.close_all()
+
+
+def renew_expiring_subscriptions(
+    *,
+    now=None,
+    window=RENEWAL_WINDOW,
+    lookback=RENEWAL_LOOKBACK,
+    workers=RENEWAL_WORKERS,
+    batch_size=RENEWAL_BATCH_SIZE,
+    dry_run=False,
+):
+    """Re-verify store subscriptions that expire soon and extend renewed ones.
+
+    Store calls for a batch run in parallel threads; entitlement updates go
+    through apply_store_product_purchase on the calling thread, the same path
+    a client completion takes, so a concurrent request never sees a half
+    applied renewal. Lapsed or cancelled subscriptions are only reported and
+    run out on their own.
+    """
+
+    current_time = now or timezone.now()
+    totals = {"checked": 0, "renewed": 0, "unchanged": 0, "failed": 0, "skipped": 0}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for product_type, field in SUBSCRIPTION_UNTIL_FIELDS.items():
+            for until_by_user in _expiring_user_chunks(
+                field,
+                start=current_time - lookback,
+                end=current_time + window,
+                batch_size=batch_size,
+            ):
+                records = _renewable_purchases(product_type, list(until_by_user))
+                totals["skipped"] += len(until_by_user) - len(records)
+                results = executor.map(lambda record: _verify_record(record, current_time), records)
+                for record, expires_at, error_code in results:
+                    totals["checked"] += 1
+                    if error_code:
+                        totals["failed"] += 1
+                        print(
+                            f"[SUBSCRIPTION-RENEWAL] user={record.user_id} purchase={record.id} "
+                            f"platform={record.platform} error={error_code}"
+                        )
+                        continue
+                    current_until = until_by_user[record.user_id]
+                    if expires_at is None or expires_at <= max(current_until, current_time):
+                        totals["unchanged"] += 1
+                        continue
+                    if record.product is None:
+                        totals["skipped"] += 1
+                        continue
+                    if not dry_run:
+                        apply_store_product_purchase(
+                            record.user,
+                            product=record.product,
+                            platform=record.platform,
+                            external_transaction_id=record.external_transaction_id,
+                            store_entitlement_expires_at=expires_at,
+                        )
+                    totals["renewed"] += 1
+    return totals
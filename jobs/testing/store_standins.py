@@ -0,0 +1,305 @@
+"""Local HTTP stand-ins for the app store APIs and R2, for tests and benchmarks.
+
+They speak just enough of the real protocols for jobs.google_play, the
+Apple receipt checks in jobs.api and jobs.avatar_storage to run unchanged
+against them; point the store URL or R2 settings at the stand-in.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, unquote, urlsplit
+from xml.etree import ElementTree
+
+
+class _StandInServer(ABC):
+    """Threaded local HTTP server; subclasses answer requests in handle()."""
+
+    def __init__(self, *, delay_seconds=0.0):
+        self.delay_seconds = delay_seconds
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def request_count(self, prefix=""):
+        with self._lock:
+            return sum(1 for path in self.requests if path.startswith(prefix))
+
+    def _record(self, path):
+        with self._lock:
+            self.requests.append(path)
+
+    @abstractmethod
+    def handle(self, method, path, body, headers):
+        """Return (status, payload) or (status, payload, headers).
+
+        dict payloads are sent as JSON; bytes are sent as they are.
+        """
+
+    def __enter__(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; without this, Nagle
+            # plus delayed ACKs add ~40 ms to every request on a kept-alive
+            # connection and skew benchmarks against pooled clients.
+            disable_nagle_algorithm = True
+
+            def _dispatch(self, method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                stand_in._record(self.path)
+                if stand_in.delay_seconds:
+                    time.sleep(stand_in.delay_seconds)
+                status, payload, *extra = stand_in.handle(method, self.path, body, self.headers)
+                headers = dict(extra[0]) if extra else {}
+                if isinstance(payload, bytes):
+                    raw = payload
+                    headers.setdefault("Content-Type", "application/octet-stream")
+                else:
+                    raw = json.dumps(payload).encode("utf-8")
+                    headers.setdefault("Content-Type", "application/json")
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(raw)))
+                self.end_headers()
+                if method != "HEAD":
+                    self.wfile.write(raw)
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_HEAD(self):
+                self._dispatch("HEAD")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def do_PUT(self):
+                self._dispatch("PUT")
+
+            def do_DELETE(self):
+                self._dispatch("DELETE")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._server.shutdown()
+        self._server.server_close()
+        return False
+
+
+class GooglePlayStandIn(_StandInServer):
+    """OAuth token endpoint plus the Android Publisher purchase lookups.
+
+    purchases maps a purchase token to the JSON Google would return for it.
+    """
+
+    def __init__(self, *, purchases=None, token_lifetime_seconds=3600, delay_seconds=0.0):
+        super().__init__(delay_seconds=delay_seconds)
+        self.purchases = dict(purchases or {})
+        self.token_lifetime_seconds = token_lifetime_seconds
+        self.issued_tokens = 0
+
+    @property
+    def api_base_url(self):
+        return f"{self.url}/androidpublisher/v3"
+
+    def service_account_info(self):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        private_key = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        ).decode("ascii")
+        return {
+            "type": "service_account",
+            "project_id": "jobhub-standin",
+            "private_key_id": "standin",
+            "private_key": private_key,
+            "client_email": "verifier@jobhub-standin.iam.gserviceaccount.com",
+            "client_id": "1",
+            "token_uri": f"{self.url}/token",
+        }
+
+    def handle(self, method, path, body, headers):
+        if path == "/token" and method == "POST":
+            with self._lock:
+                self.issued_tokens += 1
+                token = f"standin-token-{self.issued_tokens}"
+            return 200, {
+                "access_token": token,
+                "expires_in": self.token_lifetime_seconds,
+                "token_type": "Bearer",
+            }
+        if "/purchases/" in path and method == "GET":
+            purchase_token = unquote(path.rsplit("/", 1)[-1])
+            if purchase_token in self.purchases:
+                return 200, self.purchases[purchase_token]
+            return 404, {"error": {"code": 404, "message": "The purchase token was not found."}}
+        return 404, {"error": {"code": 404, "message": "Not found"}}
+
+
+class AppleVerifyReceiptStandIn(_StandInServer):
+    """Legacy verifyReceipt endpoints for production and sandbox.
+
+    receipts maps receipt-data to the payload Apple would return for it. A
+    receipt listed in sandbox_receipts answers 21007 on the production path,
+    as Apple does for TestFlight and sandbox purchases.
+    """
+
+    def __init__(self, *, receipts=None, sandbox_receipts=(), delay_seconds=0.0):
+        super().__init__(delay_seconds=delay_seconds)
+        self.receipts = dict(receipts or {})
+        self.sandbox_receipts = set(sandbox_receipts)
+
+    @property
+    def production_url(self):
+        return f"{self.url}/verifyReceipt"
+
+    @property
+    def sandbox_url(self):
+        return f"{self.url}/sandbox/verifyReceipt"
+
+    def handle(self, method, path, body, headers):
+        if method != "POST" or path not in {"/verifyReceipt", "/sandbox/verifyReceipt"}:
+            return 404, {"status": 404}
+        receipt_data = json.loads(body or b"{}").get("receipt-data", "")
+        is_sandbox = path.startswith("/sandbox/")
+        if receipt_data in self.sandbox_receipts and not is_sandbox:
+            return 200, {"status": 21007}
+        if receipt_data not in self.receipts:
+            return 200, {"status": 21002}
+        return 200, {
+            "status": 0,
+            "environment": "Sandbox" if is_sandbox else "Production",
+            **self.receipts[receipt_data],
+        }
+
+
+class ObjectStoreStandIn(_StandInServer):
+    """Path-style S3 subset backed by a directory, standing in for R2.
+
+    Supports PutObject, GetObject, HeadObject, DeleteObject and
+    DeleteObjects for a single bucket. Objects are plain files under
+    root/bucket, so tests can look at what was written.
+    """
+
+    def __init__(self, root, *, bucket="avatars", delay_seconds=0.0):
+        super().__init__(delay_seconds=delay_seconds)
+        self.root = Path(root)
+        self.bucket = bucket
+        self.content_types = {}
+        (self.root / bucket).mkdir(parents=True, exist_ok=True)
+
+    @property
+    def endpoint_url(self):
+        return self.url
+
+    def object_path(self, key):
+        bucket_dir = (self.root / self.bucket).resolve()
+        path = (bucket_dir / key).resolve()
+        if bucket_dir not in path.parents:
+            raise ValueError(key)
+        return path
+
+    def stored_keys(self):
+        bucket_dir = self.root / self.bucket
+        return sorted(
+            str(path.relative_to(bucket_dir)).replace(os.sep, "/")
+            for path in bucket_dir.rglob("*")
+            if path.is_file()
+        )
+
+    def _error(self, status, code):
+        body = f"<?xml version=\"1.0\" encoding=\"UTF-8\"?><Error><Code>{code}</Code></Error>"
+        return status, body.encode("utf-8"), {"Content-Type": "application/xml"}
+
+    def _delete_objects(self, body):
+        root = ElementTree.fromstring(body)
+        deleted = []
+        for element in root.iter():
+            if element.tag.rsplit("}", 1)[-1] == "Key" and element.text:
+                self.object_path(element.text).unlink(missing_ok=True)
+                with self._lock:
+                    self.content_types.pop(element.text, None)
+                deleted.append(f"<Deleted><Key>{element.text}</Key></Deleted>")
+        result = (
+            "<?xml version=\"1.0\" encoding=\"UTF-8\"?>"
+            f"<DeleteResult xmlns=\"http://s3.amazonaws.com/doc/2006-03-01/\">{''.join(deleted)}</DeleteResult>"
+        )
+        return 200, result.encode("utf-8"), {"Content-Type": "application/xml"}
+
+    def handle(self, method, path, body, headers):
+        parts = urlsplit(path)
+        bucket, _, key = unquote(parts.path).lstrip("/").partition("/")
+        if bucket != self.bucket:
+            return self._error(404, "NoSuchBucket")
+        if method == "POST" and "delete" in parse_qs(parts.query, keep_blank_values=True):
+            return self._delete_objects(body)
+        try:
+            object_path = self.object_path(key)
+        except ValueError:
+            return self._error(400, "InvalidArgument")
+        if method == "PUT":
+            object_path.parent.mkdir(parents=True, exist_ok=True)
+            object_path.write_bytes(body)
+            with self._lock:
+                self.content_types[key] = headers.get("Content-Type") or "binary/octet-stream"
+            return 200, b"", {"ETag": f'"{hashlib.md5(body).hexdigest()}"'}
+        if method == "DELETE":
+            object_path.unlink(missing_ok=True)
+            return 204, b""
+        if method in {"GET", "HEAD"}:
+            if not object_path.is_file():
+                return self._error(404, "NoSuchKey")
+            with self._lock:
+                content_type = self.content_types.get(key, "binary/octet-stream")
+            return 200, object_path.read_bytes(), {"Content-Type": content_type}
+        return self._error(405, "MethodNotAllowed")
+
+
+def build_apple_receipt(*, bundle_id, product_id, history=0, transaction_id="1000"):
+    """Receipt payload with history older consumable items before the matching one."""
+
+    in_app = [
+        {
+            "product_id": f"{product_id}.old",
+            "transaction_id": str(index),
+            "original_transaction_id": str(index),
+            "purchase_date_ms": str(1_600_000_000_000 + index),
+        }
+        for index in range(history)
+    ]
+    in_app.append(
+        {
+            "product_id": product_id,
+            "transaction_id": transaction_id,
+            "original_transaction_id": transaction_id,
+            "purchase_date_ms": str(1_700_000_000_000),
+        }
+    )
+    return {"receipt": {"bundle_id": bundle_id, "in_app": in_app}}
@@ -1,26 +1,75 @@
+import csv
+import json
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+import jwt as pyjwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from PIL import Image
 from django.contrib.auth.models import User
-from django.test import RequestFactory, TestCase, override_settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings, skipUnlessDBFeature
 from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.response import Response
 from rest_framework.test import APIClient
+from io import BytesIO, StringIO
 from unittest.mock import patch
 
-from .economy import build_contact_access_state, ensure_free_contact_policy
+from .economy import (
+    ECONOMY_CATALOG_VERSION_KEY,
+    build_contact_access_state,
+    ensure_free_contact_policy,
+    get_active_store_products,
+    get_economy_config,
+    grant_credits,
+    record_wallet_event,
+    spend_credits,
+    unlock_vacancy_contacts,
+)
 from .currency_catalog import CURRENCY_CODES
 from .serializers import VacancyCreateSerializer
 from .web_forms import EmployerVacancyForm
 from .models import (
+    ChatArchiveSegment,
     ChatConversation,
     ChatMessage,
     ChatReport,
+    EconomyConfig,
     EmployerBoardPublishingAuthorization,
     EmployerBoardPublishingEvent,
     ModeratorNotificationDelivery,
+    OutboundEmail,
+    PurchaseRecord,
     PushDevice,
+    RateLimitCounter,
+    StoreProduct,
+    UserMonetizationProfile,
     UserProfile,
+    UserWallet,
     Vacancy,
     VacancyContactAccessPolicy,
     VacancyModerationAttempt,
+    VacancyReview,
+    WalletBalanceCheckpoint,
+    WalletTransaction,
 )
+from .purchase_idempotency import idempotent_purchase_response, purchase_idempotency_key
+from .testing.store_standins import AppleVerifyReceiptStandIn, GooglePlayStandIn, ObjectStoreStandIn, build_apple_receipt
+from .wallet_ledger import reconcile_wallet, wallet_balance_at
+from .chat_archive import decode_segment_payload
+from . import api as api_module, auth_api, email_outbox, google_play, token_auth
+from .rate_limits import _rate_limit_key, consume_rate_limit, hit_rate_limit, rate_limit_count
+from .token_auth import auth_token_cache_stats, issue_auth_token
+from . import apple_iap, identity_keys
+from .avatar_processing import process_avatar_upload
+from .email_outbox import EMAIL_OUTBOX_MAX_ATTEMPTS, deliver_pending_emails, queue_email
 from .board_publishing import accept_authorization, request_authorization, revoke_authorization
 from .service_sources import SERVICE_BOARD_USERNAME
 
@@ -44,8 +93,7 @@ class VerifiedEmployerApiTests(TestCase):
             email="verified-viewer@example.com",
             password="password",
         )
-        UserProfile.objects.create(user=self.employer, employer_verified=True)
-        UserProfile.objects.create(user=self.viewer)
+        UserProfile.objects.filter(user=self.employer).update(employer_verified=True)
         self.vacancy = Vacancy.objects.create(
             created_by=self.employer,
             title="Verified employer vacancy",
@@ -84,7 +132,6 @@ class VacancyPromotionFeedTests(TestCase):
             email="promotion-owner@example.com",
             password="password",
         )
-        UserProfile.objects.create(user=self.owner)
         self.now = timezone.now()
 
     def _vacancy(self, *, title, published_at, pinned_from=None, pinned_until=None):
@@ -305,13 +352,13 @@ class EmployerPortalVacancyWorkflowTests(TestCase):
 
 class EmployerPortalPasswordResetTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create_user(
             username="phone-login-user",
             email="phone-login@example.com",
             password="unneeded-password",
         )
-        UserProfile.objects.create(
-            user=self.user,
+        UserProfile.objects.filter(user=self.user).update(
             phone_e164="+48123456789",
             phone_verified=True,
         )
@@ -358,6 +405,17 @@ class EmployerPortalPasswordResetTests(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertEqual(int(self.client.session["_auth_user_id"]), self.user.id)
 
+    def test_login_candidates_match_any_identifier_case_insensitively_in_one_query(self):
+        by_email = User.objects.create_user(username="google-sub-123", email="Shared@Example.com")
+        by_nickname = User.objects.create_user(username="nick-owner")
+        UserProfile.objects.filter(user=by_nickname).update(nickname="shared@example.com")
+        by_username = User.objects.create_user(username="SHARED@example.com")
+
+        with self.assertNumQueries(1):
+            candidates = auth_api._login_candidates("  shared@EXAMPLE.com ")
+
+        self.assertEqual(candidates, [by_username, by_email, by_nickname])
+
 
 class EmployerPortalChatTests(TestCase):
     def setUp(self):
@@ -371,8 +429,8 @@ class EmployerPortalChatTests(TestCase):
             email="web-chat-candidate@example.com",
             password="password",
         )
-        UserProfile.objects.create(user=self.employer, nickname="Web Employer")
-        UserProfile.objects.create(user=self.candidate, nickname="Web Candidate")
+        UserProfile.objects.filter(user=self.employer).update(nickname="Web Employer")
+        UserProfile.objects.filter(user=self.candidate).update(nickname="Web Candidate")
         self.conversation = ChatConversation.objects.create(
             candidate=self.candidate,
             employer=self.employer,
@@ -398,6 +456,46 @@ class EmployerPortalChatTests(TestCase):
         self.conversation.refresh_from_db()
         self.assertEqual(self.conversation.employer_last_read_at, self.incoming.created_at)
 
+    @patch("jobs.web_views.CHAT_PAGE_SIZE", 2)
+    def test_archived_history_is_paged_with_a_load_older_link(self):
+        for index in range(5):
+            ChatMessage.objects.create(conversation=self.conversation, sender=self.candidate, body=f"Older {index}")
+        old_time = timezone.now() - timezone.timedelta(days=400)
+        ChatMessage.objects.filter(conversation=self.conversation).update(created_at=old_time)
+        ChatConversation.objects.filter(id=self.conversation.id).update(
+            last_message_at=old_time,
+            candidate_last_read_at=old_time,
+            employer_last_read_at=old_time,
+        )
+        call_command("archive_chat_history", stdout=StringIO())
+        self.assertTrue(ChatArchiveSegment.objects.filter(conversation=self.conversation).exists())
+
+        url = f"/employer/chats/{self.conversation.id}/"
+        bodies = []
+        params = {}
+        with patch("jobs.chat_archive.decode_segment_payload", wraps=decode_segment_payload) as decode:
+            while True:
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                page = [message.body for message in response.context["chat_messages"]]
+                self.assertLessEqual(len(page), 2)
+                bodies = page + bodies
+                if not response.context["older_before_id"]:
+                    break
+                self.assertContains(response, f'href="?before={response.context["older_before_id"]}"')
+                params = {"before": response.context["older_before_id"]}
+        self.assertEqual(bodies, ["Hello from the app"] + [f"Older {index}" for index in range(5)])
+        # One segment read per page, never the whole archive at once.
+        self.assertEqual(decode.call_count, 3)
+
+    def test_employer_can_search_chat_history(self):
+        response = self.client.get("/employer/chats/", {"q": "hello"})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Hello from the app")
+
+        response = self.client.get("/employer/chats/", {"q": "missing words"})
+        self.assertNotContains(response, "Hello from the app")
+
     @patch("jobs.web_views._send_chat_push_safe")
     def test_employer_can_reply_from_web_into_shared_conversation(self, notify):
         with self.captureOnCommitCallbacks(execute=True):
@@ -419,14 +517,13 @@ class ChatAPITests(TestCase):
             email="candidate@example.com",
             password="password",
         )
-        UserProfile.objects.create(user=self.candidate, nickname="Candidate")
+        UserProfile.objects.filter(user=self.candidate).update(nickname="Candidate")
         self.employer = User.objects.create_user(
             username="employer",
             email="employer@example.com",
             password="password",
         )
-        UserProfile.objects.create(
-            user=self.employer,
+        UserProfile.objects.filter(user=self.employer).update(
             nickname="Employer",
             employer_verified=True,
         )
@@ -577,6 +674,96 @@ class ChatAPITests(TestCase):
         )
         self.assertEqual(response.status_code, 201)
 
+    @patch("jobs.chat_api.CHAT_PAGE_SIZE", 2)
+    def test_conversation_list_pages_by_cursor_across_both_roles(self):
+        conversation_ids = []
+        for index in range(3):
+            other = User.objects.create_user(
+                username=f"paging-{index}",
+                email=f"paging-{index}@example.com",
+                password="password",
+            )
+            # The employer is the candidate in one of the chats.
+            if index == 1:
+                conversation = ChatConversation.objects.create(candidate=self.employer, employer=other)
+            else:
+                conversation = ChatConversation.objects.create(candidate=other, employer=self.employer)
+            conversation.last_message_at = timezone.now() - timezone.timedelta(minutes=index)
+            conversation.save(update_fields=["last_message_at"])
+            conversation_ids.append(conversation.id)
+
+        self.client.force_authenticate(user=self.employer)
+        first_page = self.client.get("/api/chats/").data
+        self.assertTrue(first_page["has_more"])
+        self.assertEqual([item["id"] for item in first_page["results"]], conversation_ids[:2])
+
+        second_page = self.client.get("/api/chats/", {"cursor": first_page["next_cursor"]}).data
+        self.assertFalse(second_page["has_more"])
+        self.assertIsNone(second_page["next_cursor"])
+        self.assertEqual([item["id"] for item in second_page["results"]], conversation_ids[2:])
+
+        self.assertEqual(self.client.get("/api/chats/", {"cursor": "broken"}).status_code, 400)
+
+    def test_search_is_accent_insensitive_and_skips_deleted_and_blocked_chats(self):
+        conversation_id = self._start_chat()
+        for body in ("Zażółć gęślą jaźń tomorrow", "Deleted zazolc draft"):
+            self.client.post(
+                f"/api/chats/{conversation_id}/messages/",
+                {"body": body},
+                format="json",
+            )
+        deleted = ChatMessage.objects.get(body="Deleted zazolc draft")
+        self.client.delete(f"/api/chats/{conversation_id}/messages/{deleted.id}/")
+
+        self.client.force_authenticate(user=self.employer)
+        response = self.client.get("/api/chats/search/", {"q": "ZAZOLC"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["results"]), 1)
+        hit = response.data["results"][0]
+        self.assertEqual(hit["conversation"]["id"], conversation_id)
+        start, end = hit["message"]["highlights"][0]
+        self.assertEqual(hit["message"]["snippet"][start:end], "Zażółć")
+
+        self.assertEqual(self.client.get("/api/chats/search/", {"q": "z"}).status_code, 400)
+
+        self.client.post(f"/api/chats/{conversation_id}/block/", format="json")
+        response = self.client.get("/api/chats/search/", {"q": "zazolc"})
+        self.assertEqual(response.data["results"], [])
+
+    @patch("jobs.chat_api.CHAT_PAGE_SIZE", 3)
+    def test_archived_history_is_paged_after_the_hot_messages(self):
+        conversation_id = self._start_chat()
+        for index in range(6):
+            self.client.post(
+                f"/api/chats/{conversation_id}/messages/",
+                {"body": f"Message {index}"},
+                format="json",
+            )
+        old_time = timezone.now() - timezone.timedelta(days=400)
+        ChatMessage.objects.filter(conversation_id=conversation_id).update(created_at=old_time)
+        ChatConversation.objects.filter(id=conversation_id).update(
+            last_message_at=old_time,
+            candidate_last_read_at=old_time,
+            employer_last_read_at=old_time,
+        )
+
+        call_command("archive_chat_history", stdout=StringIO())
+
+        # Everything but the newest message left the hot table.
+        self.assertEqual(ChatMessage.objects.filter(conversation_id=conversation_id).count(), 1)
+        self.assertEqual(ChatArchiveSegment.objects.get(conversation_id=conversation_id).message_count, 5)
+
+        bodies = []
+        before_message_id = None
+        while True:
+            params = {"before_message_id": before_message_id} if before_message_id else {}
+            page = self.client.get(f"/api/chats/{conversation_id}/", params).data
+            bodies = [message["body"] for message in page["messages"]] + bodies
+            if not page["has_more"]:
+                break
+            before_message_id = page["next_before_message_id"]
+        self.assertEqual(bodies, [f"Message {index}" for index in range(6)])
+
     def test_list_does_not_mark_messages_as_read(self):
         conversation_id = self._start_chat()
         self.client.post(
@@ -631,7 +818,7 @@ class ChatAPITests(TestCase):
             email="anonymous@example.com",
             password="password",
         )
-        profile = UserProfile.objects.create(user=anonymous)
+        profile = UserProfile.objects.get(user=anonymous)
         self.assertEqual(profile.nickname, f"User {1000 + anonymous.id}")
 
     def test_report_is_available_for_the_other_participant_message(self):
@@ -658,6 +845,47 @@ class ChatAPITests(TestCase):
             ).exists()
         )
 
+    @override_settings(BACKGROUND_TASKS_ASYNC=False, CHAT_PUSH_COALESCE_SECONDS=60)
+    def test_message_burst_alerts_once_and_keeps_latest_text_until_read(self):
+        cache.clear()
+        conversation_id = self._start_chat()
+        PushDevice.objects.create(user=self.employer, token="employer-device-token")
+
+        with patch(
+            "jobs.chat_notifications.send_push_message",
+            return_value=("sent", "message-id", ""),
+        ) as send_push:
+            for body in ("First line", "Second line", "Third line"):
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.client.post(
+                        f"/api/chats/{conversation_id}/messages/",
+                        {"body": body},
+                        format="json",
+                    )
+            # Later messages replace the first notification with the latest
+            # text, without alerting again.
+            self.assertEqual(send_push.call_count, 3)
+            self.assertEqual(send_push.call_args.kwargs["body"], "Third line")
+            self.assertEqual(send_push.call_args.kwargs["data"]["replaces_previous"], "1")
+            self.assertEqual([call.kwargs["silent"] for call in send_push.call_args_list], [False, True, True])
+            self.assertEqual(
+                {call.kwargs["collapse_key"] for call in send_push.call_args_list},
+                {f"chat-{conversation_id}"},
+            )
+
+            self.client.force_authenticate(user=self.employer)
+            self.client.post(f"/api/chats/{conversation_id}/read/", format="json")
+            self.client.force_authenticate(user=self.candidate)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(
+                    f"/api/chats/{conversation_id}/messages/",
+                    {"body": "After the chat was read"},
+                    format="json",
+                )
+            self.assertEqual(send_push.call_count, 4)
+            self.assertEqual(send_push.call_args.kwargs["data"]["replaces_previous"], "0")
+            self.assertFalse(send_push.call_args.kwargs["silent"])
+
     def test_cannot_start_chat_for_expired_vacancy(self):
         self.vacancy.expires_at = timezone.now() - timezone.timedelta(seconds=1)
         self.vacancy.save(update_fields=["expires_at"])
@@ -736,6 +964,964 @@ class ContactAccessPolicyTests(TestCase):
         self.assertEqual(policy.contact_unlock_price_credits, 5)
         self.assertEqual(policy.set_by, None)
 
+    def test_batch_contact_access_states_match_single_states(self):
+        owner, free_vacancy = self._create_vacancy()
+        paid_vacancy = Vacancy.objects.get(pk=free_vacancy.pk)
+        paid_vacancy.pk = None
+        paid_vacancy.creator_token = "contact-policy-test-2"
+        paid_vacancy.is_approved = True
+        paid_vacancy.save()
+        free_vacancy.is_approved = True
+        free_vacancy.save(update_fields=["is_approved"])
+        VacancyContactAccessPolicy.objects.create(
+            vacancy=paid_vacancy,
+            contact_unlock_mode="paid_forever",
+            contact_unlock_price_credits=5,
+            contact_unlock_paid_click_limit=10,
+        )
+        seeker = User.objects.create_user(username="seeker", password="password")
+        WalletTransaction.objects.create(
+            user=owner,
+            wallet=owner.wallet,
+            kind="contact_unlock",
+            related_vacancy=paid_vacancy,
+            unlock_method="credits",
+            metadata={"method": "credits"},
+        )
+
+        client = APIClient()
+        client.force_authenticate(user=seeker)
+        response = client.post(
+            "/api/vacancies/contact-access-states/",
+            {"ids": [paid_vacancy.id, free_vacancy.id, 999999]},
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEqual([item["id"] for item in results], [paid_vacancy.id, free_vacancy.id, 999999])
+        self.assertEqual(results[2]["error"], "vacancy_not_found")
+        for item, vacancy in zip(results, [paid_vacancy, free_vacancy]):
+            single = client.get(f"/api/vacancies/{vacancy.id}/contact-access-state/").json()
+            self.assertEqual(item["access_state"], single)
+        self.assertEqual(results[0]["access_state"]["paid_unlocks_count"], 1)
+        self.assertEqual(results[0]["access_state"]["current_action"], "paid")
+
+    @override_settings(REWARDED_ADS_ENABLED=True)
+    def test_ad_unlock_is_recorded_without_locking_the_wallet(self):
+        _, vacancy = self._create_vacancy()
+        seeker = User.objects.create_user(username="seeker", password="password")
+
+        with patch.object(UserWallet.objects, "select_for_update", side_effect=AssertionError("wallet locked")):
+            _, state, tx = unlock_vacancy_contacts(seeker, vacancy, method="ad")
+
+        self.assertEqual((tx.kind, tx.unlock_method), ("contact_unlock", "ad"))
+        self.assertEqual(state["current_action"], "ad")
+
+
+@skipUnlessDBFeature("test_db_allows_multiple_connections")
+@override_settings(REWARDED_ADS_ENABLED=True)
+class ConcurrentWalletEventTests(TransactionTestCase):
+    def test_parallel_ad_unlocks_for_one_user(self):
+        owner = User.objects.create_user(username="owner", password="password")
+        seeker = User.objects.create_user(username="seeker", password="password")
+        vacancies = [
+            Vacancy.objects.create(
+                created_by=owner,
+                title=f"Warehouse worker {index}",
+                country="PL",
+                city="Poznan",
+                city_code="poznan",
+                category="warehouse",
+                audience_country_codes="UA",
+                employment_type="shift",
+                experience_required="without",
+                salary="27 PLN",
+                salary_currency="PLN",
+                salary_tax_type="netto",
+                description="Visible description",
+                housing_type="none",
+                phone="+48111111111",
+                source="direct",
+                creator_token=f"concurrent-unlock-{index}",
+                expires_at=timezone.now() + timezone.timedelta(days=30),
+            )
+            for index in range(4)
+        ]
+        for vacancy in vacancies:
+            VacancyContactAccessPolicy.objects.create(vacancy=vacancy)
+
+        errors = []
+
+        def unlock_many():
+            try:
+                for vacancy in vacancies * 3:
+                    unlock_vacancy_contacts(seeker, vacancy, method="ad")
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=unlock_many) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            WalletTransaction.objects.filter(user=seeker, kind="contact_unlock", unlock_method="ad").count(),
+            8 * 3 * len(vacancies),
+        )
+
+
+class InterleavedWalletEventTests(TestCase):
+    def test_audit_events_between_balance_changes_keep_the_ledger_consistent(self):
+        user = User.objects.create_user(username="interleaved", password="password")
+        grant_credits(user, paid_credits=10, bonus_credits=2)
+        read_wallet = UserWallet.objects.get
+
+        def read_then_spend(*args, **kwargs):
+            wallet = read_wallet(*args, **kwargs)
+            # Without the wallet lock a spend can commit between the audit
+            # event's balance read and its insert.
+            spend_credits(user, amount=5, kind="contact_unlock")
+            return wallet
+
+        with patch.object(UserWallet.objects, "get", side_effect=read_then_spend):
+            _, stale_event = record_wallet_event(user, kind="contact_unlock", unlock_method="ad")
+        grant_credits(user, bonus_credits=3)
+        _, event = record_wallet_event(user, kind="contact_unlock", unlock_method="ad")
+        spend_credits(user, amount=4, kind="contact_unlock")
+
+        wallet = UserWallet.objects.get(user=user)
+        self.assertEqual((wallet.paid_credits, wallet.bonus_credits), (Decimal("6.00"), Decimal("0.00")))
+        self.assertEqual((stale_event.delta_paid_credits, stale_event.delta_bonus_credits), (0, 0))
+        self.assertEqual(stale_event.balance_paid_after, Decimal("10.00"))
+        self.assertEqual((event.balance_paid_after, event.balance_bonus_after), (Decimal("7.00"), Decimal("3.00")))
+        result = reconcile_wallet(wallet.id)
+        self.assertEqual((result["transactions"], result["ledger_drift"], result["wallet_drift"]), (6, 0, False))
+        self.assertEqual(wallet_balance_at(wallet, timezone.now()), (wallet.paid_credits, wallet.bonus_credits))
+
+
+class EconomyCatalogCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_catalog_is_cached_until_the_version_changes(self):
+        config = get_economy_config()
+        product = StoreProduct.objects.create(code="credits_10", title="10 credits", product_type="credits")
+        get_active_store_products()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_economy_config().pk, config.pk)
+            self.assertEqual([item.code for item in get_active_store_products()], ["credits_10"])
+
+        # Writes from another process skip our signals; they are picked up once
+        # that process bumps the shared version.
+        EconomyConfig.objects.filter(pk=config.pk).update(seeker_contact_discount_percent=77)
+        StoreProduct.objects.filter(pk=product.pk).update(is_active=False)
+        self.assertNotEqual(get_economy_config().seeker_contact_discount_percent, 77)
+
+        cache.set(ECONOMY_CATALOG_VERSION_KEY, "other-process")
+        self.assertEqual(get_economy_config().seeker_contact_discount_percent, 77)
+        self.assertEqual(get_active_store_products(), ())
+
+    def test_local_copy_expires_without_a_shared_version_bump(self):
+        config = get_economy_config()
+        EconomyConfig.objects.filter(pk=config.pk).update(seeker_contact_discount_percent=55)
+        self.assertNotEqual(get_economy_config().seeker_contact_discount_percent, 55)
+
+        with override_settings(ECONOMY_CATALOG_LOCAL_SECONDS=0):
+            self.assertEqual(get_economy_config().seeker_contact_discount_percent, 55)
+
+
+class WalletReconciliationTests(TestCase):
+    def test_reconcile_repairs_drift_and_checkpoints_balance_history(self):
+        user = User.objects.create_user(username="ledger-user", password="password")
+        grant_credits(user, paid_credits=10, bonus_credits=2)
+        spend_credits(user, amount=3, kind="contact_unlock")
+        _, last_tx = grant_credits(user, paid_credits=5)
+        UserWallet.objects.filter(user=user).update(paid_credits=Decimal("99.00"))
+
+        output = StringIO()
+        with patch("builtins.print"):
+            call_command("reconcile_wallets", "--repair", "--checkpoint-every", "2", stdout=output)
+
+        wallet = UserWallet.objects.get(user=user)
+        self.assertEqual((wallet.paid_credits, wallet.bonus_credits), (Decimal("14.00"), Decimal("0.00")))
+        self.assertIn("wallet_drift=1 repaired=1", output.getvalue())
+        self.assertEqual(WalletBalanceCheckpoint.objects.filter(wallet=wallet).count(), 1)
+        self.assertEqual(wallet_balance_at(wallet, last_tx.created_at), (Decimal("14.00"), Decimal("0.00")))
+
+        output = StringIO()
+        call_command("reconcile_wallets", stdout=output)
+        self.assertIn("wallet_drift=0", output.getvalue())
+
+
+class GooglePlayVerificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_access_token_is_fetched_once_and_shared_between_workers(self):
+        purchases = {
+            "token-1": {
+                "productLineItem": [{"productId": "credits_10"}],
+                "purchaseStateContext": {"purchaseState": "PURCHASED"},
+            }
+        }
+        with GooglePlayStandIn(purchases=purchases) as stand_in, override_settings(
+            GOOGLE_PLAY_PACKAGE_NAME="today.jobhub.app",
+            GOOGLE_PLAY_SERVICE_ACCOUNT_JSON=json.dumps(stand_in.service_account_info()),
+            GOOGLE_PLAY_API_BASE_URL=stand_in.api_base_url,
+        ), patch("builtins.print"):
+            with patch.object(google_play, "_cached_access_token", ("", 0.0)):
+                for _ in range(2):
+                    payload = google_play.verify_google_play_product_purchase(
+                        product_id="credits_10",
+                        purchase_token="token-1",
+                    )
+            # A fresh worker process starts with an empty memory cache.
+            with patch.object(google_play, "_cached_access_token", ("", 0.0)):
+                google_play.verify_google_play_product_purchase(
+                    product_id="credits_10",
+                    purchase_token="token-1",
+                )
+                with self.assertRaises(google_play.GooglePlayVerificationError) as error:
+                    google_play.verify_google_play_product_purchase(
+                        product_id="credits_10",
+                        purchase_token="unknown",
+                    )
+
+        self.assertEqual(payload["purchaseStateContext"]["purchaseState"], "PURCHASED")
+        self.assertEqual(error.exception.code, "google_play_api_error")
+        self.assertEqual(stand_in.request_count("/token"), 1)
+        self.assertEqual(stand_in.request_count("/androidpublisher/"), 4)
+
+
+class AppleReceiptVerificationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_sandbox_receipt_is_verified_once_and_matched_by_transaction(self):
+        receipt = build_apple_receipt(
+            bundle_id="today.jobhub.app",
+            product_id="credits_10",
+            history=500,
+            transaction_id="2000",
+        )
+        with AppleVerifyReceiptStandIn(
+            receipts={"receipt-1": receipt},
+            sandbox_receipts={"receipt-1"},
+        ) as stand_in, override_settings(
+            APPLE_IAP_BUNDLE_ID="today.jobhub.app",
+            APPLE_VERIFY_RECEIPT_PRODUCTION_URL=stand_in.production_url,
+            APPLE_VERIFY_RECEIPT_SANDBOX_URL=stand_in.sandbox_url,
+        ), patch("builtins.print"):
+            verified_payload = apple_iap.verify_apple_receipt("receipt-1")
+            matched_item = apple_iap.find_apple_receipt_item(
+                verified_payload=verified_payload,
+                expected_product_id="credits_10",
+                purchase_id="2000",
+            )
+            apple_iap.remember_apple_verification(7, "2000", matched_item, verified_payload, "credits_10")
+            summary, cached_item = apple_iap.cached_apple_verification(7, "2000", "credits_10")
+            _, other_product = apple_iap.cached_apple_verification(7, "2000", "credits_50")
+            # A newest-item fallback for a different purchase id is not cached.
+            apple_iap.remember_apple_verification(8, "1999", matched_item, verified_payload, "credits_10")
+            _, fallback_item = apple_iap.cached_apple_verification(8, "1999", "credits_10")
+
+        self.assertEqual(verified_payload["environment"], "Sandbox")
+        self.assertEqual(matched_item["transaction_id"], "2000")
+        self.assertEqual(cached_item, matched_item)
+        self.assertEqual(summary, {"status": 0, "environment": "Sandbox", "bundle_id": "today.jobhub.app", "cached": True})
+        self.assertIsNone(other_product)
+        self.assertIsNone(fallback_item)
+        self.assertEqual(stand_in.request_count("/verifyReceipt"), 1)
+        self.assertEqual(stand_in.request_count("/sandbox/verifyReceipt"), 1)
+
+
+class PhoneRateLimitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    @patch("jobs.auth_api._twilio_verify_start", return_value=(True, None, 200))
+    def test_phone_limits_are_shared_counters(self, _verify_start):
+        client = APIClient()
+        statuses = [
+            client.post("/api/auth/phone/request-code/", {"phone": "+48123456789"}, format="json").status_code
+            for _ in range(4)
+        ]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+        user = User.objects.create_user(username="reset-phone", password="password")
+        UserProfile.objects.filter(user=user).update(phone_e164="+48987654321", phone_verified=True)
+        first = client.post(
+            "/api/auth/phone/request-code/",
+            {"phone": "+48987654321", "purpose": "reset"},
+            format="json",
+        )
+        again = client.post(
+            "/api/auth/phone/request-code/",
+            {"phone": "+48987654321", "purpose": "reset"},
+            format="json",
+        )
+        self.assertEqual((first.status_code, again.status_code), (200, 429))
+
+        # Let the 45 second resend cooldown lapse.
+        RateLimitCounter.objects.filter(key=_rate_limit_key("phone-code", "reset:+48987654321")).update(
+            window_ends_at=timezone.now()
+        )
+        self.assertFalse(auth_api._phone_reset_request_blocked("+48987654321"))
+        for _ in range(5):
+            auth_api._record_phone_reset_failure("+48987654321")
+        self.assertTrue(auth_api._phone_reset_request_blocked("+48987654321"))
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                "LOCATION": "jobs_rate_limit_test_cache",
+            }
+        }
+    )
+    def test_windows_keep_their_length_and_last_slot_under_the_database_cache(self):
+        call_command("createcachetable", verbosity=0)
+        now = timezone.now()
+        self.assertEqual(hit_rate_limit("phone-reset-day", "+48111222333", window=timezone.timedelta(days=1)), 1)
+        counter = RateLimitCounter.objects.get(key=_rate_limit_key("phone-reset-day", "+48111222333"))
+        self.assertGreater(counter.window_ends_at, now + timezone.timedelta(hours=23))
+
+        later = now + timezone.timedelta(hours=2)
+        with patch("jobs.rate_limits.timezone.now", return_value=later):
+            self.assertEqual(rate_limit_count("phone-reset-day", "+48111222333"), 1)
+            self.assertEqual(hit_rate_limit("phone-reset-day", "+48111222333", window=timezone.timedelta(days=1)), 2)
+            window = timezone.timedelta(hours=1)
+            taken = [consume_rate_limit("phone-request", "+48111222333", limit=2, window=window) for _ in range(3)]
+        self.assertEqual(taken, [True, True, False])
+        # A denied request does not use up a slot or extend the window.
+        self.assertEqual(rate_limit_count("phone-request", "+48111222333"), 2)
+
+        RateLimitCounter.objects.filter(key=_rate_limit_key("phone-request", "+48111222333")).update(window_ends_at=now)
+        call_command("prune_rate_limits", stdout=StringIO())
+        self.assertEqual(list(RateLimitCounter.objects.values_list("key", flat=True)), [counter.key])
+
+
+@override_settings(APPLE_SIGN_IN_CLIENT_IDS="today.jobhub.app", BACKGROUND_TASKS_ASYNC=False)
+class IdentityKeyCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        identity_keys.clear_local_identity_keys()
+        self.private_keys = {kid: rsa.generate_private_key(public_exponent=65537, key_size=2048) for kid in ("k1", "k2")}
+
+    def _jwks(self, *kids):
+        keys = []
+        for kid in kids:
+            jwk = json.loads(pyjwt.algorithms.RSAAlgorithm.to_jwk(self.private_keys[kid].public_key()))
+            keys.append({**jwk, "kid": kid, "alg": "RS256"})
+        return {"keys": keys}
+
+    def _apple_token(self, kid):
+        now = int(time.time())
+        return pyjwt.encode(
+            {"iss": "https://appleid.apple.com", "aud": "today.jobhub.app", "sub": "apple-sub", "iat": now, "exp": now + 600},
+            self.private_keys[kid],
+            algorithm="RS256",
+            headers={"kid": kid},
+        )
+
+    def test_keys_are_fetched_once_and_refetched_for_rotated_key_ids(self):
+        documents = [(self._jwks("k1"), 3600), (self._jwks("k1", "k2"), 3600)]
+        with patch("jobs.identity_keys._fetch_identity_keys", side_effect=documents) as fetch:
+            auth_api._verify_apple_id_token(self._apple_token("k1"))
+            identity_keys.clear_local_identity_keys()
+            auth_api._verify_apple_id_token(self._apple_token("k1"))
+            self.assertEqual(fetch.call_count, 1)
+
+            self.assertEqual(auth_api._verify_apple_id_token(self._apple_token("k2"))["sub"], "apple-sub")
+            self.assertEqual(fetch.call_count, 2)
+
+            # Unknown key ids cannot force another download inside the interval.
+            document = identity_keys.identity_keys_for("apple", "k3")
+            self.assertEqual(identity_keys.identity_key_ids("apple", document), {"k1", "k2"})
+            self.assertEqual(fetch.call_count, 2)
+
+    def test_max_age_honors_cache_control_and_refreshes_ahead_of_expiry(self):
+        self.assertEqual(identity_keys._max_age({"Cache-Control": "public, max-age=20000", "Age": "100"}), 19900)
+        self.assertEqual(identity_keys._max_age({}), identity_keys.IDENTITY_KEYS_DEFAULT_MAX_AGE)
+
+        with patch("jobs.identity_keys._fetch_identity_keys", return_value=(self._jwks("k1"), 100)) as fetch:
+            identity_keys.identity_keys("apple")
+            with patch("jobs.identity_keys.time.time", return_value=time.time() + 90):
+                # Past the refresh point: served from cache, refreshed by a task.
+                self.assertTrue(identity_keys.identity_keys("apple")["keys"])
+            self.assertEqual(fetch.call_count, 2)
+
+
+class EmailOutboxTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_reset_code_is_queued_then_delivered_over_one_connection(self):
+        User.objects.create_user(username="outbox@example.com", email="outbox@example.com", password="password")
+        response = APIClient().post("/api/auth/reset/request/", {"email": "outbox@example.com"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(mail.outbox), 0)
+        queue_email("Second", "Body", ["second@example.com"], kind="test")
+
+        with patch("jobs.email_outbox.get_connection", wraps=get_connection) as connection_factory:
+            totals = deliver_pending_emails()
+
+        self.assertEqual(totals, {"sent": 2, "retried": 0, "failed": 0})
+        self.assertEqual(connection_factory.call_count, 1)
+        self.assertEqual(sorted(message.to[0] for message in mail.outbox), ["outbox@example.com", "second@example.com"])
+        self.assertIn("password reset code", mail.outbox[0].body)
+        self.assertEqual(set(OutboundEmail.objects.values_list("status", flat=True)), {"sent"})
+        # The delivered code is not kept in the outbox; other mail is.
+        self.assertEqual(OutboundEmail.objects.get(kind="email_code:reset").body, "")
+        self.assertEqual(OutboundEmail.objects.get(kind="test").body, "Body")
+
+    def test_concurrent_claims_send_each_email_once(self):
+        emails = [queue_email(f"Claim {n}", "Body", [f"claim{n}@example.com"]) for n in range(3)]
+        claim_email = email_outbox._claim_email
+        other_worker = []
+
+        def racing_claim(email, now):
+            # Another worker claims the whole batch after this one has read
+            # the due rows but before it claims them; SQLite has no SKIP LOCKED.
+            if not other_worker:
+                other_worker.append(None)
+                other_worker[0] = email_outbox._claim_due_emails(now, 50)
+            return claim_email(email, now)
+
+        now = timezone.now()
+        with patch("jobs.email_outbox._claim_email", side_effect=racing_claim):
+            first_worker = email_outbox._claim_due_emails(now, 50)
+
+        self.assertEqual(first_worker, [])
+        self.assertEqual([email.id for email in other_worker[0]], [email.id for email in emails])
+        self.assertEqual(set(OutboundEmail.objects.values_list("status", flat=True)), {"sending"})
+
+    def test_failed_delivery_backs_off_and_gives_up_after_max_attempts(self):
+        email = queue_email("Retry", "Body", ["retry@example.com"])
+        with patch("jobs.email_outbox.EmailMessage.send", side_effect=OSError("smtp down")), patch("builtins.print"):
+            self.assertEqual(deliver_pending_emails()["retried"], 1)
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts, email.last_error), ("pending", 1, "smtp down"))
+            self.assertGreater(email.next_attempt_at, timezone.now() + timezone.timedelta(seconds=20))
+            self.assertEqual(deliver_pending_emails()["retried"], 0)
+
+            for _ in range(EMAIL_OUTBOX_MAX_ATTEMPTS - 1):
+                OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+                deliver_pending_emails()
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("failed", EMAIL_OUTBOX_MAX_ATTEMPTS))
+
+    def test_expired_email_codes_are_not_retried(self):
+        code = queue_email("Code", "Your code: 123456", ["code@example.com"], kind="email_code:reset")
+        other = queue_email("Notice", "Body", ["notice@example.com"], kind="vacancy_reject")
+        with patch("jobs.email_outbox.EmailMessage.send", side_effect=OSError("smtp down")), patch("builtins.print"):
+            self.assertEqual(deliver_pending_emails()["retried"], 2)
+
+        old = timezone.now() - timezone.timedelta(minutes=11)
+        OutboundEmail.objects.update(created_at=old, next_attempt_at=timezone.now())
+        self.assertEqual(deliver_pending_emails(), {"sent": 1, "retried": 0, "failed": 1})
+        code.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((code.status, code.last_error, code.body), ("failed", "code_expired", ""))
+        self.assertEqual(other.status, "sent")
+        self.assertEqual([message.to for message in mail.outbox], [["notice@example.com"]])
+
+
+@override_settings(
+    AVATAR_PUBLIC_BASE_URL="https://cdn.example.com",
+    R2_BUCKET="avatars",
+    R2_ACCESS_KEY_ID="key",
+    R2_SECRET_ACCESS_KEY="secret",
+    BACKGROUND_TASKS_ASYNC=False,
+)
+class AvatarProcessingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.store = self.enterContext(ObjectStoreStandIn(self.enterContext(tempfile.TemporaryDirectory())))
+        self.enterContext(self.settings(R2_ENDPOINT_URL=self.store.endpoint_url))
+        self.user = User.objects.create_user(username="avatar-user", password="password")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _upload(self):
+        image = BytesIO()
+        Image.new("RGB", (1200, 800), (20, 120, 200)).save(image, format="JPEG")
+        image.seek(0)
+        image.name = "photo.jpg"
+        return self.client.post("/api/auth/me/avatar/", {"avatar": image}, format="multipart")
+
+    def test_upload_builds_webp_and_fallback_variants_and_replaces_the_old_set(self):
+        response = self._upload()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["detail"], "avatar_updated")
+        prefix = UserProfile.objects.get(user=self.user).avatar_key.rsplit("/", 1)[0]
+        self.assertEqual(
+            self.store.stored_keys(),
+            sorted(f"{prefix}/{size}.{ext}" for size in (64, 128, 512) for ext in ("webp", "jpg")),
+        )
+        self.assertEqual(Image.open(self.store.object_path(f"{prefix}/64.webp")).size, (64, 64))
+        self.assertEqual(self.store.content_types[f"{prefix}/512.jpg"], "image/jpeg")
+        self.assertEqual(response.data["avatar_url"], f"https://cdn.example.com/{prefix}/512.jpg")
+        self.assertEqual(
+            response.data["avatar_srcset"],
+            ", ".join(f"https://cdn.example.com/{prefix}/{size}.webp {size}w" for size in (64, 128, 512)),
+        )
+        self.assertFalse(response.data["avatar_processing"])
+
+        self._upload()
+        new_prefix = UserProfile.objects.get(user=self.user).avatar_key.rsplit("/", 1)[0]
+        self.assertNotEqual(new_prefix, prefix)
+        self.assertTrue(all(key.startswith(new_prefix) for key in self.store.stored_keys()))
+        self.assertEqual(self.store.request_count("/avatars?delete"), 1)
+
+        self.assertEqual(self.client.delete("/api/auth/me/avatar/").status_code, 200)
+        self.assertEqual(self.store.stored_keys(), [])
+
+    @patch("jobs.auth_api.submit_background_task")
+    def test_upload_is_accepted_before_processing_finishes(self, submit):
+        response = self._upload()
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data["detail"], "avatar_processing")
+        self.assertTrue(response.data["avatar_processing"])
+        self.assertEqual(submit.call_args.args[:2], ("avatar_processing", process_avatar_upload))
+
+        # The task never ran: the flag goes stale instead of sticking forever,
+        # and the next upload starts a fresh one.
+        UserProfile.objects.filter(user=self.user).update(
+            avatar_processing_started_at=timezone.now() - timezone.timedelta(minutes=6)
+        )
+        cache.clear()
+        self.assertFalse(self.client.get("/api/auth/me/").data["avatar_processing"])
+        self.assertTrue(self._upload().data["avatar_processing"])
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="token-user", password="password")
+        self.token = issue_auth_token(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+
+    def test_cached_token_skips_lookup_and_is_dropped_on_deactivation(self):
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 200)
+        hits = auth_token_cache_stats()["hits"]
+        with self.assertNumQueries(1):
+            # Only MeAPIView's own token read; auth and the snapshot are cached.
+            self.assertEqual(self.client.get("/api/auth/me/").status_code, 200)
+        self.assertEqual(auth_token_cache_stats()["hits"], hits + 1)
+        _, user_values = cache.get(token_auth._token_cache_key(self.token.key))
+        self.assertNotIn(self.user.password, user_values)
+
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 401)
+
+    def test_cached_user_loads_its_password_only_when_needed(self):
+        self.client.get("/api/auth/me/")
+        user, _ = token_auth.CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        self.assertEqual(user.get_deferred_fields(), {"password"})
+        self.assertTrue(user.check_password("password"))
+        user.first_name = "Cached"
+        user.save()
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password("password"))
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+                "LOCATION": "jobs_token_test_cache",
+            }
+        }
+    )
+    def test_database_cache_is_bypassed(self):
+        with self.assertNumQueries(1):
+            user, _ = token_auth.CachedTokenAuthentication().authenticate_credentials(self.token.key)
+        self.assertEqual(user.pk, self.user.pk)
+
+    def test_tokens_expire_after_idle_ttl_and_slide_on_use(self):
+        now = timezone.now()
+        Token.objects.filter(key=self.token.key).update(created=now - timezone.timedelta(days=2))
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 200)
+        self.assertGreater(Token.objects.get(key=self.token.key).created, now - timezone.timedelta(minutes=1))
+
+        cache.clear()
+        Token.objects.filter(key=self.token.key).update(created=now - timezone.timedelta(days=61))
+        response = self.client.get("/api/auth/me/")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data["detail"], "token_expired")
+        self.assertFalse(Token.objects.filter(key=self.token.key).exists())
+        self.assertNotEqual(issue_auth_token(self.user).key, self.token.key)
+
+
+class AccountSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_account_rows_are_created_with_the_user(self):
+        user = User.objects.create_user(username="eager", password="password")
+
+        with self.assertNumQueries(1):
+            user = User.objects.select_related("profile", "wallet", "monetization_profile").get(pk=user.pk)
+            self.assertEqual(user.profile.nickname, f"User {1000 + user.id}")
+            self.assertEqual(user.wallet.total_credits, Decimal("0.00"))
+            self.assertIsNone(user.monetization_profile.employer_subscription_until)
+
+    def test_me_is_served_from_one_query_and_refreshed_on_change(self):
+        employer = User.objects.create_user(username="snapshot", password="password")
+        reviewer = User.objects.create_user(username="snapshot-reviewer", password="password")
+        client = APIClient()
+        client.force_authenticate(user=employer)
+        client.get("/api/auth/me/")
+
+        cache.clear()
+        with self.assertNumQueries(2):
+            # Token lookup plus the joined account query.
+            first = client.get("/api/auth/me/")
+        with self.assertNumQueries(1):
+            client.get("/api/auth/me/")
+
+        vacancy = Vacancy.objects.create(
+            title="Welder",
+            description="Shift work",
+            created_by=employer,
+            expires_at=timezone.now() + timezone.timedelta(days=30),
+        )
+        VacancyReview.objects.create(reviewer=reviewer, employer=employer, vacancy=vacancy, rating=4)
+        profile = UserProfile.objects.get(user=employer)
+        profile.nickname = "Fresh"
+        profile.save(update_fields=["nickname"])
+        second = client.get("/api/auth/me/")
+
+        self.assertEqual(first.data["employer_review_summary"]["reviews_count"], 0)
+        self.assertEqual(second.data["nickname"], "Fresh")
+        self.assertEqual(second.data["employer_review_summary"]["reviews_count"], 1)
+        self.assertEqual(second.data["employer_review_summary"]["rating_counts"]["4"], 1)
+        self.assertEqual(second.data["employer_review_summary"]["average_rating"], 4.0)
+        self.assertEqual(second.data["board_publishing"], {"status": "none", "has_pending_request": False})
+
+
+class WalletHistoryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="ledger", password="password")
+        wallet, _ = UserWallet.objects.get_or_create(user=self.user)
+        base = timezone.now().replace(microsecond=0) - timezone.timedelta(days=10)
+        rows = WalletTransaction.objects.bulk_create(
+            [
+                WalletTransaction(
+                    user=self.user,
+                    wallet=wallet,
+                    kind="purchase_credit_pack",
+                    delta_paid_credits=Decimal("1.00"),
+                    note=f"row {index}",
+                )
+                for index in range(5)
+            ]
+        )
+        # Two rows share a timestamp so the cursor has to break ties by id.
+        for index, row in enumerate(rows):
+            WalletTransaction.objects.filter(pk=row.pk).update(
+                created_at=base + timezone.timedelta(days=min(index, 3))
+            )
+        self.base = base
+
+    def test_history_pages_by_cursor_without_gaps(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+
+        seen = []
+        counts = []
+        url = "/api/economy/history/"
+        with patch("jobs.wallet_history.WALLET_HISTORY_PAGE_SIZE", 2):
+            while url:
+                response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                seen.extend(item["id"] for item in response.data["results"])
+                counts.append(response.data.get("count"))
+                url = response.data["next"]
+
+        expected = list(
+            WalletTransaction.objects.filter(user=self.user)
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)
+        )
+        self.assertEqual(seen, expected)
+        self.assertEqual(counts[0], len(expected))
+        self.assertTrue(all(count is None for count in counts[1:]))
+        invalid = client.get("/api/economy/history/", {"cursor": "nope"})
+        self.assertEqual(invalid.data["error"], "invalid_cursor")
+        # Legacy page-number clients get an error instead of page 1 forever.
+        self.assertEqual(client.get("/api/economy/history/", {"page": "1"}).data.get("count"), len(expected))
+        legacy = client.get("/api/economy/history/", {"page": "2"})
+        self.assertEqual((legacy.status_code, legacy.data["error"]), (400, "page_not_supported"))
+
+    def test_exports_stream_filtered_rows(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.get(
+            "/api/economy/history/export/",
+            {
+                "file_format": "ndjson",
+                "date_to": timezone.localdate(self.base + timezone.timedelta(days=1)).isoformat(),
+            },
+        )
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual([json.loads(line)["note"] for line in lines], ["row 0", "row 1"])
+
+        admin_user = User.objects.create_superuser(username="ledger-admin", password="password", email="a@example.com")
+        self.client.force_login(admin_user)
+        response = self.client.get(
+            "/admin/jobs/wallettransaction/export/",
+            {"date_from": (self.base + timezone.timedelta(days=3)).isoformat()},
+        )
+        rows = list(csv.reader(b"".join(response.streaming_content).decode("utf-8").splitlines()))
+        self.assertEqual(rows[0][:3], ["id", "user_id", "kind"])
+        self.assertEqual([row[8] for row in rows[1:]], ["row 3", "row 4"])
+
+
+class ModerationQueueTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(username="queue-owner", password="password")
+        self.moderator = User.objects.create_user(username="queue-moderator", password="password", is_staff=True)
+        self.base = timezone.now().replace(microsecond=0) - timezone.timedelta(days=5)
+
+    def _submit(self, title, submitted_at):
+        vacancy = Vacancy.objects.create(
+            created_by=self.owner,
+            title=title,
+            country="DE",
+            city="Berlin",
+            category="warehouse",
+            employment_type="full",
+            description="Moderation queue test vacancy.",
+            housing_type="none",
+            source="direct",
+            editing_started_at=submitted_at,
+            expires_at=submitted_at + timezone.timedelta(days=30),
+        )
+        api_module._create_moderation_attempt(vacancy, trigger_type="create", submitted_by=self.owner)
+        return vacancy
+
+    def test_queue_pages_by_cursor_and_keeps_counters(self):
+        # Two submissions share a timestamp so the cursor has to break ties by id.
+        vacancies = [
+            self._submit(f"Queued {index}", self.base + timezone.timedelta(days=min(index, 3)))
+            for index in range(5)
+        ]
+        rejected = vacancies[0]
+        api_module._resolve_latest_moderation_attempt(rejected, decision="rejected", moderator=self.moderator)
+        api_module._create_moderation_attempt(rejected, trigger_type="edit", submitted_by=self.owner)
+
+        client = APIClient()
+        client.force_authenticate(user=self.moderator)
+        seen = []
+        url = "/api/vacancies/pending/"
+        with patch("jobs.moderation_queue.MODERATION_QUEUE_PAGE_SIZE", 2):
+            while url:
+                response = client.get(url)
+                self.assertEqual(response.status_code, 200)
+                seen.extend(item["id"] for item in response.data["results"])
+                url = response.data["next"]
+
+        expected = [vacancies[4].id, vacancies[3].id] + [vacancies[index].id for index in (2, 1, 0)]
+        self.assertEqual(seen, expected)
+        first_page = client.get("/api/vacancies/pending/").data
+        self.assertEqual(first_page["count"], 5)
+        item = next(item for item in first_page["results"] if item["id"] == rejected.id)
+        self.assertEqual(
+            (item["moderation_attempts_total"], item["moderation_rejected_total"], item["current_attempt_no"]),
+            (2, 1, 2),
+        )
+        rejected.refresh_from_db()
+        self.assertEqual(rejected.queue_anchor, self.base)
+        invalid = client.get("/api/vacancies/pending/", {"cursor": "nope"})
+        self.assertEqual(invalid.data["error"], "invalid_cursor")
+        legacy = client.get("/api/vacancies/pending/", {"page": "3"})
+        self.assertEqual((legacy.status_code, legacy.data["error"]), (400, "page_not_supported"))
+
+
+    def test_moderators_claim_disjoint_batches_until_the_lease_expires(self):
+        vacancies = [
+            self._submit(f"Claimable {index}", self.base + timezone.timedelta(hours=index))
+            for index in range(5)
+        ]
+        other = User.objects.create_user(username="queue-moderator-2", password="password", is_staff=True)
+        first, second = APIClient(), APIClient()
+        first.force_authenticate(user=self.moderator)
+        second.force_authenticate(user=other)
+
+        mine = first.post("/api/vacancies/pending/claim/", {"limit": 2}, format="json").data
+        theirs = second.post("/api/vacancies/pending/claim/", {"limit": 2}, format="json").data
+        self.assertEqual([item["id"] for item in mine["results"]], [vacancies[4].id, vacancies[3].id])
+        self.assertEqual([item["id"] for item in theirs["results"]], [vacancies[2].id, vacancies[1].id])
+        queue = second.get("/api/vacancies/pending/").data
+        self.assertEqual([item["id"] for item in queue["results"]], [vacancies[index].id for index in (2, 1, 0)])
+
+        conflict = second.post(f"/api/vacancies/{vacancies[4].id}/approve/")
+        self.assertEqual((conflict.status_code, conflict.data["error"]), (409, "vacancy_claimed"))
+        first.post(f"/api/vacancies/{vacancies[4].id}/reject/", {"reason": "Duplicate"}, format="json")
+        vacancies[4].refresh_from_db()
+        self.assertIsNone(vacancies[4].moderation_claimed_by)
+
+        Vacancy.objects.filter(pk=vacancies[3].pk).update(
+            moderation_claimed_until=timezone.now() - timezone.timedelta(seconds=1)
+        )
+        reclaimed = second.post("/api/vacancies/pending/claim/", {"limit": 3}, format="json").data
+        self.assertEqual(
+            [item["id"] for item in reclaimed["results"]],
+            [vacancies[index].id for index in (3, 2, 1)],
+        )
+        self.assertEqual(second.post("/api/vacancies/pending/release/", {}, format="json").data["released"], 3)
+
+
+class SubscriptionRenewalTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_scheduler_extends_subscriptions_the_store_has_renewed(self):
+        now = timezone.now()
+        product = StoreProduct.objects.create(
+            code="employer_month",
+            title="Employer month",
+            product_type="employer_subscription",
+            platform="android",
+            store_product_id="employer_month",
+            duration_days=30,
+        )
+        renewed_until = (now + timezone.timedelta(days=30)).replace(microsecond=0)
+        expiring = User.objects.create_user(username="expiring", password="password")
+        later = User.objects.create_user(username="later", password="password")
+        subscriptions = (
+            (expiring, now + timezone.timedelta(hours=2), "token-1"),
+            (later, now + timezone.timedelta(days=10), "token-2"),
+        )
+        for user, until, token in subscriptions:
+            UserMonetizationProfile.objects.update_or_create(
+                user=user,
+                defaults={"employer_subscription_until": until},
+            )
+            PurchaseRecord.objects.create(
+                user=user,
+                product=product,
+                platform="android",
+                product_type="employer_subscription",
+                store_product_id="employer_month",
+                external_transaction_id=f"GPA.{token}",
+                purchase_token=token,
+                status="validated",
+                entitlement_expires_at=until,
+            )
+        purchases = {
+            "token-1": {
+                "subscriptionState": "SUBSCRIPTION_STATE_ACTIVE",
+                "lineItems": [{"productId": "employer_month", "expiryTime": renewed_until.isoformat()}],
+            }
+        }
+
+        with GooglePlayStandIn(purchases=purchases) as stand_in, override_settings(
+            GOOGLE_PLAY_PACKAGE_NAME="today.jobhub.app",
+            GOOGLE_PLAY_SERVICE_ACCOUNT_JSON=json.dumps(stand_in.service_account_info()),
+            GOOGLE_PLAY_API_BASE_URL=stand_in.api_base_url,
+        ), patch("builtins.print"):
+            call_command("renew_subscriptions", stdout=StringIO())
+
+        self.assertEqual(
+            UserMonetizationProfile.objects.get(user=expiring).employer_subscription_until,
+            renewed_until,
+        )
+        self.assertEqual(
+            PurchaseRecord.objects.get(user=expiring).entitlement_expires_at,
+            renewed_until,
+        )
+        self.assertEqual(stand_in.request_count("/androidpublisher/"), 1)
+
+
+class PurchaseIdempotencyTests(TestCase):
+    purchases = {
+        "token-1": {
+            "orderId": "GPA.0000-1",
+            "productLineItem": [{"productId": "credits_10"}],
+            "purchaseStateContext": {"purchaseState": "PURCHASED"},
+        }
+    }
+
+    def setUp(self):
+        cache.clear()
+
+    def _settings(self, stand_in):
+        return override_settings(
+            GOOGLE_PLAY_PACKAGE_NAME="today.jobhub.app",
+            GOOGLE_PLAY_SERVICE_ACCOUNT_JSON=json.dumps(stand_in.service_account_info()),
+            GOOGLE_PLAY_API_BASE_URL=stand_in.api_base_url,
+        )
+
+    def test_retried_completion_replays_the_first_response(self):
+        StoreProduct.objects.create(
+            code="credits_10",
+            title="10 credits",
+            product_type="credits",
+            platform="android",
+            store_product_id="credits_10",
+            credit_amount=10,
+        )
+        user = User.objects.create_user(username="buyer", password="password")
+        client = APIClient()
+        client.force_authenticate(user=user)
+
+        with GooglePlayStandIn(purchases=self.purchases) as stand_in, self._settings(stand_in), patch(
+            "builtins.print"
+        ):
+            responses = [
+                client.post(
+                    "/api/economy/google-play/complete/",
+                    {"product_code": "credits_10", "purchase_token": "token-1"},
+                    format="json",
+                )
+                for _ in range(2)
+            ]
+
+        self.assertEqual([response.status_code for response in responses], [200, 200])
+        self.assertEqual(responses[0].content, responses[1].content)
+        self.assertEqual(responses[1]["Idempotent-Replayed"], "true")
+        self.assertEqual(stand_in.request_count("/androidpublisher/"), 1)
+        self.assertEqual(UserWallet.objects.get(user=user).paid_credits, Decimal("10.00"))
+
+    def test_concurrent_duplicates_wait_for_the_first_verification(self):
+        key = purchase_idempotency_key("android", 1, "credits_10", "token-1")
+
+        def verify():
+            payload = google_play.verify_google_play_product_purchase(
+                product_id="credits_10",
+                purchase_token="token-1",
+            )
+            return Response({"verified": payload}, status=200)
+
+        results = []
+        with GooglePlayStandIn(purchases=self.purchases, delay_seconds=0.3) as stand_in, self._settings(
+            stand_in
+        ), patch("builtins.print"):
+            threads = [
+                threading.Thread(target=lambda: results.append(idempotent_purchase_response(key, verify)))
+                for _ in range(6)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(stand_in.request_count("/androidpublisher/"), 1)
+        self.assertEqual(len({response.content for response in results}), 1)
+        self.assertEqual(sorted(response["Idempotent-Replayed"] for response in results), ["false"] + ["true"] * 5)
+
 
 class InternalVacancyImportAPITest(TestCase):
     def setUp(self):
@@ -808,7 +1994,6 @@ class InternalVacancyImportAPITest(TestCase):
             email="delegated@example.com",
             password="password",
         )
-        UserProfile.objects.create(user=employer)
         authorization = request_authorization(employer)
         accepted = accept_authorization(
             authorization,
@@ -1,4 +1,5 @@
 import re
+import unicodedata
 
 # Link detection is intentionally conservative:
 # - explicit URL schemes / www.
@@ -82,3 +83,17 @@ def line_constraints_error(value, *, max_lines, max_chars_per_line):
     if any(len(line) > max_chars_per_line for line in lines):
         return "line_too_long"
     return None
+
+
+# Letters that carry a stroke instead of a combining accent, so NFKD leaves
+# them alone.
+_SEARCH_FOLD_TABLE = str.maketrans(
+    {"ł": "l", "đ": "d", "ø": "o", "ħ": "h", "ı": "i", "æ": "ae", "œ": "oe"}
+)
+
+
+def normalize_search_text(value):
+    """Fold case and strip accents so "Zażółć" is found by "zazolc"."""
+    decomposed = unicodedata.normalize("NFKD", (value or "").casefold())
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.translate(_SEARCH_FOLD_TABLE).split())
@@ -0,0 +1,165 @@
+"""Token authentication with a shared token cache and sliding expiry.
+
+Token.created is treated as "last refreshed": every authenticated request
+older than AUTH_TOKEN_REFRESH_SECONDS moves it forward, so a token only
+expires after AUTH_TOKEN_TTL_DAYS without use.
+"""
+
+import hashlib
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.cache.backends.db import DatabaseCache
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def auth_token_ttl():
+    days = int(getattr(settings, "AUTH_TOKEN_TTL_DAYS", 0) or 0)
+    return timedelta(days=days) if days > 0 else None
+
+
+def auth_token_expired(token, *, now=None):
+    ttl = auth_token_ttl()
+    return ttl is not None and token.created <= (now or timezone.now()) - ttl
+
+
+def issue_auth_token(user):
+    """Return the user's live token, replacing it if it already expired."""
+
+    token, created = Token.objects.get_or_create(user=user)
+    if not created and auth_token_expired(token):
+        token.delete()
+        token = Token.objects.create(user=user)
+    return token
+
+
+def _token_cache_key(key):
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+    return f"auth-token:{digest}"
+
+
+def invalidate_cached_user_token(user_id):
+    keys = Token.objects.filter(user_id=user_id).values_list("key", flat=True)
+    cache.delete_many([_token_cache_key(key) for key in keys])
+
+
+def _token_cache_enabled():
+    if int(getattr(settings, "AUTH_TOKEN_CACHE_SECONDS", 60)) <= 0:
+        return False
+    # A DatabaseCache read is itself a query, no cheaper than the Token + User
+    # join it would replace, and its writes cost several more.
+    return not isinstance(caches["default"], DatabaseCache)
+
+
+# Everything but the password hash, which stays out of the cache; a cached
+# user loads it lazily if a view needs it, and save() skips it.
+_CACHED_USER_FIELDS = tuple(
+    field.attname for field in User._meta.concrete_fields if field.attname != "password"
+)
+
+
+def _cached_user_values(user):
+    return tuple(getattr(user, name) for name in _CACHED_USER_FIELDS)
+
+
+def _user_from_cache(values):
+    return User.from_db(DEFAULT_DB_ALIAS, _CACHED_USER_FIELDS, values)
+
+
+def auth_token_cache_stats():
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    lookups = hits + misses
+    return {
+        "lookups": lookups,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+    }
+
+
+def _record_lookup(hit):
+    with _stats_lock:
+        _stats["hits" if hit else "misses"] += 1
+        lookups = _stats["hits"] + _stats["misses"]
+    log_every = int(getattr(settings, "AUTH_TOKEN_CACHE_LOG_EVERY", 0) or 0)
+    if log_every > 0 and lookups % log_every == 0:
+        stats = auth_token_cache_stats()
+        print(
+            f"[AUTH-TOKEN-CACHE] lookups={stats['lookups']} hits={stats['hits']} "
+            f"misses={stats['misses']} hit_rate={stats['hit_rate']}"
+        )
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication that skips the Token + User query for cached keys.
+
+    The token's created time and the user's fields (without the password
+    hash) are cached for AUTH_TOKEN_CACHE_SECONDS. Entries are dropped when
+    the token is deleted (rotation, logout, account deletion) or the user row
+    is saved (deactivation, staff changes); with more than one worker that
+    needs a shared CACHE_BACKEND. With the database cache the lookup goes
+    straight to the Token table.
+    """
+
+    def authenticate_credentials(self, key):
+        use_cache = _token_cache_enabled()
+        cache_key = _token_cache_key(key)
+        entry = cache.get(cache_key) if use_cache else None
+        store = use_cache and entry is None
+        if use_cache:
+            _record_lookup(not store)
+        if entry is None:
+            try:
+                token = Token.objects.select_related("user").get(key=key)
+            except Token.DoesNotExist:
+                raise exceptions.AuthenticationFailed("Invalid token.")
+            created, user = token.created, token.user
+        else:
+            created, user_values = entry
+            user = _user_from_cache(user_values)
+
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed("User inactive or deleted.")
+        now = timezone.now()
+        token = Token(key=key, user=user, created=created)
+        if auth_token_expired(token, now=now):
+            Token.objects.filter(key=key).delete()
+            raise exceptions.AuthenticationFailed("token_expired")
+
+        refresh_seconds = int(getattr(settings, "AUTH_TOKEN_REFRESH_SECONDS", 0) or 0)
+        if auth_token_ttl() is not None and created <= now - timedelta(seconds=refresh_seconds):
+            Token.objects.filter(key=key).update(created=now)
+            token.created = now
+            store = use_cache
+        if store:
+            cache.set(
+                cache_key,
+                (token.created, _cached_user_values(user)),
+                timeout=int(getattr(settings, "AUTH_TOKEN_CACHE_SECONDS", 60)),
+            )
+        return user, token
+
+
+@receiver(post_delete, sender=Token)
+def _invalidate_deleted_token(sender, instance, **kwargs):
+    cache.delete(_token_cache_key(instance.key))
+
+
+# Deleting a user cascades to its token, whose post_delete drops the entry.
+@receiver(post_save, sender=User)
+def _invalidate_user_token(sender, instance, **kwargs):
+    invalidate_cached_user_token(instance.pk)
@@ -6,6 +6,8 @@ from .api import (
     VacancyBookmarkStatusAPIView,
     VacancyCreateAPIView,
     VacancyPendingListAPIView,
+    ModerationClaimAPIView,
+    ModerationReleaseAPIView,
     ModerationVacancyDetailAPIView,
     VacancyApproveAPIView,
     VacancyRejectAPIView,
@@ -37,9 +39,11 @@ from .api import (
     EconomyOverviewAPIView,
     ApplePurchaseCompleteAPIView,
     GooglePlayPurchaseCompleteAPIView,
+    WalletTransactionExportAPIView,
     WalletTransactionListAPIView,
     VacancySubmissionStateAPIView,
     VacancyContactAccessStateAPIView,
+    VacancyContactAccessStatesAPIView,
     InternalVacancyDeleteAPIView,
     InternalVacancyImportAPIView,
 )
@@ -72,6 +76,7 @@ from .chat_api import (
     ChatMessageAPIView,
     ChatMessageMutationAPIView,
     ChatReportAPIView,
+    ChatSearchAPIView,
     ChatConversationUnblockAPIView,
     ChatUnreadCountAPIView,
 )
@@ -103,6 +108,7 @@ urlpatterns = [
     path("chats/", ChatConversationListAPIView.as_view(), name="chat-list"),
     path("chats/unread-count/", ChatUnreadCountAPIView.as_view(), name="chat-unread-count"),
     path("chats/start/", ChatConversationStartAPIView.as_view(), name="chat-start"),
+    path("chats/search/", ChatSearchAPIView.as_view(), name="chat-search"),
     path("chats/<int:conversation_id>/", ChatConversationDetailAPIView.as_view(), name="chat-detail"),
     path("chats/<int:conversation_id>/messages/", ChatMessageAPIView.as_view(), name="chat-message"),
     path("chats/<int:conversation_id>/messages/<int:message_id>/", ChatMessageMutationAPIView.as_view(), name="chat-message-mutation"),
@@ -112,6 +118,7 @@ urlpatterns = [
     path("chats/<int:conversation_id>/report/", ChatReportAPIView.as_view(), name="chat-report"),
     path("economy/overview/", EconomyOverviewAPIView.as_view(), name="economy-overview"),
     path("economy/history/", WalletTransactionListAPIView.as_view(), name="economy-history"),
+    path("economy/history/export/", WalletTransactionExportAPIView.as_view(), name="economy-history-export"),
     path(
         "economy/google-play/complete/",
         GooglePlayPurchaseCompleteAPIView.as_view(),
@@ -134,6 +141,8 @@ urlpatterns = [
     path("vacancies/mine/", VacancyMineAPIView.as_view(), name="vacancy-mine"),
     path("vacancies/<int:pk>/edit/", VacancyEditAPIView.as_view(), name="vacancy-edit"),
     path("vacancies/pending/", VacancyPendingListAPIView.as_view(), name="vacancy-pending"),
+    path("vacancies/pending/claim/", ModerationClaimAPIView.as_view(), name="vacancy-pending-claim"),
+    path("vacancies/pending/release/", ModerationReleaseAPIView.as_view(), name="vacancy-pending-release"),
     path("moderation/vacancies/<int:pk>/", ModerationVacancyDetailAPIView.as_view(), name="moderation-vacancy-detail"),
     path("vacancies/<int:pk>/approve/", VacancyApproveAPIView.as_view(), name="vacancy-approve"),
     path("vacancies/<int:pk>/reject/", VacancyRejectAPIView.as_view(), name="vacancy-reject"),
@@ -142,6 +151,7 @@ urlpatterns = [
     path("vacancies/<int:pk>/delete/", VacancyOwnerDeleteAPIView.as_view(), name="vacancy-owner-delete"),
 
     path("vacancies/<int:pk>/contacts/", VacancyContactAPIView.as_view()),
+    path("vacancies/contact-access-states/", VacancyContactAccessStatesAPIView.as_view(), name="vacancy-contact-access-states"),
     path("vacancies/<int:pk>/contact-access-state/", VacancyContactAccessStateAPIView.as_view(), name="vacancy-contact-access-state"),
     path("vacancies/<int:pk>/review/", VacancyReviewAPIView.as_view(), name="vacancy-review"),
     path("employers/<int:owner_user_id>/profile/", EmployerProfileAPIView.as_view(), name="employer-profile"),
@@ -0,0 +1,144 @@
+import csv
+import json
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import WalletTransaction
+
+
+WALLET_HISTORY_PAGE_SIZE = 30
+WALLET_EXPORT_CHUNK_SIZE = 2000
+WALLET_EXPORT_FORMATS = {"csv", "ndjson"}
+WALLET_EXPORT_FIELDS = (
+    "id",
+    "user_id",
+    "kind",
+    "delta_paid_credits",
+    "delta_bonus_credits",
+    "balance_paid_after",
+    "balance_bonus_after",
+    "unlock_method",
+    "note",
+    "related_vacancy_id",
+    "related_vacancy__title",
+    "metadata",
+    "created_at",
+)
+_CURSOR_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def encode_wallet_history_cursor(wallet_transaction):
+    """Opaque keyset cursor for the (created_at, id) ledger order."""
+
+    delta = wallet_transaction.created_at - _CURSOR_EPOCH
+    micros = (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    return f"{micros}-{wallet_transaction.id}"
+
+
+def decode_wallet_history_cursor(raw):
+    micros, _, transaction_id = (raw or "").strip().partition("-")
+    try:
+        return _CURSOR_EPOCH + timedelta(microseconds=int(micros)), int(transaction_id)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("invalid_cursor")
+
+
+def wallet_history_page(user, *, cursor=None, limit=None):
+    """Return one page of the user's ledger newest first and whether more exist.
+
+    Walks the (user, created_at) index from the cursor instead of counting and
+    skipping rows, so deep pages cost the same as the first one.
+    """
+
+    limit = limit or WALLET_HISTORY_PAGE_SIZE
+    transactions = WalletTransaction.objects.filter(user=user).select_related("related_vacancy")
+    if cursor is not None:
+        created_at, transaction_id = cursor
+        transactions = transactions.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=transaction_id)
+        )
+    rows = list(transactions.order_by("-created_at", "-id")[: limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def _parse_export_bound(raw, *, end_of_day):
+    raw = (raw or "").strip()
+    if not raw:
+        return None
+    try:
+        parsed_date = parse_date(raw)
+        parsed = None if parsed_date else parse_datetime(raw)
+    except ValueError:
+        raise ValueError("invalid_date")
+    if parsed_date is not None:
+        # A plain date as the upper bound includes that whole day.
+        if end_of_day:
+            parsed_date += timedelta(days=1)
+        parsed = datetime.combine(parsed_date, time.min)
+    elif parsed is None:
+        raise ValueError("invalid_date")
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.get_current_timezone())
+    return parsed
+
+
+def wallet_export_queryset(*, user_id=None, date_from="", date_to="", kind=""):
+    """Ledger rows for an export, oldest first. Raises ValueError on a bad date."""
+
+    transactions = WalletTransaction.objects.all()
+    if user_id is not None:
+        transactions = transactions.filter(user_id=user_id)
+    start = _parse_export_bound(date_from, end_of_day=False)
+    end = _parse_export_bound(date_to, end_of_day=True)
+    if start is not None:
+        transactions = transactions.filter(created_at__gte=start)
+    if end is not None:
+        transactions = transactions.filter(created_at__lt=end)
+    if kind:
+        transactions = transactions.filter(kind=kind)
+    return transactions.order_by("created_at", "id").values_list(*WALLET_EXPORT_FIELDS)
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(WALLET_EXPORT_FIELDS)
+    for row in rows:
+        row = list(row)
+        row[-2] = json.dumps(row[-2], cls=DjangoJSONEncoder, ensure_ascii=False)
+        row[-1] = row[-1].isoformat()
+        yield writer.writerow(row)
+
+
+def _ndjson_lines(rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(WALLET_EXPORT_FIELDS, row))) + "\n"
+
+
+def wallet_export_response(transactions, *, file_format, filename):
+    """Stream the rows as CSV or NDJSON without holding the ledger in memory.
+
+    iterator() reads through a server-side cursor on PostgreSQL, so memory
+    stays bounded by WALLET_EXPORT_CHUNK_SIZE whatever the ledger size.
+    """
+
+    rows = transactions.iterator(chunk_size=WALLET_EXPORT_CHUNK_SIZE)
+    if file_format == "csv":
+        lines = _csv_lines(rows)
+        content_type = "text/csv; charset=utf-8"
+    else:
+        lines = _ndjson_lines(rows)
+        content_type = "application/x-ndjson"
+    response = StreamingHttpResponse(lines, content_type=content_type)
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{file_format}"'
+    return response
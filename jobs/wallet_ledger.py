@@ -0,0 +1,152 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import UserWallet, WalletBalanceCheckpoint, WalletTransaction
+
+
+LEDGER_CHUNK_SIZE = 2000
+CHECKPOINT_EVERY_TRANSACTIONS = 500
+ZERO_CREDITS = Decimal("0.00")
+
+
+def latest_checkpoint(wallet_id, *, at=None):
+    checkpoints = WalletBalanceCheckpoint.objects.filter(wallet_id=wallet_id)
+    if at is not None:
+        checkpoints = checkpoints.filter(last_transaction_at__lte=at)
+    return checkpoints.order_by("-last_transaction_id").first()
+
+
+def _delta_sums(transactions):
+    totals = transactions.aggregate(
+        paid=Sum("delta_paid_credits"),
+        bonus=Sum("delta_bonus_credits"),
+    )
+    return totals["paid"] or ZERO_CREDITS, totals["bonus"] or ZERO_CREDITS
+
+
+def wallet_balance_at(wallet, at):
+    """Return (paid, bonus) credits of the wallet as of the moment at.
+
+    Starts from the nearest checkpoint and only sums the ledger rows after it.
+    """
+
+    checkpoint = latest_checkpoint(wallet.id, at=at)
+    transactions = WalletTransaction.objects.filter(user_id=wallet.user_id, created_at__lte=at)
+    paid = bonus = ZERO_CREDITS
+    if checkpoint is not None:
+        transactions = transactions.filter(id__gt=checkpoint.last_transaction_id)
+        paid, bonus = checkpoint.paid_credits, checkpoint.bonus_credits
+    tail_paid, tail_bonus = _delta_sums(transactions)
+    return paid + tail_paid, bonus + tail_bonus
+
+
+def reconcile_wallet(
+    wallet_id,
+    *,
+    repair=False,
+    checkpoint_every=CHECKPOINT_EVERY_TRANSACTIONS,
+    chunk_size=LEDGER_CHUNK_SIZE,
+):
+    """Replay the ledger of one wallet from its latest checkpoint.
+
+    The sum of deltas is the source of truth. Rows whose balance_*_after
+    disagrees with it count as ledger drift; they are never rewritten and no
+    checkpoint is written past the first of them, so they keep being reported.
+    A wallet whose stored balance disagrees is wallet drift and is set back to
+    the ledger value when repair is true.
+    """
+
+    result = {
+        "wallet_id": wallet_id,
+        "transactions": 0,
+        "ledger_drift": 0,
+        "first_drift_transaction_id": None,
+        "wallet_drift": False,
+        "repaired": False,
+        "checkpoints": 0,
+    }
+    checkpoint = latest_checkpoint(wallet_id)
+    last_id = checkpoint.last_transaction_id if checkpoint else 0
+    paid = checkpoint.paid_credits if checkpoint else ZERO_CREDITS
+    bonus = checkpoint.bonus_credits if checkpoint else ZERO_CREDITS
+    since_checkpoint = 0
+    new_checkpoints = []
+
+    while True:
+        rows = list(
+            WalletTransaction.objects.filter(wallet_id=wallet_id, id__gt=last_id)
+            .order_by("id")
+            .values_list(
+                "id",
+                "created_at",
+                "delta_paid_credits",
+                "delta_bonus_credits",
+                "balance_paid_after",
+                "balance_bonus_after",
+            )[:chunk_size]
+        )
+        if not rows:
+            break
+        for tx_id, created_at, delta_paid, delta_bonus, paid_after, bonus_after in rows:
+            paid += delta_paid
+            bonus += delta_bonus
+            result["transactions"] += 1
+            since_checkpoint += 1
+            # Audit-only rows (zero deltas) carry an unlocked balance snapshot
+            # that may trail a concurrent spend, so only money moves are checked.
+            has_delta = delta_paid or delta_bonus
+            if has_delta and (paid_after != paid or bonus_after != bonus):
+                result["ledger_drift"] += 1
+                if result["first_drift_transaction_id"] is None:
+                    result["first_drift_transaction_id"] = tx_id
+            if since_checkpoint >= checkpoint_every and not result["ledger_drift"]:
+                new_checkpoints.append(
+                    WalletBalanceCheckpoint(
+                        wallet_id=wallet_id,
+                        last_transaction_id=tx_id,
+                        last_transaction_at=created_at,
+                        paid_credits=paid,
+                        bonus_credits=bonus,
+                        transaction_count=since_checkpoint,
+                    )
+                )
+                since_checkpoint = 0
+        last_id = rows[-1][0]
+
+    if new_checkpoints:
+        WalletBalanceCheckpoint.objects.bulk_create(new_checkpoints, ignore_conflicts=True)
+        result["checkpoints"] = len(new_checkpoints)
+
+    with transaction.atomic():
+        wallet = UserWallet.objects.select_for_update().filter(pk=wallet_id).first()
+        if wallet is None:
+            return result
+        # Rows appended while we were replaying are already reflected in the
+        # wallet; add them under the lock before comparing.
+        tail_paid, tail_bonus = _delta_sums(
+            WalletTransaction.objects.filter(wallet_id=wallet_id, id__gt=last_id)
+        )
+        expected_paid = paid + tail_paid
+        expected_bonus = bonus + tail_bonus
+        if wallet.paid_credits != expected_paid or wallet.bonus_credits != expected_bonus:
+            result["wallet_drift"] = True
+            print(
+                f"[WALLET-DRIFT] wallet={wallet_id} stored_paid={wallet.paid_credits} "
+                f"stored_bonus={wallet.bonus_credits} ledger_paid={expected_paid} "
+                f"ledger_bonus={expected_bonus}"
+            )
+            if repair:
+                wallet.paid_credits = expected_paid
+                wallet.bonus_credits = expected_bonus
+                wallet.save(update_fields=["paid_credits", "bonus_credits", "updated_at"])
+                result["repaired"] = True
+    return result
+
+
+def reconcile_wallets(wallet_ids, *, repair=False, checkpoint_every=CHECKPOINT_EVERY_TRANSACTIONS):
+    return [
+        reconcile_wallet(wallet_id, repair=repair, checkpoint_every=checkpoint_every)
+        for wallet_id in wallet_ids
+    ]
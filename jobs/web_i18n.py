@@ -489,12 +489,19 @@ TRANSLATIONS["ru"].update({
     "chats_subtitle": "Переписка с кандидатами синхронизируется с приложением JobHub.",
     "chats_empty_title": "Чатов пока нет",
     "chats_empty_text": "Когда кандидат напишет по вашей вакансии, диалог появится здесь.",
+    "chats_older": "Более ранние чаты",
+    "chats_search": "Найти",
+    "chats_search_placeholder": "Поиск по сообщениям",
+    "chats_search_more": "Показать ещё",
+    "chats_search_empty": "Ничего не найдено",
     "chat_candidate": "Кандидат",
     "chat_started_from": "Чат начат из вакансии",
     "chat_message_placeholder": "Введите сообщение",
     "chat_send": "Отправить",
     "chat_message_deleted": "Сообщение удалено",
     "chat_edited": "изменено",
+    "chat_load_older": "Показать более ранние",
+    "chat_show_latest": "К последним сообщениям",
     "chat_block": "Заблокировать",
     "chat_unblock": "Разблокировать",
     "chat_block_confirm": "Заблокировать пользователя? Чат останется в списке, но новые сообщения будут недоступны до разблокировки.",
@@ -604,12 +611,19 @@ TRANSLATIONS["en"].update({
     "chats_subtitle": "Your conversations with candidates stay synchronized with the JobHub app.",
     "chats_empty_title": "No chats yet",
     "chats_empty_text": "A conversation will appear here when a candidate writes about your vacancy.",
+    "chats_older": "Older chats",
+    "chats_search": "Search",
+    "chats_search_placeholder": "Search messages",
+    "chats_search_more": "Show more",
+    "chats_search_empty": "Nothing found",
     "chat_candidate": "Candidate",
     "chat_started_from": "Chat started from vacancy",
     "chat_message_placeholder": "Enter a message",
     "chat_send": "Send",
     "chat_message_deleted": "Message deleted",
     "chat_edited": "edited",
+    "chat_load_older": "Load older messages",
+    "chat_show_latest": "Back to latest",
     "chat_block": "Block",
     "chat_unblock": "Unblock",
     "chat_block_confirm": "Block this user? The chat stays in your list, but neither participant can send new messages until you unblock them.",
@@ -719,12 +733,19 @@ TRANSLATIONS["pl"].update({
     "chats_subtitle": "Rozmowy z kandydatami są synchronizowane z aplikacją JobHub.",
     "chats_empty_title": "Brak czatów",
     "chats_empty_text": "Rozmowa pojawi się tutaj, gdy kandydat napisze w sprawie Twojej oferty.",
+    "chats_older": "Starsze czaty",
+    "chats_search": "Szukaj",
+    "chats_search_placeholder": "Szukaj w wiadomościach",
+    "chats_search_more": "Pokaż więcej",
+    "chats_search_empty": "Nic nie znaleziono",
     "chat_candidate": "Kandydat",
     "chat_started_from": "Czat rozpoczęty z oferty",
     "chat_message_placeholder": "Wpisz wiadomość",
     "chat_send": "Wyślij",
     "chat_message_deleted": "Wiadomość usunięta",
     "chat_edited": "edytowano",
+    "chat_load_older": "Pokaż starsze wiadomości",
+    "chat_show_latest": "Wróć do najnowszych",
     "chat_block": "Zablokuj",
     "chat_unblock": "Odblokuj",
     "chat_block_confirm": "Zablokować użytkownika? Czat pozostanie na liście, ale nowe wiadomości będą niedostępne do czasu odblokowania.",
@@ -834,12 +855,19 @@ TRANSLATIONS["uk"].update({
     "chats_subtitle": "Листування з кандидатами синхронізується із застосунком JobHub.",
     "chats_empty_title": "Чатів поки немає",
     "chats_empty_text": "Діалог з'явиться тут, коли кандидат напише щодо вашої вакансії.",
+    "chats_older": "Старіші чати",
+    "chats_search": "Знайти",
+    "chats_search_placeholder": "Пошук у повідомленнях",
+    "chats_search_more": "Показати ще",
+    "chats_search_empty": "Нічого не знайдено",
     "chat_candidate": "Кандидат",
     "chat_started_from": "Чат почато з вакансії",
     "chat_message_placeholder": "Введіть повідомлення",
     "chat_send": "Надіслати",
     "chat_message_deleted": "Повідомлення видалено",
     "chat_edited": "змінено",
+    "chat_load_older": "Показати раніші",
+    "chat_show_latest": "До останніх повідомлень",
     "chat_block": "Заблокувати",
     "chat_unblock": "Розблокувати",
     "chat_block_confirm": "Заблокувати користувача? Чат залишиться у списку, але нові повідомлення будуть недоступні до розблокування.",
@@ -1009,9 +1037,9 @@ def employer_i18n(request):
     wallet_total = None
     if getattr(request.user, "is_authenticated", False):
         # Import locally so this lightweight template context stays usable at startup.
-        from .economy import get_or_create_wallet
+        from .economy import get_wallet
 
-        wallet_total = get_or_create_wallet(request.user).total_credits
+        wallet_total = get_wallet(request.user).total_credits
         from .chat_api import _unread_counts
         from .models import ChatConversation, EmployerBoardPublishingAuthorization
 
@@ -25,12 +25,19 @@ from .api import (
 from .chat_api import (
     CHAT_MESSAGE_RATE_LIMIT,
     CHAT_MESSAGE_RATE_WINDOW,
+    CHAT_PAGE_SIZE,
     _chat_users_are_blocked,
     _send_chat_push_safe,
     _unread_counts,
+    _user_avatar_srcset,
     _user_avatar_url,
     _user_display_name,
+    conversation_page,
+    decode_conversation_cursor,
+    encode_conversation_cursor,
 )
+from .chat_archive import chat_history_page
+from .chat_search import CHAT_SEARCH_MIN_QUERY_LENGTH, search_chat_messages
 from .board_publishing import (
     AUTHORIZATION_TEXT,
     accept_authorization,
@@ -44,6 +51,7 @@ from .auth_api import (
     _phone_reset_request_blocked,
     _phone_reset_verify_blocked,
     _is_password_policy_valid,
+    _record_phone_reset_failure,
     _record_phone_verification_attempt,
     _login_candidates,
     _twilio_verify_check,
@@ -186,6 +194,7 @@ def password_reset(request):
             PhoneVerification.objects.filter(phone_e164=phone, purpose="reset", is_used=False).update(
                 attempts=F("attempts") + 1
             )
+            _record_phone_reset_failure(phone)
             _record_phone_verification_attempt(
                 request, phone_e164=phone, purpose="reset", channel="sms",
                 status_code="check_failed", message=message or "invalid_or_expired_code",
@@ -208,20 +217,6 @@ def password_reset(request):
     return redirect("employer:password_reset")
 
 
-def _employer_chat_queryset(user):
-    return (
-        ChatConversation.objects.filter(employer=user, last_message_at__isnull=False)
-        .select_related(
-            "candidate",
-            "candidate__profile",
-            "employer",
-            "employer__profile",
-            "initial_vacancy",
-        )
-        .order_by("-last_message_at", "-id")
-    )
-
-
 def _chat_block_state(conversation, viewer):
     other_user = conversation.other_user_for(viewer)
     return (
@@ -232,7 +227,15 @@ def _chat_block_state(conversation, viewer):
 
 @login_required(login_url="employer:login")
 def chat_list(request):
-    conversations = list(_employer_chat_queryset(request.user)[:50])
+    query = (request.GET.get("q") or "").strip()
+    if query:
+        return _chat_search_results(request, query)
+
+    try:
+        cursor = decode_conversation_cursor(request.GET["before"]) if request.GET.get("before") else None
+    except ValueError:
+        cursor = None
+    conversations, has_more = conversation_page(request.user, roles=("employer",), cursor=cursor)
     unread_by_id = _unread_counts(conversations, request.user)
     latest_messages = {}
     for message in ChatMessage.objects.filter(conversation__in=conversations).order_by("conversation_id", "-id"):
@@ -247,11 +250,52 @@ def chat_list(request):
                 "conversation": conversation,
                 "candidate_name": _user_display_name(candidate),
                 "candidate_avatar_url": _user_avatar_url(candidate),
+                "candidate_avatar_srcset": _user_avatar_srcset(candidate),
                 "unread_count": unread_by_id.get(conversation.id, 0),
                 "last_message": latest,
             }
         )
-    return render(request, "employer/chat_list.html", {"rows": rows, "unread_count": sum(unread_by_id.values())})
+    return render(
+        request,
+        "employer/chat_list.html",
+        {
+            "rows": rows,
+            "unread_count": sum(unread_by_id.values()),
+            "next_cursor": encode_conversation_cursor(conversations[-1]) if has_more and conversations else "",
+        },
+    )
+
+
+def _chat_search_results(request, query):
+    try:
+        page = max(1, int(request.GET.get("page") or 1))
+    except (TypeError, ValueError):
+        page = 1
+    hits, has_more = [], False
+    if len(query) >= CHAT_SEARCH_MIN_QUERY_LENGTH:
+        hits, has_more = search_chat_messages(request.user, query, page=page, roles=("employer",))
+    search_rows = []
+    for hit in hits:
+        candidate = hit["message"].conversation.candidate
+        search_rows.append(
+            {
+                "conversation": hit["message"].conversation,
+                "message": hit["message"],
+                "snippet": hit["snippet"],
+                "candidate_name": _user_display_name(candidate),
+                "candidate_avatar_url": _user_avatar_url(candidate),
+                "candidate_avatar_srcset": _user_avatar_srcset(candidate),
+            }
+        )
+    return render(
+        request,
+        "employer/chat_list.html",
+        {
+            "search_query": query,
+            "search_rows": search_rows,
+            "search_next_page": page + 1 if has_more else None,
+        },
+    )
 
 
 @login_required(login_url="employer:login")
@@ -351,12 +395,17 @@ def chat_detail(request, conversation_id):
                 messages.success(request, tr(request, "chat_report_sent"))
         return redirect("employer:chat_detail", conversation_id=conversation.id)
 
-    chat_messages = list(
-        ChatMessage.objects.filter(conversation=conversation)
-        .select_related("sender", "reply_to", "reply_to__sender")
-        .order_by("id")
+    try:
+        before_message_id = int(request.GET.get("before") or 0) or None
+    except (TypeError, ValueError):
+        before_message_id = None
+    chat_messages, has_older = chat_history_page(
+        conversation,
+        ChatMessage.objects.filter(conversation=conversation).select_related("sender", "reply_to", "reply_to__sender"),
+        before_message_id=before_message_id,
+        page_size=CHAT_PAGE_SIZE,
     )
-    if chat_messages:
+    if chat_messages and before_message_id is None:
         conversation.employer_last_read_at = chat_messages[-1].created_at
         conversation.save(update_fields=["employer_last_read_at", "updated_at"])
     return render(
@@ -367,7 +416,10 @@ def chat_detail(request, conversation_id):
             "candidate": candidate,
             "candidate_name": _user_display_name(candidate),
             "candidate_avatar_url": _user_avatar_url(candidate),
+            "candidate_avatar_srcset": _user_avatar_srcset(candidate),
             "chat_messages": chat_messages,
+            "older_before_id": chat_messages[0].id if has_older and chat_messages else None,
+            "showing_older": before_message_id is not None,
             "blocked_by_me": blocked_by_me,
             "blocked_by_other": blocked_by_other,
             "report_reasons": ChatReport.REASON_CHOICES,
@@ -623,7 +675,7 @@ def phone_verify_code(request):
         purpose="verify_phone",
         is_used=False,
     ).update(is_used=True)
-    profile, _ = UserProfile.objects.get_or_create(user=request.user)
+    profile = UserProfile.objects.get(user=request.user)
     try:
         profile.phone_e164 = phone
         profile.phone_verified = True